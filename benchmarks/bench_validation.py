@@ -0,0 +1,69 @@
+"""
+Compares the bulk validation engine with per-response Draft7 validation.
+
+    python benchmarks/bench_validation.py --responses 100000 --workers 4
+
+Checks that outcomes and aggregated errors are identical before reporting timings.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_responses
+from nl_case_analyzer.openai_config import ConfigGPT
+from nl_case_analyzer.validate_json import ResponseValidator
+
+
+def draft7_reference(validator, responses):
+    # per-response generic Draft7 validation, as ResponseValidator did before
+    results, errors = [], Counter()
+    for response_json in responses:
+        found = list(validator.validator.iter_errors(json.loads(response_json)))
+        results.append(not found)
+        errors.update((error.json_path, error.validator) for error in found)
+    return results, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--responses", type=int, default=100_000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    responses = make_responses(args.responses, invalid_ratio=args.invalid_ratio)
+    validator = ResponseValidator(ConfigGPT().json_schema)
+
+    start = time.perf_counter()
+    reference_results, reference_errors = draft7_reference(validator, responses)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = validator.validate_many(responses)
+    bulk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel_report = validator.validate_many(responses, workers=args.workers)
+    parallel_time = time.perf_counter() - start
+
+    for name, candidate in (("bulk", report), ("parallel", parallel_report)):
+        if candidate.results != reference_results or candidate.errors != reference_errors:
+            print(f"{name} validation differs from Draft7", file=sys.stderr)
+            return 1
+
+    print(f"{args.responses} responses, {report.total - report.valid_count} invalid")
+    print(f"draft7 per response : {reference_time:8.3f}s")
+    print(f"bulk                : {bulk_time:8.3f}s  ({reference_time / bulk_time:.1f}x)")
+    print(f"bulk, {args.workers} workers    : {parallel_time:8.3f}s  ({reference_time / parallel_time:.1f}x)")
+    for error, count in report.summary()["errors"].items():
+        print(f"  {count:7d}  {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
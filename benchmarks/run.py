@@ -0,0 +1,259 @@
+"""
+Benchmark suite for the loader, validator, writer and visualizer hot paths.
+
+    python benchmarks/run.py --sizes 1k,10k,100k,1m
+    python benchmarks/run.py --sizes 1k,10k --update-baseline
+    python benchmarks/run.py --sizes 1k,10k --baseline benchmarks/baseline.json
+
+Synthetic datasets are generated once per size under benchmarks/data. Every
+benchmark is timed (best and mean of --repeat runs) and memory-profiled with
+tracemalloc in a separate run. Results are written as JSON to --output and compared
+against the baseline; the exit code is 1 when a benchmark got slower or uses more
+memory than the baseline allows.
+
+Timings only compare on the machine that produced them, so no baseline is shipped:
+create one locally with --update-baseline before the first comparison. The
+baseline is ignored by git, and a warning is printed when it comes from another
+platform or CPU count.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import ensure_dataset
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    if value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Every benchmark takes the dataset paths and a scratch directory and returns the
+# callable to measure; everything done before returning is setup and not timed.
+
+def bench_load_dataset(paths, scratch):
+    from nl_case_analyzer.data_loader import CSV_Loader
+
+    loader = CSV_Loader(paths["csv"])
+    return lambda: loader.load_dataset(cols_to_filter="Model", model_name="GPT-3.5-Turbo")
+
+
+def bench_iter_snippets(paths, scratch):
+    from nl_case_analyzer.data_loader import CSV_Loader
+
+    loader = CSV_Loader(paths["csv"])
+    return lambda: sum(1 for _ in loader.iter_snippets("Answer", "Model", "GPT-3.5-Turbo"))
+
+
+def bench_is_valid(paths, scratch):
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.validate_json import ResponseValidator
+
+    validator = ResponseValidator(ConfigGPT().json_schema)
+    responses = _read_json(paths["results"])
+    return lambda: [validator.is_valid(response) for response in responses]
+
+
+def bench_validate_many(paths, scratch):
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.validate_json import ResponseValidator
+
+    validator = ResponseValidator(ConfigGPT().json_schema)
+    responses = _read_json(paths["results"])
+    return lambda: validator.validate_many(responses)
+
+
+def bench_write_json(paths, scratch):
+    from nl_case_analyzer.json_writer import JSONWriter
+
+    writer = JSONWriter(scratch)
+    responses = _read_json(paths["results"])
+    return lambda: writer.write_json(responses, "results.json")
+
+
+def bench_load_results(paths, scratch):
+    # the results loading of main.analyze_stage: validated responses from the journal
+    from nl_case_analyzer.checkpoint import CheckpointJournal
+
+    def run():
+        with CheckpointJournal(paths["journal"]) as journal:
+            return journal.responses_by_id()
+    return run
+
+
+def bench_prepare_data_viz(paths, scratch):
+    from nl_case_analyzer.visualizer import Visualizer
+
+    visualizer = Visualizer(_read_json(paths["results"]), scratch)
+    return visualizer._prepare_data_viz
+
+
+def bench_visualizer_parse(paths, scratch):
+    from nl_case_analyzer.visualizer import Visualizer
+
+    responses = _read_json(paths["results"])
+    return lambda: Visualizer(responses, scratch)
+
+
+def bench_generate_wordcloud(paths, scratch):
+    import matplotlib
+    matplotlib.use("Agg")
+    from nl_case_analyzer.visualizer import Visualizer
+
+    visualizer = Visualizer(_read_json(paths["results"]), scratch)
+    return visualizer.generate_wordcloud
+
+
+BENCHMARKS = {
+    "csv_loader.load_dataset": bench_load_dataset,
+    "csv_loader.iter_snippets": bench_iter_snippets,
+    "validator.is_valid": bench_is_valid,
+    "validator.validate_many": bench_validate_many,
+    "json_writer.write_json": bench_write_json,
+    "main.load_results": bench_load_results,
+    "visualizer.parse": bench_visualizer_parse,
+    "visualizer._prepare_data_viz": bench_prepare_data_viz,
+    "visualizer.generate_wordcloud": bench_generate_wordcloud,
+}
+
+
+def measure(name, size, paths, repeat):
+    with tempfile.TemporaryDirectory() as scratch, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        run = BENCHMARKS[name](paths, scratch)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "size": size,
+        "min_s": round(min(timings), 6),
+        "mean_s": round(sum(timings) / len(timings), 6),
+        "peak_mib": round(peak / 2 ** 20, 3)
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCHMARK_DIR
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """
+    Returns:
+        list: Descriptions of the benchmarks that regressed against the baseline.
+    """
+    reference = {(entry["benchmark"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        base = reference.get((entry["benchmark"], entry["size"]))
+        if base is None:
+            continue
+        time_ratio = entry["min_s"] / base["min_s"] if base["min_s"] else 1.0
+        memory_ratio = entry["peak_mib"] / base["peak_mib"] if base["peak_mib"] else 1.0
+        entry["time_ratio"] = round(time_ratio, 3)
+        entry["memory_ratio"] = round(memory_ratio, 3)
+        if time_ratio > 1 + tolerance:
+            regressions.append(f"{entry['benchmark']} @ {entry['size']}: {time_ratio:.2f}x slower")
+        if memory_ratio > 1 + memory_tolerance:
+            regressions.append(f"{entry['benchmark']} @ {entry['size']}: {memory_ratio:.2f}x peak memory")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the nl_case_analyzer hot paths.")
+    parser.add_argument("--sizes", default="1k,10k", help="comma separated sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="comma separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", default=os.path.join(BENCHMARK_DIR, "data"))
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARK_DIR, "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory growth")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = []
+    for size in (parse_size(value) for value in args.sizes.split(",")):
+        print(f"Preparing synthetic data for {size} snippets...")
+        paths = ensure_dataset(args.data_dir, size, seed=args.seed)
+        for name in names:
+            entry = measure(name, size, paths, args.repeat)
+            results.append(entry)
+            print(f"{name:32s} {size:>9d}  {entry['min_s']:10.4f}s  {entry['peak_mib']:10.1f} MiB")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        baseline = _read_json(args.baseline)
+        current = environment()
+        if any(baseline.get("environment", {}).get(key) != current[key] for key in ("platform", "cpu_count")):
+            print(f"Baseline {args.baseline} was measured on another machine; "
+                  f"run with --update-baseline to store one for this machine.")
+        regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    elif not args.update_baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one.")
+
+    report = {"environment": environment(), "repeat": args.repeat, "results": results, "regressions": regressions}
+    for path in {args.output, args.baseline} if args.update_baseline else {args.output}:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Synthetic snippets, datasets and responses following `sleutelfiguren_schema`, for the benchmarks.
+"""
+import os
+import csv
+import json
+import random
+
+
+ROLES = {
+    "sleutelfiguur_1": ("rechter", "het hof", "de rechtbank", "magistraat", "voorzitter", "rechtsprekende instantie"),
+    "sleutelfiguur_2": ("officier van justitie", "advocaat-generaal", "aanklager", "het Openbaar Ministerie", "OM"),
+    "sleutelfiguur_3": ("verdediging", "raadsman", "raadsvrouw", "advocaat van de verdachte"),
+}
+LABELS = ("betrouwbaarheid", "rechtmatigheid", "overtuigend")
+LABEL_VALUES = ("ja", "nee", "NVT")
+TAGS = (
+    "betrouwbaarheid", "retentiebeleid", "weinig klachten", "onaannemelijke manipulatie",
+    "geen EVRM-schending", "juridische toelaatbaarheid", "bewijswaarde", "technische manipulatie",
+    "belangenconflicten", "mogelijk vervalsing", "encryptie", "servers in buitenland",
+    "rechtshulpverzoek", "onrechtmatig verkregen", "vertrouwensbeginsel", "ennetcom", "encrochat", "sky ecc",
+)
+
+
+def make_response(rng: random.Random) -> dict:
+    response = {}
+    for figuur, roles in ROLES.items():
+        if rng.random() < 0.25:
+            response[figuur] = None
+            continue
+        response[figuur] = {
+            "rol": rng.choice(roles),
+            "zin": f"De {rng.choice(roles)} stelt dat de data {rng.choice(('wel', 'niet'))} bruikbaar zijn.",
+            "crypto_relevant": rng.random() < 0.8,
+            "reden": "Synthetische redenering over het crypto-data bewijsmateriaal.",
+            "tags": rng.sample(TAGS, 5),
+            "labels": {label: rng.choice(LABEL_VALUES) for label in LABELS},
+        }
+    return response
+
+
+def _corrupt(response: dict, rng: random.Random):
+    figures = [figuur for figuur, data in response.items() if data]
+    if not figures:
+        del response["sleutelfiguur_1"]
+        return response
+    data = response[rng.choice(figures)]
+    corruption = rng.randrange(5)
+    if corruption == 0:
+        data["labels"]["betrouwbaarheid"] = "Ja"
+    elif corruption == 1:
+        del data["labels"]
+    elif corruption == 2:
+        data["tags"] = ", ".join(data["tags"])
+    elif corruption == 3:
+        data["rol"] = data["rol"].upper()
+    else:
+        data["extra"] = True
+    return response
+
+
+def make_responses(n: int, invalid_ratio: float = 0.05, seed: int = 1) -> list:
+    """
+    Returns:
+        list: `n` responses as JSON strings, about `invalid_ratio` of them invalid.
+    """
+    rng = random.Random(seed)
+    responses = []
+    for _ in range(n):
+        response = make_response(rng)
+        if rng.random() < invalid_ratio:
+            response = _corrupt(response, rng)
+        responses.append(json.dumps(response, ensure_ascii=False))
+    return responses
+
+
+MODELS = ("GPT-3.5-Turbo", "Llama 3 8B")
+SENTENCES = (
+    "De rechtbank oordeelt dat de {data} betrouwbaar zijn en voor het bewijs kunnen worden gebruikt.",
+    "De officier van justitie betoogt dat de {data} rechtmatig zijn verkregen via een rechtshulpverzoek.",
+    "De verdediging heeft de betrouwbaarheid van de {data} betwist vanwege mogelijke manipulatie.",
+    "Het hof acht het onaannemelijk dat de {data} door derden zijn gewijzigd.",
+    "De raadsman stelt dat de verdediging geen toegang had tot de ruwe {data}.",
+    "Volgens het Openbaar Ministerie ondersteunen de {data} de verklaringen van getuigen.",
+    "De rechtbank ziet geen aanleiding om te twijfelen aan de integriteit van de servers.",
+)
+DATASETS = ("EncroChat-data", "SkyECC-data", "Ennetcom-data", "PGP-berichten")
+
+
+def make_snippet(rng: random.Random) -> str:
+    data = rng.choice(DATASETS)
+    return " ".join(rng.choice(SENTENCES).format(data=data) for _ in range(rng.randint(3, 7)))
+
+
+def write_csv(path: str, n: int, seed: int = 1) -> str:
+    """
+    Writes a semicolon separated dataset shaped like the analysis dataset, with `n`
+    rows alternating between the supported models.
+
+    Returns:
+        str: The path of the written file.
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["ID", "Model", "Question", "Answer"])
+        for idx in range(n):
+            writer.writerow([idx, MODELS[idx % len(MODELS)], "Vat de uitspraak samen.", make_snippet(rng)])
+    return path
+
+
+def write_journal(path: str, responses: list) -> str:
+    """
+    Writes responses as a checkpoint journal, as `CheckpointJournal.append` does.
+
+    Returns:
+        str: The path of the written file.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for idx, response in enumerate(responses):
+            f.write(json.dumps({"snippet_id": f"{idx:016x}", "response": response}, ensure_ascii=False) + "\n")
+    return path
+
+
+def ensure_dataset(directory: str, n: int, seed: int = 1) -> dict:
+    """
+    Generates (once) the synthetic csv, results list and journal of size `n`.
+
+    Returns:
+        dict: Paths of the 'csv', 'results' and 'journal' files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "csv": os.path.join(directory, f"dataset_{n}_{seed}.csv"),
+        "results": os.path.join(directory, f"results_{n}_{seed}.json"),
+        "journal": os.path.join(directory, f"journal_{n}_{seed}.jsonl"),
+    }
+    if not os.path.exists(paths["csv"]):
+        write_csv(paths["csv"], n, seed)
+    if not (os.path.exists(paths["results"]) and os.path.exists(paths["journal"])):
+        responses = make_responses(n, invalid_ratio=0.0, seed=seed)
+        with open(paths["results"], "w", encoding="utf-8") as f:
+            json.dump(responses, f, ensure_ascii=False)
+        write_journal(paths["journal"], responses)
+    return paths
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from collections import Counter
+from nl_case_analyzer.records import ResultRecords
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AggregateStore:
+    """
+    Persistent label and tag counts, updated incrementally per results file.
+
+    A manifest records which results files were ingested (size, mtime and content
+    hash), so only new or changed files are parsed. Counts are kept per source file
+    so a changed or removed file can be replaced without recounting the others.
+    The store also remembers a digest of the counts behind every rendered figure,
+    so figures are only re-rendered when their counts changed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the AggregateStore.
+
+        Args:
+            path (str): Location of the SQLite database file.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS manifest (
+                source TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                results INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS label_counts (
+                source TEXT NOT NULL,
+                sleutelfiguur TEXT NOT NULL,
+                label TEXT NOT NULL,
+                value TEXT NOT NULL,
+                crypto_relevant TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (source, sleutelfiguur, label, value, crypto_relevant)
+            );
+            CREATE TABLE IF NOT EXISTS tag_counts (
+                source TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (source, tag)
+            );
+            CREATE TABLE IF NOT EXISTS render_state (
+                name TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                rendered_at REAL NOT NULL
+            );
+            """
+        )
+        self.connection.commit()
+
+    def _is_current(self, source: str, size: int, mtime: float) -> bool:
+        row = self.connection.execute(
+            "SELECT size, mtime, sha256 FROM manifest WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return False
+        if (row[0], row[1]) == (size, mtime):
+            return True
+        # touched but possibly unchanged, compare the content
+        if row[2] != _file_digest(source):
+            return False
+        # remember the new size and mtime, so the file is not hashed again next run
+        with self.connection:
+            self.connection.execute(
+                "UPDATE manifest SET size = ?, mtime = ? WHERE source = ?", (size, mtime, source)
+            )
+        return True
+
+    def _remove_source(self, source: str):
+        for table in ("label_counts", "tag_counts", "manifest"):
+            self.connection.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+
+    def ingest(self, path: str) -> bool:
+        """
+        Adds the counts of a JSON results file unless it was already ingested unchanged.
+
+        Args:
+            path (str): Location of a results file (list of response strings).
+
+        Returns:
+            bool: True when the file was (re)ingested.
+        """
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        if self._is_current(source, stat.st_size, stat.st_mtime):
+            return False
+
+        with open(source, "r", encoding="utf-8") as f:
+            records = ResultRecords.from_json_list(json.load(f))
+
+        label_counts = records.label_frame().groupby(
+            ["sleutelfiguur", "label", "value", "crypto_relevant"]
+        ).size()
+        tag_counts = records.tag_counter()
+
+        with self.connection:
+            self._remove_source(source)
+            self.connection.executemany(
+                "INSERT INTO label_counts VALUES (?, ?, ?, ?, ?, ?)",
+                ((source, *key, int(count)) for key, count in label_counts.items())
+            )
+            self.connection.executemany(
+                "INSERT INTO tag_counts VALUES (?, ?, ?)",
+                ((source, tag, count) for tag, count in tag_counts.items())
+            )
+            self.connection.execute(
+                "INSERT INTO manifest VALUES (?, ?, ?, ?, ?, ?)",
+                (source, stat.st_size, stat.st_mtime, _file_digest(source), records.result_count, time.time())
+            )
+        print(f"Ingested {records.result_count} results from {source}")
+        return True
+
+    def sync(self, paths) -> int:
+        """
+        Brings the store in line with a set of results files: new or changed files are
+        ingested and files that are no longer present are removed.
+
+        Args:
+            paths (iterable): Locations of all current results files.
+
+        Returns:
+            int: Number of files that were (re)ingested or removed.
+        """
+        sources = {os.path.abspath(path) for path in paths}
+        changed = sum(1 for source in sorted(sources) if self.ingest(source))
+
+        known = {row[0] for row in self.connection.execute("SELECT source FROM manifest")}
+        with self.connection:
+            for source in known - sources:
+                print(f"Removing counts of {source}")
+                self._remove_source(source)
+                changed += 1
+        return changed
+
+    def label_counts(self, sleutelfiguur: str = None):
+        """
+        Returns:
+            list: (sleutelfiguur, label, value, crypto_relevant, count) tuples summed over
+            all ingested files, optionally for a single sleutelfiguur.
+        """
+        query = (
+            "SELECT sleutelfiguur, label, value, crypto_relevant, SUM(count) FROM label_counts "
+            "{where} GROUP BY sleutelfiguur, label, value, crypto_relevant "
+            "ORDER BY sleutelfiguur, label, value, crypto_relevant"
+        )
+        if sleutelfiguur is None:
+            return self.connection.execute(query.format(where="")).fetchall()
+        return self.connection.execute(
+            query.format(where="WHERE sleutelfiguur = ?"), (sleutelfiguur,)
+        ).fetchall()
+
+    def figure_counts(self, sleutelfiguur: str) -> list:
+        """
+        Returns:
+            list: (label, value, count) tuples of one sleutelfiguur, as used by its plot.
+        """
+        return self.connection.execute(
+            "SELECT label, value, SUM(count) FROM label_counts WHERE sleutelfiguur = ? "
+            "GROUP BY label, value ORDER BY label, value",
+            (sleutelfiguur,)
+        ).fetchall()
+
+    def tag_counts(self) -> Counter:
+        """
+        Returns:
+            Counter: Tag frequencies over all ingested files.
+        """
+        return Counter(dict(self.connection.execute(
+            "SELECT tag, SUM(count) FROM tag_counts GROUP BY tag"
+        ).fetchall()))
+
+    @staticmethod
+    def digest(counts) -> str:
+        """
+        Returns:
+            str: Content hash of a set of counts, used to detect changes.
+        """
+        payload = json.dumps(sorted(counts.items()) if isinstance(counts, dict) else sorted(counts),
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def needs_render(self, name: str, digest: str, output_path: str) -> bool:
+        """
+        Returns:
+            bool: True when the figure is missing or its counts changed since it was rendered.
+        """
+        if not os.path.exists(output_path):
+            return True
+        row = self.connection.execute("SELECT digest FROM render_state WHERE name = ?", (name,)).fetchone()
+        return row is None or row[0] != digest
+
+    def mark_rendered(self, name: str, digest: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO render_state VALUES (?, ?, ?)", (name, digest, time.time())
+            )
+
+    def close(self):
+        self.connection.close()
+
@@ -1,43 +1,389 @@
+import os
 import time
-from openai import OpenAI
+import asyncio
+from collections import deque
+from nl_case_analyzer.batch import write_batch_requests, iter_batch_output, wait_for_batch
+from nl_case_analyzer.rate_limiter import RetryPolicy
+from nl_case_analyzer.telemetry import CallTelemetry
+from nl_case_analyzer.packing import PACKED_INSTRUCTIONS, build_packed_schema, pack_snippets, unpack_response
+
+
+# upper bound of the completion length of a single request
+MAX_COMPLETION_TOKENS = 16384
+
+
+class _Call:
+    """
+    State of one completion request over its attempts.
+    """
+
+    def __init__(self, request, estimated_tokens):
+        self.request = request
+        self.estimated_tokens = estimated_tokens
+        self.call_started = time.perf_counter()
+        self.started = self.call_started
+        self.attempt = 0
+        self.failed = set()
+        # set per attempt by `AnalyzeGPT._start_attempt`
+        self.endpoint = None
+        self.client = None
+        self.rate_limiter = None
+        self.sent = request
 
 
 class AnalyzeGPT:
-    def __init__(self, config):
+    def __init__(self, config, cache=None, rate_limiter=None, retry_policy=None, telemetry=None, router=None,
+                 validator=None):
+        """
+        Initializes the API handler.
+
+        Args:
+            config (dict): Configuration from `ConfigGPT.get_configuration`.
+            cache (ResponseCache): Optional persistent response cache consulted
+                before every API call.
+            rate_limiter (AdaptiveRateLimiter): Optional client-side rate limiter.
+                When set, it replaces the fixed sleep between calls.
+            retry_policy (RetryPolicy): Backoff and retry rules for failed calls.
+            telemetry (CallTelemetry): Per-call latency, token and cost metrics.
+            router (BackendRouter): Optional router spreading the calls over several
+                endpoints; the configured clients are then not used for completions.
+            validator (ResponseValidator): Only responses passing it are cached. A
+                validator of the configured schema is created when a cache is given.
+        """
         self.client = config["client"]
+        self.async_client = config.get("async_client")
 
         self.api_key = config["api_key"]
         self.system_prompt = config["system_prompt"]
         self.json_schema = config["json_schema"]
         self.parameters = config["parameters"]
+        self.concurrency = config.get("concurrency", 8)
+        self.cache = cache
+        if cache is not None and validator is None:
+            from nl_case_analyzer.validate_json import ResponseValidator
 
-    def analyze_text(self, user_input):
-        try:
-            response = self.client.chat.completions.create(
-                model=self.parameters["model"],
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                temperature=self.parameters["temperature"],
-                max_tokens=self.parameters["max_tokens"],
-                top_p = self.parameters["top_p"],
-                frequency_penalty = self.parameters["frequency_penalty"],
-                presence_penalty = self.parameters["presence_penalty"],
-
-                
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": self.json_schema
-                }
-            )
+            validator = ResponseValidator(schema=self.json_schema)
+        self.validator = validator
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.telemetry = telemetry or CallTelemetry(prices=config.get("prices"))
+        self.router = router
+
+        # Shared request prefix, built once so every call sends byte-identical
+        # system prompt and schema ahead of the snippet. This lets provider-side
+        # prompt caching reuse the prefix across calls.
+        self._system_message = {"role": "system", "content": self.system_prompt}
+        self._response_format = {
+            "type": "json_schema",
+            "json_schema": self.json_schema
+        }
+        self._sampling_parameters = {
+            name: self.parameters[name]
+            for name in ("temperature", "max_tokens", "top_p", "frequency_penalty", "presence_penalty")
+        }
+        self._packed_system_message = None
+        self._packed_response_format = None
+        self.packing_fallbacks = 0
+
+    def _build_request(self, user_input):
+        """
+        Builds the keyword arguments of a chat completion request.
+
+        The snippet is the only part that differs between requests and always comes
+        last, after the shared system prompt.
+
+        Args:
+            user_input (str): The text snippet to analyze.
+
+        Returns:
+            dict: Keyword arguments for `chat.completions.create`.
+        """
+        return {
+            "model": self.parameters["model"],
+            "messages": [
+                self._system_message,
+                {"role": "user", "content": user_input}
+            ],
+            **self._sampling_parameters,
+            "response_format": self._response_format
+        }
+
+    def _cache_key(self, user_input, model=None):
+        """
+        Args:
+            user_input (str): The text snippet.
+            model (str): Model that produced the response, when a router endpoint
+                replaced the configured one.
+        """
+        model = model or self.parameters["model"]
+        return self.cache.make_key(
+            model,
+            {**self.parameters, "model": model},
+            self.system_prompt,
+            self.json_schema,
+            user_input
+        )
 
+    def _packed_cache_key(self, user_input, model=None):
+        # packed answers come from the packed prompt and schema, never from the plain request
+        self._init_packed_prefix()
+        model = model or self.parameters["model"]
+        return self.cache.make_key(
+            model,
+            {**self.parameters, "model": model},
+            self._packed_system_message["content"],
+            self._packed_response_format["json_schema"],
+            user_input
+        )
 
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error analyzing text: {e}")
+    def _cache_lookup(self, user_input):
+        """
+        Returns the cached response of the configured model, None when there is none
+        or no cache is configured.
+        """
+        if self.cache is None:
             return None
-    
+        return self.cache.get(self._cache_key(user_input))
+
+    def _cache_store(self, user_input, content, model=None, packed=False):
+        """
+        Caches a response under the key of the model that produced it, so an answer of
+        an endpoint serving another model is never returned for the configured model.
+        """
+        # an invalid response would be served again on every run, so it is not cached
+        if self.cache is None or not content or not self.validator.is_valid(content, quiet=True):
+            return
+        key = self._packed_cache_key(user_input, model) if packed else self._cache_key(user_input, model)
+        self.cache.set(key, content)
+
+    def _estimate_tokens(self, request):
+        """
+        Rough token estimate of a request as counted against the tokens/min quota:
+        ~4 characters per prompt token plus the completion budget.
+        """
+        prompt_chars = sum(len(message["content"]) for message in request["messages"])
+        return prompt_chars // 4 + request["max_tokens"]
+
+    def _start_attempt(self, call, use_async):
+        """
+        Picks the client, rate limiter and request of the next attempt of `call`: the
+        configured client, or the endpoint chosen by the router with its own limiter
+        and its model name when it differs.
+
+        Returns:
+            bool: False when every endpoint of the router is unavailable.
+        """
+        call.endpoint = None
+        call.client = self.async_client if use_async else self.client
+        call.rate_limiter = self.rate_limiter
+        call.sent = call.request
+        if self.router is None:
+            return True
+
+        endpoint = self.router.acquire(exclude=call.failed)
+        if endpoint is None:
+            return False
+        call.endpoint = endpoint
+        call.client = endpoint.async_client if use_async else endpoint.client
+        call.rate_limiter = endpoint.rate_limiter or self.rate_limiter
+        if endpoint.model and endpoint.model != call.request["model"]:
+            call.sent = {**call.request, "model": endpoint.model}
+        return True
+
+    def _handle_error(self, error, attempt, rate_limiter=None):
+        """
+        Records a failed call and decides whether to retry it.
+
+        Args:
+            error (Exception): The error raised by the client.
+            attempt (int): Number of the failed attempt, starting at 0.
+            rate_limiter (AdaptiveRateLimiter): Limiter of the endpoint that failed,
+                the handler's own limiter when None.
+
+        Returns:
+            float or None: Seconds to wait before the retry, None when the call is dropped.
+        """
+        rate_limiter = rate_limiter or self.rate_limiter
+        error_class = self.retry_policy.classify(error)
+        if rate_limiter is not None and error_class == "rate_limit":
+            # hold back every request, not just this one, until the quota recovers
+            rate_limiter.pause(self.retry_policy.retry_after(error) or self.retry_policy.base_delay)
+
+        if self.retry_policy.should_retry(error_class, attempt):
+            self.retry_policy.record_retry(error_class)
+            delay = self.retry_policy.backoff(attempt, error)
+            print(f"Retrying after {error_class} error in {delay:.1f}s (attempt {attempt + 1}): {error}")
+            return delay
+
+        self.retry_policy.record_drop(error_class)
+        print(f"Error analyzing text: {error}")
+        return None
+
+    def _record_drop(self, call):
+        finished = time.perf_counter()
+        self.telemetry.record_call(
+            call.sent["model"], finished - call.started, retries=call.attempt,
+            wall_time=finished - call.call_started, status="dropped"
+        )
+
+    def _unavailable(self, call):
+        """
+        Handles an attempt for which every endpoint is unavailable. The wait counts as
+        a retry, so a call is dropped when the endpoints stay down.
+
+        Returns:
+            float or None: Seconds until the first breaker half-opens, None when the call is dropped.
+        """
+        call.started = time.perf_counter()
+        if call.attempt < self.retry_policy.max_retries:
+            self.retry_policy.record_retry("unavailable")
+            return self.router.retry_in()
+
+        self.retry_policy.record_drop("unavailable")
+        print("Error analyzing text: no endpoint available")
+        self._record_drop(call)
+        return None
+
+    def _succeeded(self, call, response, ttfb):
+        """
+        Records a successful attempt.
+
+        Returns:
+            str: The message content.
+        """
+        finished = time.perf_counter()
+        if call.endpoint is not None:
+            self.router.release(call.endpoint, success=True, latency=finished - call.started)
+        self.telemetry.record_call(
+            call.sent["model"], finished - call.started, ttfb, response.usage,
+            retries=call.attempt, wall_time=finished - call.call_started
+        )
+        return response.choices[0].message.content
+
+    def _failed(self, call, error):
+        """
+        Records a failed attempt and decides whether and when to retry it.
+
+        Returns:
+            float or None: Seconds to wait before the retry, None when the call is dropped.
+        """
+        if call.endpoint is not None:
+            self.router.release(call.endpoint, success=False, error_class=self.retry_policy.classify(error))
+            call.failed.add(call.endpoint.name)
+        delay = self._handle_error(error, call.attempt, call.rate_limiter)
+        if delay is None:
+            self._record_drop(call)
+            return None
+        if call.endpoint is not None:
+            if self.router.fail_over(call.failed):
+                # another endpoint can take the request now, no need to back off
+                delay = 0
+            else:
+                call.failed.clear()
+        return delay
+
+    def _cancelled(self, call):
+        # cancelled, e.g. when a worker loses its lease
+        if call.endpoint is not None:
+            self.router.release(call.endpoint, success=False, error_class="fatal")
+
+    def _complete(self, request):
+        """
+        Sends a chat completion request, applying rate limiting and retries.
+
+        Returns:
+            tuple: (content, model) where content is the message content, or None when
+            the call was dropped, and model the model that was asked last.
+        """
+        call = _Call(request, self._estimate_tokens(request))
+        while True:
+            if not self._start_attempt(call, use_async=False):
+                delay = self._unavailable(call)
+            else:
+                call.started = time.perf_counter()
+                try:
+                    if call.rate_limiter is not None:
+                        call.rate_limiter.acquire(call.estimated_tokens)
+                        call.started = time.perf_counter()
+                    # streaming response, so the headers are timed before the body is read
+                    with call.client.chat.completions.with_streaming_response.create(**call.sent) as raw_response:
+                        ttfb = time.perf_counter() - call.started
+                        if call.rate_limiter is not None:
+                            call.rate_limiter.update_from_headers(raw_response.headers)
+                        response = raw_response.parse()
+                    return self._succeeded(call, response, ttfb), call.sent["model"]
+                except Exception as e:
+                    delay = self._failed(call, e)
+                except BaseException:
+                    self._cancelled(call)
+                    raise
+            if delay is None:
+                return None, call.sent["model"]
+            time.sleep(delay)
+            call.attempt += 1
+
+    async def _complete_async(self, request):
+        """
+        Async counterpart of `_complete`, using the shared async client.
+        """
+        if self.router is None and self.async_client is None:
+            raise ValueError("No 'async_client' present in the configuration.")
+
+        call = _Call(request, self._estimate_tokens(request))
+        while True:
+            if not self._start_attempt(call, use_async=True):
+                delay = self._unavailable(call)
+            else:
+                call.started = time.perf_counter()
+                try:
+                    if call.rate_limiter is not None:
+                        await call.rate_limiter.acquire_async(call.estimated_tokens)
+                        call.started = time.perf_counter()
+                    # streaming response, so the headers are timed before the body is read
+                    async with call.client.chat.completions.with_streaming_response.create(**call.sent) as raw_response:
+                        ttfb = time.perf_counter() - call.started
+                        if call.rate_limiter is not None:
+                            call.rate_limiter.update_from_headers(raw_response.headers)
+                        response = await raw_response.parse()
+                    return self._succeeded(call, response, ttfb), call.sent["model"]
+                except Exception as e:
+                    delay = self._failed(call, e)
+                except BaseException:
+                    self._cancelled(call)
+                    raise
+            if delay is None:
+                return None, call.sent["model"]
+            await asyncio.sleep(delay)
+            call.attempt += 1
+
+    def analyze_text(self, user_input):
+        cached = self._cache_lookup(user_input)
+        if cached is not None:
+            return cached
+
+        content, model = self._complete(self._build_request(user_input))
+        self._cache_store(user_input, content, model)
+        return content
+
+    async def analyze_text_async(self, user_input, refresh=False):
+        """
+        Async counterpart of `analyze_text`, using the shared async client.
+
+        Args:
+            user_input (str): The text snippet to analyze.
+            refresh (bool): Ignore a cached response and replace it with a new one.
+
+        Returns:
+            str or None: The JSON response, or None when the call failed.
+        """
+        cached = self._cache_lookup(user_input)
+        if cached is not None and not refresh:
+            return cached
+
+        content, model = await self._complete_async(self._build_request(user_input))
+        self._cache_store(user_input, content, model)
+        return content
+
     def analyze_snippets(self, snippets, timeout=5):
         """
         Analyze a list of text snippets and return the results.
@@ -51,12 +397,272 @@ class AnalyzeGPT:
         results = []
         for i, snippet in enumerate(snippets):
             print(f"Processing snippet {i + 1}/{len(snippets)}...")
+            hits_before = self.cache.hits if self.cache is not None else 0
             result = self.analyze_text(snippet)
             if result:
                 print(f"Snippet {i + 1} processed successfully.")
                 results.append(result)
             else:
                 print(f"Snippet {i + 1} failed to process.")
-            
-            time.sleep(timeout)
-        return results
\ No newline at end of file
+
+            # cached responses did not touch the API, and a rate limiter paces calls itself
+            if self.rate_limiter is None and (self.cache is None or self.cache.hits == hits_before):
+                time.sleep(timeout)
+        print(self.retry_policy.summary())
+        print(self.telemetry.summary())
+        if self.router is not None:
+            print(self.router.summary())
+        return results
+
+    def analyze_snippets_batch(self, snippets, snippet_ids, backend, work_dir, poll_interval=30):
+        """
+        Analyze text snippets through the Batch API and stream the results back.
+
+        The requests are built exactly like `analyze_text` builds them. Snippets with a
+        cached response are answered from the cache and left out of the batch.
+
+        Args:
+            snippets (list): Text snippets to process.
+            snippet_ids (list): Stable ids of the snippets, used as batch custom ids.
+            backend: OpenAIBatchBackend, or LocalBatchBackend to run offline.
+            work_dir (str): Directory for the request and output files.
+            poll_interval (float): Seconds between batch status checks.
+
+        Yields:
+            tuple: (snippet_id, response) for every snippet, where response is None when
+            the request failed or the batch ended without answering it.
+        """
+        os.makedirs(work_dir, exist_ok=True)
+
+        texts = {}
+        for sid, snippet in zip(snippet_ids, snippets):
+            if sid in texts:
+                continue
+            cached = self._cache_lookup(snippet)
+            if cached is not None:
+                yield sid, cached
+                continue
+            texts[sid] = snippet
+
+        if not texts:
+            return
+
+        request_path = write_batch_requests(
+            ((sid, self._build_request(text)) for sid, text in texts.items()),
+            os.path.join(work_dir, f"batch_requests_{int(time.time())}.jsonl")
+        )
+        batch_id = backend.submit(request_path)
+        print(f"Submitted batch {batch_id} with {len(texts)} requests.")
+
+        status = wait_for_batch(backend, batch_id, poll_interval=poll_interval)
+        if status != "completed":
+            print(f"Batch {batch_id} ended with status '{status}'.")
+
+        # expired and cancelled batches keep the output of the requests that finished,
+        # requests that failed inside the batch are only listed in the error file
+        seen = set()
+        paths = (
+            backend.download(batch_id, os.path.join(work_dir, f"{batch_id}_output.jsonl")),
+            backend.download_errors(batch_id, os.path.join(work_dir, f"{batch_id}_errors.jsonl"))
+        )
+        for path in paths:
+            if path is None:
+                continue
+            for sid, content in iter_batch_output(path):
+                if sid not in texts or sid in seen:
+                    continue
+                seen.add(sid)
+                self._cache_store(texts[sid], content)
+                yield sid, content
+
+        # every submitted snippet is reported, so unanswered ones reach the repair stage
+        missing = [sid for sid in texts if sid not in seen]
+        if missing:
+            print(f"{len(missing)} requests of batch {batch_id} have no output.")
+        for sid in missing:
+            yield sid, None
+
+    @staticmethod
+    async def _ordered_map(items, worker, concurrency):
+        """
+        Runs `worker` over `items` with at most `concurrency` calls in flight and
+        yields (index, result) pairs in input order.
+
+        Items are scheduled in a sliding window, so `items` may be any (lazy) iterable.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await worker(item)
+
+        # keep a bounded window of scheduled tasks so memory stays flat
+        window = concurrency * 2
+        pending = deque()
+        item_iter = iter(enumerate(items))
+
+        def schedule():
+            for idx, item in item_iter:
+                pending.append((idx, asyncio.ensure_future(bounded(item))))
+                if len(pending) >= window:
+                    break
+
+        schedule()
+        try:
+            while pending:
+                idx, task = pending.popleft()
+                result = await task
+                schedule()
+                yield idx, result
+        finally:
+            # cancel outstanding work when the consumer stops early
+            for _, task in pending:
+                task.cancel()
+
+    async def analyze_snippets_async(self, snippets, concurrency=None, refresh=False):
+        """
+        Analyze text snippets concurrently and yield the results in input order.
+
+        At most `concurrency` requests are in flight at the same time. Snippets are
+        scheduled in a sliding window, so the input may be any (lazy) iterable.
+
+        Args:
+            snippets (iterable): Text snippets to process.
+            concurrency (int): Maximum number of concurrent requests. Defaults to
+                the `concurrency` value of the configuration.
+            refresh (bool): Request new responses instead of cached ones, e.g. when
+                re-queueing snippets whose cached response was invalid.
+
+        Yields:
+            tuple: (index, response) where response is None when the call failed.
+        """
+        concurrency = concurrency or self.concurrency
+
+        async def worker(snippet):
+            return await self.analyze_text_async(snippet, refresh=refresh)
+
+        async for idx, result in self._ordered_map(snippets, worker, concurrency):
+            if result:
+                print(f"Snippet {idx + 1} processed successfully.")
+            else:
+                print(f"Snippet {idx + 1} failed to process.")
+            yield idx, result
+        print(self.retry_policy.summary())
+        print(self.telemetry.summary())
+        if self.router is not None:
+            print(self.router.summary())
+
+    def _init_packed_prefix(self):
+        if self._packed_system_message is None:
+            self._packed_system_message = {
+                "role": "system",
+                "content": self.system_prompt + PACKED_INSTRUCTIONS
+            }
+            self._packed_response_format = {
+                "type": "json_schema",
+                "json_schema": build_packed_schema(self.json_schema)
+            }
+
+    def _build_packed_request(self, snippets):
+        """
+        Builds one request analyzing several snippets, using the packed array schema.
+        """
+        self._init_packed_prefix()
+        return {
+            "model": self.parameters["model"],
+            "messages": [
+                self._packed_system_message,
+                {"role": "user", "content": pack_snippets(snippets)}
+            ],
+            **self._sampling_parameters,
+            # the completion holds one result per snippet
+            "max_tokens": min(self.parameters["max_tokens"] * len(snippets), MAX_COMPLETION_TOKENS),
+            "response_format": self._packed_response_format
+        }
+
+    async def _analyze_pack_async(self, snippets, validator):
+        """
+        Analyzes a pack of snippets in one call, falling back to single-snippet calls
+        for every element that is missing or fails validation.
+
+        A snippet is answered from the cache by a single-snippet response or by an
+        earlier packed answer; packed answers are cached under their own key, which
+        covers the packed prompt and schema they were produced with.
+
+        Returns:
+            list: One response per snippet, None where the fallback failed as well.
+        """
+        results = [None] * len(snippets)
+        misses = []
+        for i, snippet in enumerate(snippets):
+            cached = self._cache_lookup(snippet)
+            if cached is None and self.cache is not None:
+                cached = self.cache.get(self._packed_cache_key(snippet))
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+
+        if len(misses) > 1:
+            content, model = await self._complete_async(
+                self._build_packed_request([snippets[i] for i in misses])
+            )
+            parts = unpack_response(content, len(misses)) if content else [None] * len(misses)
+            for i, part in zip(misses, parts):
+                if part is not None and validator.is_valid(part):
+                    results[i] = part
+                    self._cache_store(snippets[i], part, model, packed=True)
+            self.packing_fallbacks += sum(1 for i in misses if results[i] is None)
+
+        for i in misses:
+            if results[i] is None:
+                results[i] = await self.analyze_text_async(snippets[i])
+        return results
+
+    async def analyze_snippets_packed_async(self, snippets, validator, pack_size=5, concurrency=None):
+        """
+        Analyze text snippets with `pack_size` snippets per API call.
+
+        Packing shares the fixed system prompt and schema over several snippets, which
+        cuts both the input tokens per snippet and the number of requests. Each element
+        of the packed response is checked with `validator`; elements that fail are
+        re-requested with a single-snippet call.
+
+        Args:
+            snippets (iterable): Text snippets to process.
+            validator (ResponseValidator): Validator for single-snippet responses.
+            pack_size (int): Number of snippets per request.
+            concurrency (int): Maximum number of concurrent requests.
+
+        Yields:
+            tuple: (index, response) in input order, response is None when the call failed.
+        """
+        concurrency = concurrency or self.concurrency
+
+        def packs():
+            pack = []
+            for snippet in snippets:
+                pack.append(snippet)
+                if len(pack) == pack_size:
+                    yield pack
+                    pack = []
+            if pack:
+                yield pack
+
+        async def worker(pack):
+            return await self._analyze_pack_async(pack, validator)
+
+        idx = 0
+        async for _, pack_results in self._ordered_map(packs(), worker, concurrency):
+            for result in pack_results:
+                if result:
+                    print(f"Snippet {idx + 1} processed successfully.")
+                else:
+                    print(f"Snippet {idx + 1} failed to process.")
+                yield idx, result
+                idx += 1
+        print(f"Packed elements re-requested individually: {self.packing_fallbacks}")
+        print(self.retry_policy.summary())
+        print(self.telemetry.summary())
+        if self.router is not None:
+            print(self.router.summary())
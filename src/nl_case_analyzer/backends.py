@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import threading
+
+
+class CircuitBreaker:
+    """
+    Stops routing to an endpoint after consecutive failures.
+
+    The breaker opens after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds it lets a single probe request through (half open); a
+    success closes it again, a failure re-opens it with a doubled timeout, up to
+    `max_reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_reset_timeout: float = 300.0):
+        """
+        Initializes the CircuitBreaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker.
+            reset_timeout (float): Seconds before the first probe of an open breaker.
+            max_reset_timeout (float): Upper bound of the timeout after failed probes.
+        """
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+
+    def retry_in(self) -> float:
+        """
+        Returns:
+            float: Seconds until the breaker allows a request, 0 when it does now.
+        """
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allows(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in() == 0:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        return self.state == self.HALF_OPEN and not self._probing
+
+    def on_dispatch(self):
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+
+    def on_release(self):
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+            self.trip()
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        if self.state != self.OPEN:
+            self.trips += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class Endpoint:
+    """
+    One OpenAI-compatible backend: an API key on the OpenAI API, or e.g. a local
+    server accepting the same `json_schema` response format, with its own clients,
+    rate limiter and circuit breaker.
+    """
+
+    def __init__(self, name: str, api_key: str = None, base_url: str = None, model: str = None,
+                 weight: float = 1.0, rate_limits: dict = None, breaker: CircuitBreaker = None):
+        """
+        Initializes the Endpoint.
+
+        Args:
+            name (str): Name used in logs and statistics.
+            api_key (str): API key of the endpoint.
+            base_url (str): Endpoint url, None for the OpenAI API.
+            model (str): Model name at this endpoint, None to keep the configured model.
+            weight (float): Relative share of the traffic the endpoint can take.
+            rate_limits (dict): requests_per_minute and tokens_per_minute of the endpoint's
+                own limiter, None to use the limiter of the handler.
+            breaker (CircuitBreaker): Failure handling, a default breaker when None.
+        """
+        from nl_case_analyzer.openai_config import ConfigGPT
+        from nl_case_analyzer.rate_limiter import AdaptiveRateLimiter
+
+        if weight <= 0:
+            raise ValueError(f"Endpoint '{name}' needs a positive weight, got {weight}.")
+        config = ConfigGPT(api_key=api_key, base_url=base_url)
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.weight = weight
+        self.client = config.client
+        self.async_client = config.async_client
+        self.rate_limiter = AdaptiveRateLimiter(**rate_limits) if rate_limits else None
+        self.breaker = breaker or CircuitBreaker()
+
+        self.outstanding = 0
+        self.calls = 0
+        self.failures = 0
+        self.healthy = True
+        self.latency = None
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    def check_health(self, timeout: float = 5.0) -> bool:
+        """
+        Lists the models of the endpoint, which every OpenAI-compatible server supports.
+
+        Returns:
+            bool: True when the endpoint answered.
+        """
+        try:
+            self.client.with_options(timeout=timeout, max_retries=0).models.list()
+            return True
+        except Exception as e:
+            print(f"Health check of endpoint '{self.name}' failed: {e}")
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "outstanding": self.outstanding,
+            "state": self.breaker.state,
+            "trips": self.breaker.trips,
+            "healthy": self.healthy,
+            "latency_ewma": round(self.latency, 4) if self.latency is not None else None
+        }
+
+
+class BackendRouter:
+    """
+    Routes requests over several endpoints with weighted least-outstanding-requests.
+
+    Each request goes to the endpoint with the fewest requests in flight relative to
+    its weight, so a slow endpoint, whose requests pile up, automatically receives
+    less traffic. Endpoints with an open circuit breaker or a failed health check are
+    skipped, and a failed request is retried on another endpoint (failover).
+    """
+
+    def __init__(self, endpoints, health_interval: float = 30.0, latency_alpha: float = 0.2):
+        """
+        Initializes the BackendRouter.
+
+        Args:
+            endpoints (list): The Endpoint instances.
+            health_interval (float): Seconds between background health checks, 0 disables them.
+            latency_alpha (float): Smoothing factor of the per-endpoint latency average.
+        """
+        if not endpoints:
+            raise ValueError("A BackendRouter needs at least one endpoint.")
+        names = [endpoint.name for endpoint in endpoints]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Endpoint names must be unique, got {names}.")
+        self.endpoints = list(endpoints)
+        self.health_interval = health_interval
+        self.latency_alpha = latency_alpha
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    def _candidates(self, exclude):
+        return [endpoint for endpoint in self.endpoints
+                if endpoint.name not in exclude and endpoint.healthy and endpoint.breaker.allows()]
+
+    def acquire(self, exclude=()):
+        """
+        Picks the endpoint for the next request and counts the request as outstanding.
+
+        Args:
+            exclude (iterable): Names of endpoints that already failed this request;
+                they are only used again when no other endpoint is available.
+
+        Returns:
+            Endpoint or None: The chosen endpoint, None when every endpoint is unavailable.
+        """
+        with self._lock:
+            candidates = self._candidates(set(exclude)) or self._candidates(set())
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=Endpoint.load)
+            endpoint.breaker.on_dispatch()
+            endpoint.outstanding += 1
+            endpoint.calls += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, success: bool, latency: float = None, error_class: str = None):
+        """
+        Records the outcome of a request sent to `endpoint`.
+
+        Args:
+            endpoint (Endpoint): The endpoint returned by `acquire`.
+            success (bool): Whether the request succeeded.
+            latency (float): Latency of a successful request.
+            error_class (str): RetryPolicy error class of a failed request; 'fatal'
+                errors are caused by the request, not the endpoint, and do not count.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.breaker.on_release()
+            if success:
+                endpoint.breaker.record_success()
+                if latency is not None:
+                    endpoint.latency = latency if endpoint.latency is None else \
+                        (1 - self.latency_alpha) * endpoint.latency + self.latency_alpha * latency
+            elif error_class != "fatal":
+                endpoint.failures += 1
+                endpoint.breaker.record_failure()
+
+    def fail_over(self, exclude) -> bool:
+        """
+        Checks whether a failed request can move to another endpoint right away.
+
+        Returns:
+            bool: True when an endpoint outside `exclude` can take a request now.
+        """
+        with self._lock:
+            if self._candidates(set(exclude)):
+                self.failovers += 1
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """
+        Returns:
+            float: Seconds until an unavailable endpoint may be probed again.
+        """
+        with self._lock:
+            waits = [endpoint.breaker.retry_in() for endpoint in self.endpoints if endpoint.healthy]
+            return max(0.1, min(waits)) if waits else self.health_interval or 1.0
+
+    def check_health(self):
+        """
+        Health checks every endpoint. A failed check opens the breaker; a recovered
+        endpoint is probed by real traffic once the breaker half-opens.
+        """
+        for endpoint in self.endpoints:
+            healthy = endpoint.check_health()
+            with self._lock:
+                if not healthy:
+                    endpoint.breaker.trip()
+                elif not endpoint.healthy:
+                    print(f"Endpoint '{endpoint.name}' is healthy again.")
+                endpoint.healthy = healthy
+            if not healthy and not any(e.healthy for e in self.endpoints):
+                # never take the last endpoints out of rotation, their breakers still apply
+                with self._lock:
+                    for other in self.endpoints:
+                        other.healthy = True
+
+    def start_health_checks(self):
+        """
+        Runs `check_health` every `health_interval` seconds in a daemon thread.
+        """
+        if not self.health_interval or self._health_thread is not None:
+            return self
+
+        def run():
+            while not self._stop.wait(self.health_interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=run, name="backend-health", daemon=True)
+        self._health_thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=1)
+            self._health_thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "failovers": self.failovers,
+                "endpoints": {endpoint.name: endpoint.stats() for endpoint in self.endpoints}
+            }
+
+    def summary(self) -> str:
+        parts = [
+            f"{name}: {s['calls']} calls, {s['failures']} failures, {s['state']}"
+            for name, s in self.stats()["endpoints"].items()
+        ]
+        return f"Backends ({self.failovers} failovers): " + "; ".join(parts)
+
+
+def load_router(path: str, health_interval: float = 30.0, default_rate_limits: dict = None) -> BackendRouter:
+    """
+    Builds a BackendRouter from a JSON file holding a list of endpoints:
+
+        [
+            {"name": "openai-a", "api_key_env": "OPENAI_API", "weight": 2},
+            {"name": "openai-b", "api_key_env": "OPENAI_API_B",
+             "requests_per_minute": 500, "tokens_per_minute": 30000},
+            {"name": "local", "base_url": "http://localhost:8000/v1", "api_key": "local",
+             "model": "meta-llama/Meta-Llama-3-8B-Instruct"}
+        ]
+
+    Keys are read from the environment variable `api_key_env`, or given directly as
+    `api_key` for local servers that accept any key; a missing key is an error. Every endpoint gets its own rate
+    limiter from its quota fields, completed with `default_rate_limits`; without
+    defaults, only endpoints with both quota fields get one. `failure_threshold` and
+    `reset_timeout` tune the breaker.
+
+    Args:
+        path (str): Location of the endpoint file.
+        health_interval (float): Seconds between background health checks.
+        default_rate_limits (dict): requests_per_minute and tokens_per_minute of
+            endpoints that do not set them, e.g. `config["rate_limits"]`.
+
+    Returns:
+        BackendRouter: The router, health checks not yet started.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+
+    endpoints = []
+    for idx, spec in enumerate(specs):
+        name = spec.get("name") or f"endpoint-{idx}"
+        api_key = spec.get("api_key")
+        if not api_key:
+            # an unset variable must not leave the endpoint sharing another key and its quota
+            api_key_env = spec.get("api_key_env", "OPENAI_API")
+            api_key = os.getenv(api_key_env)
+            if not api_key:
+                raise ValueError(f"Endpoint '{name}' reads its API key from '{api_key_env}', which is not set.")
+        rate_limits = {
+            **(default_rate_limits or {}),
+            **{name: spec[name] for name in ("requests_per_minute", "tokens_per_minute") if name in spec}
+        }
+        if len(rate_limits) < 2:
+            rate_limits = None
+        breaker = CircuitBreaker(
+            failure_threshold=spec.get("failure_threshold", 5),
+            reset_timeout=spec.get("reset_timeout", 30.0)
+        )
+        endpoints.append(Endpoint(
+            name,
+            api_key=api_key,
+            base_url=spec.get("base_url"),
+            model=spec.get("model"),
+            weight=spec.get("weight", 1.0),
+            rate_limits=rate_limits,
+            breaker=breaker
+        ))
+    return BackendRouter(endpoints, health_interval=health_interval)
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import uuid
+import shutil
+
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def write_batch_requests(requests, path: str) -> str:
+    """
+    Writes chat completion requests to a Batch API JSONL request file.
+
+    Args:
+        requests (iterable): (custom_id, request body) pairs.
+        path (str): Location of the request file.
+
+    Returns:
+        str: The path of the written file.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_URL,
+                "body": body
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def iter_batch_output(path: str):
+    """
+    Streams a Batch API output file.
+
+    Args:
+        path (str): Location of the downloaded output JSONL file.
+
+    Yields:
+        tuple: (custom_id, content) where content is None for failed requests.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                print(f"Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                yield record.get("custom_id"), None
+                continue
+            yield record["custom_id"], response["body"]["choices"][0]["message"]["content"]
+
+
+class OpenAIBatchBackend:
+    """
+    Batch backend using the OpenAI Files and Batches endpoints.
+    """
+
+    def __init__(self, client, completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, request_path: str) -> str:
+        with open(request_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, destination: str):
+        """
+        Returns:
+            str or None: The path of the output file, None when the batch has none, e.g.
+            when it failed before any request was processed.
+        """
+        return self._download_file(self.client.batches.retrieve(batch_id).output_file_id, destination)
+
+    def download_errors(self, batch_id: str, destination: str):
+        """
+        Returns:
+            str or None: The path of the error file holding the requests that failed
+            inside the batch, None when no request failed.
+        """
+        return self._download_file(self.client.batches.retrieve(batch_id).error_file_id, destination)
+
+    def _download_file(self, file_id, destination):
+        if file_id is None:
+            return None
+        self.client.files.content(file_id).write_to_file(destination)
+        return destination
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API, used to run the batch cycle offline.
+
+    Requests are answered on submit by `responder`, a callable receiving the request
+    body and returning the message content. By default every sleutelfiguur is null.
+    Requests for which the responder raises are written to the error file, as the
+    Batch API does for requests that fail inside a batch.
+    """
+
+    def __init__(self, directory: str, responder=None):
+        self.directory = directory
+        self.responder = responder or self._null_responder
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _null_responder(body):
+        schema = body["response_format"]["json_schema"]["schema"]
+        return json.dumps({key: None for key in schema["required"]})
+
+    def _batch_dir(self, batch_id):
+        return os.path.join(self.directory, batch_id)
+
+    def submit(self, request_path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch_dir = self._batch_dir(batch_id)
+        os.makedirs(batch_dir)
+        shutil.copyfile(request_path, os.path.join(batch_dir, "input.jsonl"))
+
+        errors = []
+        with open(os.path.join(batch_dir, "input.jsonl"), "r", encoding="utf-8") as src, \
+                open(os.path.join(batch_dir, "output.jsonl"), "w", encoding="utf-8") as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    content = self.responder(request["body"])
+                except Exception as e:
+                    errors.append({
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": type(e).__name__, "message": str(e)}
+                    })
+                    continue
+                output = {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": uuid.uuid4().hex,
+                        "body": {
+                            "object": "chat.completion",
+                            "model": request["body"]["model"],
+                            "choices": [{
+                                "index": 0,
+                                "message": {
+                                    "role": "assistant",
+                                    "content": content
+                                },
+                                "finish_reason": "stop"
+                            }]
+                        }
+                    },
+                    "error": None
+                }
+                dst.write(json.dumps(output, ensure_ascii=False) + "\n")
+        if errors:
+            with open(os.path.join(batch_dir, "errors.jsonl"), "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(error, ensure_ascii=False) + "\n" for error in errors)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if os.path.exists(os.path.join(self._batch_dir(batch_id), "output.jsonl")):
+            return "completed"
+        return "in_progress"
+
+    def download(self, batch_id: str, destination: str):
+        return self._copy(os.path.join(self._batch_dir(batch_id), "output.jsonl"), destination)
+
+    def download_errors(self, batch_id: str, destination: str):
+        return self._copy(os.path.join(self._batch_dir(batch_id), "errors.jsonl"), destination)
+
+    @staticmethod
+    def _copy(path, destination):
+        if not os.path.exists(path):
+            return None
+        shutil.copyfile(path, destination)
+        return destination
+
+
+def wait_for_batch(backend, batch_id: str, poll_interval: float = 30, timeout: float = None) -> str:
+    """
+    Polls a submitted batch until it reaches a terminal status.
+
+    Args:
+        backend: OpenAIBatchBackend or LocalBatchBackend.
+        batch_id (str): Id returned by `backend.submit`.
+        poll_interval (float): Seconds between status checks.
+        timeout (float): Maximum number of seconds to wait, None waits indefinitely.
+
+    Returns:
+        str: The terminal status of the batch.
+    """
+    started = time.monotonic()
+    while True:
+        status = backend.status(batch_id)
+        print(f"Batch {batch_id} status: {status}")
+        if status in TERMINAL_STATUSES:
+            return status
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout} seconds.")
+        time.sleep(poll_interval)
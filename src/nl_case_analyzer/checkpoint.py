@@ -0,0 +1,146 @@
+import os
+import json
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of validated responses, used to resume long analysis runs.
+
+    Every line holds one record: {"snippet_id": ..., "response": ...}. A response that
+    did not come from the model, such as the null result of the pre-filter, also
+    carries its "source"; such snippets do not count as completed, and a model
+    response journaled later takes their place. Appending costs O(1) per response,
+    the file is flushed on every write and fsynced periodically.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 25):
+        """
+        Initializes the CheckpointJournal.
+
+        Args:
+            path (str): Location of the JSONL journal file.
+            fsync_every (int): Number of appended records between fsync calls.
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # terminate a torn last line so the next record starts on a fresh line
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        else:
+            torn = False
+
+        self._file = open(path, "a", encoding="utf-8")
+        if torn:
+            self._file.write("\n")
+
+    def iter_records(self):
+        """
+        Reads the journal from disk.
+
+        A torn last line, left behind by a crash during a write, is skipped.
+
+        Yields:
+            dict: Journal records in the order they were written.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt journal line {line_number} in {self.path}")
+
+    def _resolve(self) -> dict:
+        """
+        Returns:
+            dict: Snippet id -> (response, source) in write order. The first model
+            response of a snippet wins, a response of another source is only kept
+            while the snippet has no model response.
+        """
+        resolved = {}
+        for record in self.iter_records():
+            sid, source = record["snippet_id"], record.get("source")
+            current = resolved.get(sid)
+            if current is None or (current[1] is not None and source is None):
+                resolved[sid] = (record["response"], source)
+        return resolved
+
+    def completed_ids(self) -> set:
+        """
+        Returns:
+            set: Snippet ids with a model response in the journal.
+        """
+        return {record["snippet_id"] for record in self.iter_records() if record.get("source") is None}
+
+    def sources_by_id(self) -> dict:
+        """
+        Returns:
+            dict: Snippet id -> source, for the snippets whose response did not come
+            from the model.
+        """
+        return {sid: source for sid, (_, source) in self._resolve().items() if source is not None}
+
+    def responses_by_id(self) -> dict:
+        """
+        Returns:
+            dict: Snippet id -> journaled response, the first model response per id wins.
+        """
+        return {sid: response for sid, (response, _) in self._resolve().items()}
+
+    def responses(self) -> list:
+        """
+        Returns:
+            list: Journaled responses in write order, one per snippet id.
+        """
+        return [response for response, _ in self._resolve().values()]
+
+    def append(self, snippet_id: str, response: str, source: str = None):
+        """
+        Appends a single validated response to the journal.
+
+        Args:
+            snippet_id (str): Stable id of the snippet.
+            response (str): The validated JSON response.
+            source (str): Origin of a response that did not come from the model,
+                e.g. 'prefilter'; None for model responses.
+        """
+        record = {"snippet_id": snippet_id, "response": response}
+        if source is not None:
+            record["source"] = source
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """
+        Forces journaled records to disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,616 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+
+
+# Subsystems every subcommand imports, and the import time each may take before a
+# warning is printed. Modules are imported inside the subcommands only, so e.g.
+# `validate` never pays for pandas, openai or matplotlib.
+SUBCOMMAND_MODULES = {
+    "load": ("nl_case_analyzer.main", "nl_case_analyzer.data_loader"),
+    "analyze": ("nl_case_analyzer.main", "nl_case_analyzer.analyze", "nl_case_analyzer.data_loader"),
+    "validate": ("nl_case_analyzer.validate_json", "nl_case_analyzer.openai_config"),
+    "write": ("nl_case_analyzer.checkpoint", "nl_case_analyzer.main"),
+    "visualize": ("nl_case_analyzer.main", "nl_case_analyzer.visualizer", "nl_case_analyzer.aggregate_store"),
+    "mock-server": ("nl_case_analyzer.mock_server",),
+    "enqueue": ("nl_case_analyzer.work_queue", "nl_case_analyzer.main", "nl_case_analyzer.dedup"),
+    "worker": ("nl_case_analyzer.work_queue", "nl_case_analyzer.main", "nl_case_analyzer.analyze"),
+    "merge": ("nl_case_analyzer.work_queue", "nl_case_analyzer.main", "nl_case_analyzer.checkpoint"),
+    "loadtest": ("nl_case_analyzer.mock_server", "nl_case_analyzer.analyze", "nl_case_analyzer.validate_json"),
+    "trim-eval": ("nl_case_analyzer.trimming", "nl_case_analyzer.main", "nl_case_analyzer.analyze"),
+    "tags": ("nl_case_analyzer.tags", "nl_case_analyzer.main"),
+    "results": ("nl_case_analyzer.results_store", "nl_case_analyzer.checkpoint"),
+}
+
+IMPORT_BUDGET_MS = {
+    "load": 1500,
+    "analyze": 2500,
+    "validate": 300,
+    "write": 300,
+    "visualize": 2500,
+    "mock-server": 300,
+    "enqueue": 1500,
+    "worker": 2500,
+    "merge": 300,
+    "loadtest": 2500,
+    "trim-eval": 2500,
+    "tags": 300,
+    "results": 300,
+}
+
+
+def import_subsystems(command: str, profile: bool = False) -> dict:
+    """
+    Imports the modules a subcommand needs and checks the time against its budget.
+
+    Args:
+        command (str): Name of the subcommand.
+        profile (bool): Print the import time of every module.
+
+    Returns:
+        dict: Module name -> import time in milliseconds.
+    """
+    timings = {}
+    for name in SUBCOMMAND_MODULES[command]:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    total = sum(timings.values())
+    if profile:
+        for name, ms in timings.items():
+            print(f"import {name}: {ms:.1f} ms", file=sys.stderr)
+        print(f"import total: {total:.1f} ms (budget {IMPORT_BUDGET_MS[command]} ms)", file=sys.stderr)
+    if total > IMPORT_BUDGET_MS[command]:
+        print(
+            f"Warning: importing '{command}' took {total:.0f} ms, over its budget of "
+            f"{IMPORT_BUDGET_MS[command]} ms.",
+            file=sys.stderr
+        )
+    return timings
+
+
+def _read_responses(path: str) -> dict:
+    """
+    Reads responses from a checkpoint journal (.jsonl) or a JSON results list.
+
+    Returns:
+        dict: Snippet id (or list position) -> response.
+
+    Raises:
+        FileNotFoundError: When there is no file at `path`; a missing journal is not
+            created, as opening it through CheckpointJournal would.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No results at {path}.")
+    if path.endswith(".jsonl"):
+        from nl_case_analyzer.checkpoint import CheckpointJournal
+
+        with CheckpointJournal(path) as journal:
+            return journal.responses_by_id()
+
+    with open(path, "r", encoding="utf-8") as f:
+        return {str(idx): response for idx, response in enumerate(json.load(f))}
+
+
+def cmd_load(args) -> int:
+    from nl_case_analyzer.data_loader import snippet_id
+    from nl_case_analyzer.main import load_snippets
+
+    snippets = load_snippets(args.csv, model_name=args.model, column_name=args.column)
+    if not snippets:
+        print("Loading snippets went down the drain")
+        return 1
+
+    count = 0
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        for snippet in snippets:
+            count += 1
+            if out is not None:
+                out.write(json.dumps({"snippet_id": snippet_id(snippet), "text": snippet}, ensure_ascii=False) + "\n")
+            elif count <= args.preview:
+                print(f"{snippet_id(snippet)}: {snippet[:120]}")
+    finally:
+        if out is not None:
+            out.close()
+    print(f"{count} snippets loaded.")
+    return 0
+
+
+def cmd_analyze(args) -> int:
+    from nl_case_analyzer.main import load_snippets, analyze_stage
+
+    snippets = load_snippets(args.csv, model_name=args.model, column_name=args.column)
+    if not snippets:
+        print("Loading snippets went down the drain")
+        return 1
+
+    results_by_id = analyze_stage(
+        snippets,
+        args.journal,
+        args.cache,
+        dedup_mapping_path=args.dedup_mapping,
+        batch_dir=args.batch_dir,
+        use_batch=args.batch,
+        pack_size=args.pack_size,
+        deduplicate=not args.no_dedup,
+        prefilter=not args.no_prefilter,
+        trim_input=args.trim,
+        trim_context=args.trim_context,
+        concurrency=args.concurrency,
+        max_repair_attempts=args.repair_attempts,
+        metrics_dir=args.metrics_dir,
+        backends_path=args.backends
+    )
+    print(f"{len(results_by_id)} snippets have a result.")
+    return 0
+
+
+def cmd_validate(args) -> int:
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.validate_json import ResponseValidator
+
+    validator = ResponseValidator(schema=ConfigGPT().json_schema)
+    responses = _read_responses(args.results)
+
+    report = validator.validate_many(responses.values(), workers=args.workers)
+    print(f"{report.valid_count} of {report.total} responses are valid.")
+    for error, count in report.summary()["errors"].items():
+        print(f"{count:7d}  {error}")
+    invalid = [sid for sid, valid in zip(responses, report.results) if not valid]
+    if invalid:
+        print(f"The following snippets are invalid: {invalid}")
+    return 1 if invalid else 0
+
+
+def _read_results(journal_path: str, dedup_mapping_path: str = None) -> dict:
+    """
+    Returns:
+        dict: Snippet id -> response of the journal, fanned out over the duplicates
+        when a deduplication mapping is present.
+    """
+    results_by_id = _read_responses(journal_path)
+    if dedup_mapping_path and os.path.exists(dedup_mapping_path):
+        # fan the representative results back out to every member snippet
+        with open(dedup_mapping_path, "r", encoding="utf-8") as f:
+            mapping = json.load(f)["mapping"]
+        results_by_id = {
+            sid: results_by_id[representative]
+            for sid, representative in mapping.items()
+            if representative in results_by_id
+        }
+    return results_by_id
+
+
+def cmd_write(args) -> int:
+    from nl_case_analyzer.main import write_stage
+
+    results_by_id = _read_results(args.journal, args.dedup_mapping)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    result_file = write_stage(results_by_id, args.output_dir, args.file_name, parquet=not args.no_parquet)
+    return 0 if result_file else 1
+
+
+def cmd_visualize(args) -> int:
+    from nl_case_analyzer.main import visualize_stage
+
+    rendered = visualize_stage(args.results_dir, args.store, max_workers=args.workers, tag_index_path=args.tag_index)
+    print(f"{len(rendered)} figures re-rendered.")
+    return 0
+
+
+def cmd_tags(args) -> int:
+    from nl_case_analyzer.tags import TagIndex
+
+    if args.action == "index":
+        from nl_case_analyzer.main import index_tags_stage
+
+        index_tags_stage(_read_results(args.journal, args.dedup_mapping), args.index, threshold=args.threshold)
+        return 0
+
+    if not os.path.exists(args.index):
+        print(f"No tag index at {args.index}; run `tags index` first.")
+        return 1
+    with TagIndex(args.index, threshold=args.threshold) as index:
+        if args.action == "top":
+            for label, count in index.frequencies(sleutelfiguur=args.figure, limit=args.limit):
+                print(f"{count:7d}  {label}")
+            return 0
+        if not (args.tag or args.word):
+            print("`tags find` needs --tag or --word.")
+            return 1
+        tag = args.tag or args.word
+        postings = index.lookup(tag, args.figure) if args.tag else index.search(tag, args.figure)
+    for result_id, figure in postings:
+        print(f"{result_id}  {figure}")
+    print(f"{len({result_id for result_id, _ in postings})} results cite '{tag}'.")
+    return 0
+
+
+def cmd_results(args) -> int:
+    from nl_case_analyzer.results_store import ResultsStore, is_test_file
+
+    if args.action == "ingest":
+        from nl_case_analyzer.main import store_stage, journal_sources
+
+        if is_test_file(args.journal):
+            print(f"Not storing the test results of {args.journal}.")
+            return 1
+        store_stage(_read_results(args.journal, args.dedup_mapping), args.store,
+                    data_path=args.csv, source=os.path.abspath(args.journal),
+                    sources=journal_sources(args.journal, args.dedup_mapping))
+        return 0
+
+    if not os.path.exists(args.store):
+        print(f"No results store at {args.store}; run `results ingest` first.")
+        return 1
+    filters = {
+        "sleutelfiguur": args.figure,
+        "model": args.model,
+        "crypto_relevant": None if args.crypto_relevant is None else args.crypto_relevant == "true",
+    }
+    with ResultsStore(args.store) as store:
+        if args.action == "stats":
+            print(json.dumps(store.stats(), indent=2))
+            return 0
+
+        # only the actions printing frames pay for pandas
+        import pandas as pd
+
+        pd.set_option("display.width", 200)
+        pd.set_option("display.max_columns", None)
+        if args.action == "crosstab":
+            filters.update(label=args.label, value=args.value)
+            print(store.crosstab(args.index, args.columns, **filters))
+        else:
+            if args.label:
+                filters[args.label] = args.value
+            frame = store.filter(limit=args.limit, **filters)
+            if args.out:
+                frame.to_csv(args.out, sep=";", index=False)
+                print(f"{len(frame)} rows written to {args.out}")
+            else:
+                print(frame.drop(columns=["zin", "reden"]).to_string(index=False))
+    return 0
+
+
+def cmd_enqueue(args) -> int:
+    from nl_case_analyzer.main import load_snippets
+    from nl_case_analyzer.work_queue import enqueue_snippets
+
+    snippets = load_snippets(args.csv, model_name=args.model, column_name=args.column)
+    if not snippets:
+        print("Loading snippets went down the drain")
+        return 1
+    enqueue_snippets(
+        snippets,
+        args.queue,
+        num_shards=args.shards,
+        deduplicate=not args.no_dedup,
+        dedup_mapping_path=args.dedup_mapping
+    )
+    return 0
+
+
+def cmd_worker(args) -> int:
+    from nl_case_analyzer.work_queue import run_worker
+
+    shards = run_worker(
+        args.queue,
+        args.shard_dir,
+        worker_id=args.worker_id,
+        api_key_env=args.api_key_env,
+        base_url=args.base_url,
+        cache_path=args.cache,
+        concurrency=args.concurrency,
+        max_repair_attempts=args.repair_attempts,
+        prefilter=not args.no_prefilter,
+        backends_path=args.backends,
+        heartbeat_interval=args.heartbeat,
+        lease_seconds=args.lease
+    )
+    print(f"{len(shards)} shards completed.")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    from nl_case_analyzer.main import write_stage
+    from nl_case_analyzer.work_queue import merge_shards
+
+    results_by_id = merge_shards(args.queue, args.shard_dir, dedup_mapping_path=args.dedup_mapping)
+    os.makedirs(args.output_dir, exist_ok=True)
+    result_file = write_stage(results_by_id, args.output_dir, args.file_name, parquet=not args.no_parquet)
+    return 0 if result_file else 1
+
+
+def _mock_server(args):
+    from nl_case_analyzer.mock_server import MockCompletionServer
+
+    return MockCompletionServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate_429=args.error_429,
+        error_rate_500=args.error_500,
+        requests_per_minute=args.server_rpm,
+        tokens_per_minute=args.server_tpm,
+        seed=args.seed
+    )
+
+
+def cmd_mock_server(args) -> int:
+    server = _mock_server(args)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+def cmd_loadtest(args) -> int:
+    from nl_case_analyzer.mock_server import run_load_test
+
+    def run(base_url):
+        return run_load_test(
+            base_url,
+            snippets=args.snippets,
+            concurrency=args.concurrency,
+            pack_size=args.pack_size,
+            rate_limited=not args.no_rate_limit,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm
+        )
+
+    if args.base_url:
+        report = run(args.base_url)
+    else:
+        # no endpoint given: hammer an in-process mock server
+        with _mock_server(args) as server:
+            report = run(server.base_url)
+            report["server"] = dict(server.stats)
+
+    telemetry = report["telemetry"]
+    print(f"{report['snippets']} snippets in {report['elapsed_s']:.1f}s: "
+          f"{report['snippets_per_second']:.1f} snippets/s, {telemetry['tokens_per_second']:.0f} tokens/s")
+    print(f"latency p50/p95/p99: {telemetry['latency_p50']:.3f}/{telemetry['latency_p95']:.3f}/"
+          f"{telemetry['latency_p99']:.3f}s, valid {report['valid']}, failed {report['failed']}, "
+          f"retries {report['retries']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    return 0 if not report["failed"] else 1
+
+
+def cmd_trim_eval(args) -> int:
+    from nl_case_analyzer.main import load_snippets
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.analyze import AnalyzeGPT
+    from nl_case_analyzer.response_cache import ResponseCache
+    from nl_case_analyzer.rate_limiter import AdaptiveRateLimiter
+    from nl_case_analyzer.validate_json import ResponseValidator
+    from nl_case_analyzer.trimming import InputTrimmer, evaluate_trimming
+
+    config = ConfigGPT(base_url=args.base_url).get_configuration()
+    response_cache = ResponseCache(args.cache) if args.cache else None
+    openai_api = AnalyzeGPT(config, cache=response_cache, rate_limiter=AdaptiveRateLimiter(**config["rate_limits"]))
+    trimmer = InputTrimmer(config["json_schema"], context=args.trim_context)
+
+    snippets = load_snippets(args.csv, model_name=args.model, column_name=args.column)
+    report = evaluate_trimming(
+        openai_api,
+        ResponseValidator(schema=config["json_schema"]),
+        snippets,
+        trimmer,
+        sample_size=args.sample,
+        seed=args.seed,
+        concurrency=args.concurrency
+    )
+    if response_cache is not None:
+        response_cache.close()
+
+    print(f"{report['sampled']} of {report['candidates']} trimmed snippets evaluated, "
+          f"{report['invalid_pairs']} pairs without two valid responses.")
+    print(f"Input tokens saved: {report['input_tokens_saved']} ({report['saved_ratio']:.1%}), "
+          f"identical outcomes: {report['identical_ratio']:.1%}")
+    for name, agreement in report["agreement"].items():
+        print(f"{name:18s} {'-' if agreement is None else f'{agreement:.1%}'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # defaults follow the layout used by main()
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    data_path = os.path.join(root, "data", "Analyses_Dataset.csv")
+    results_dir = os.path.join(root, "results")
+    journal_path = os.path.join(root, "checkpoints", "Results_3.jsonl")
+    dedup_mapping_path = os.path.join(root, "checkpoints", "dedup_mapping.json")
+    tag_index_path = os.path.join(root, "cache", "tags.sqlite")
+    results_store_path = os.path.join(root, "cache", "results.sqlite")
+
+    parser = argparse.ArgumentParser(prog="nl-case-analyzer", description="Analyze court case summaries.")
+    parser.add_argument("--profile-imports", action="store_true", help="print the import time per subsystem")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_snippet_arguments(subparser):
+        subparser.add_argument("csv", nargs="?", default=data_path, help="semicolon separated dataset")
+        subparser.add_argument("--model", default="GPT-3.5-Turbo", help="model whose answers are loaded")
+        subparser.add_argument("--column", default="Answer", help="column holding the text snippets")
+
+    load = subparsers.add_parser("load", help="load and count the text snippets")
+    add_snippet_arguments(load)
+    load.add_argument("--out", help="write the snippets as JSONL with their ids")
+    load.add_argument("--preview", type=int, default=5, help="snippets printed when --out is not given")
+    load.set_defaults(handler=cmd_load)
+
+    analyze = subparsers.add_parser("analyze", help="analyze the snippets into the checkpoint journal")
+    add_snippet_arguments(analyze)
+    analyze.add_argument("--journal", default=journal_path)
+    analyze.add_argument("--cache", default=os.path.join(root, "cache", "responses.sqlite"))
+    analyze.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    analyze.add_argument("--batch-dir", default=os.path.join(root, "checkpoints", "batches"))
+    analyze.add_argument("--batch", action="store_true", help="use the Batch API instead of interactive calls")
+    analyze.add_argument("--pack-size", type=int, default=1, help="snippets analyzed per API call")
+    analyze.add_argument("--concurrency", type=int, default=None, help="maximum concurrent API calls")
+    analyze.add_argument("--no-dedup", action="store_true", help="analyze duplicate snippets separately")
+    analyze.add_argument("--no-prefilter", action="store_true",
+                         help="also analyze snippets that mention no encrypted-communication term")
+    analyze.add_argument("--trim", action="store_true",
+                         help="send only the sentences mentioning key figures, crypto or evidence terms")
+    analyze.add_argument("--trim-context", type=int, default=1, help="sentences kept around a relevant one")
+    analyze.add_argument("--repair-attempts", type=int, default=2,
+                         help="re-requests of snippets whose response cannot be repaired locally")
+    analyze.add_argument("--metrics-dir", default=os.path.join(root, "metrics"),
+                         help="per-call metrics (JSONL) and Prometheus snapshot")
+    analyze.add_argument("--backends", default=None,
+                         help="JSON file of OpenAI-compatible endpoints to route the calls over")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    validate = subparsers.add_parser("validate", help="validate responses against the response schema")
+    validate.add_argument("results", help="results JSON list or checkpoint journal (.jsonl)")
+    validate.add_argument("--workers", type=int, default=None, help="validation processes")
+    validate.set_defaults(handler=cmd_validate)
+
+    write = subparsers.add_parser("write", help="write the journal as JSON and Parquet results")
+    write.add_argument("--journal", default=journal_path)
+    write.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    write.add_argument("--output-dir", default=results_dir)
+    write.add_argument("--file-name", default="Results_3.json")
+    write.add_argument("--no-parquet", action="store_true", help="only write the JSON results")
+    write.set_defaults(handler=cmd_write)
+
+    visualize = subparsers.add_parser("visualize", help="render the figures of changed results")
+    visualize.add_argument("--results-dir", default=results_dir)
+    visualize.add_argument("--store", default=os.path.join(root, "cache", "aggregates.sqlite"))
+    visualize.add_argument("--workers", type=int, default=4, help="render processes")
+    visualize.add_argument("--tag-index", default=tag_index_path, help="wordcloud of the canonical tags")
+    visualize.set_defaults(handler=cmd_visualize)
+
+    queue_path = os.path.join(root, "checkpoints", "work_queue.sqlite")
+    shard_dir = os.path.join(root, "checkpoints", "shards")
+
+    enqueue = subparsers.add_parser("enqueue", help="partition the snippets into shards of the work queue")
+    add_snippet_arguments(enqueue)
+    enqueue.add_argument("--queue", default=queue_path)
+    enqueue.add_argument("--shards", type=int, default=64, help="number of shards")
+    enqueue.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    enqueue.add_argument("--no-dedup", action="store_true", help="queue duplicate snippets separately")
+    enqueue.set_defaults(handler=cmd_enqueue)
+
+    worker = subparsers.add_parser("worker", help="claim and analyze shards until the queue is empty")
+    worker.add_argument("--queue", default=queue_path)
+    worker.add_argument("--shard-dir", default=shard_dir)
+    worker.add_argument("--worker-id", default=None)
+    worker.add_argument("--api-key-env", default="OPENAI_API", help="environment variable with this worker's key")
+    worker.add_argument("--base-url", default=None, help="alternative OpenAI-compatible endpoint")
+    worker.add_argument("--cache", default=None, help="response cache of this worker")
+    worker.add_argument("--backends", default=None,
+                        help="JSON file of endpoints to route over, instead of --api-key-env/--base-url")
+    worker.add_argument("--concurrency", type=int, default=None)
+    worker.add_argument("--repair-attempts", type=int, default=2)
+    worker.add_argument("--no-prefilter", action="store_true",
+                        help="also analyze snippets that mention no encrypted-communication term")
+    worker.add_argument("--heartbeat", type=float, default=30, help="seconds between lease renewals")
+    worker.add_argument("--lease", type=float, default=300, help="seconds a claim stays valid")
+    worker.set_defaults(handler=cmd_worker)
+
+    merge = subparsers.add_parser("merge", help="combine the shard results into the results files")
+    merge.add_argument("--queue", default=queue_path)
+    merge.add_argument("--shard-dir", default=shard_dir)
+    merge.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    merge.add_argument("--output-dir", default=results_dir)
+    merge.add_argument("--file-name", default="Results_3.json")
+    merge.add_argument("--no-parquet", action="store_true", help="only write the JSON results")
+    merge.set_defaults(handler=cmd_merge)
+
+    def add_server_arguments(subparser, port):
+        subparser.add_argument("--host", default="127.0.0.1")
+        subparser.add_argument("--port", type=int, default=port)
+        subparser.add_argument("--latency", default="lognormal:0.8,0.5",
+                               help="fixed:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA")
+        subparser.add_argument("--error-429", type=float, default=0.0, help="fraction of injected 429s")
+        subparser.add_argument("--error-500", type=float, default=0.0, help="fraction of injected 500s")
+        subparser.add_argument("--server-rpm", type=int, default=5000, help="request quota of the server")
+        subparser.add_argument("--server-tpm", type=int, default=2_000_000, help="token quota of the server")
+        subparser.add_argument("--seed", type=int, default=None)
+
+    mock_server = subparsers.add_parser("mock-server", help="serve a local OpenAI-compatible stand-in")
+    add_server_arguments(mock_server, 8089)
+    mock_server.set_defaults(handler=cmd_mock_server)
+
+    loadtest = subparsers.add_parser("loadtest", help="drive AnalyzeGPT against a (mock) endpoint")
+    add_server_arguments(loadtest, 0)
+    loadtest.add_argument("--base-url", help="endpoint to test, defaults to an in-process mock server")
+    loadtest.add_argument("--snippets", type=int, default=500)
+    loadtest.add_argument("--concurrency", type=int, default=16)
+    loadtest.add_argument("--pack-size", type=int, default=1)
+    loadtest.add_argument("--no-rate-limit", action="store_true", help="disable the client-side rate limiter")
+    loadtest.add_argument("--rpm", type=int, default=None, help="initial requests/min of the client limiter")
+    loadtest.add_argument("--tpm", type=int, default=None, help="initial tokens/min of the client limiter")
+    loadtest.add_argument("--json", help="also write the report as JSON")
+    loadtest.set_defaults(handler=cmd_loadtest)
+
+    trim_eval = subparsers.add_parser("trim-eval", help="compare the outcomes of trimmed and untrimmed input")
+    add_snippet_arguments(trim_eval)
+    trim_eval.add_argument("--sample", type=int, default=100, help="trimmed snippets analyzed both ways")
+    trim_eval.add_argument("--seed", type=int, default=1)
+    trim_eval.add_argument("--trim-context", type=int, default=1, help="sentences kept around a relevant one")
+    trim_eval.add_argument("--concurrency", type=int, default=None)
+    trim_eval.add_argument("--base-url", default=None, help="alternative OpenAI-compatible endpoint")
+    trim_eval.add_argument("--cache", default=None, help="response cache, reuses earlier untrimmed responses")
+    trim_eval.add_argument("--json", help="also write the report as JSON")
+    trim_eval.set_defaults(handler=cmd_trim_eval)
+
+    tags = subparsers.add_parser("tags", help="index the tags into canonical tags and query them")
+    tags.add_argument("action", choices=("index", "top", "find"))
+    tags.add_argument("--index", default=tag_index_path)
+    tags.add_argument("--journal", default=journal_path)
+    tags.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    tags.add_argument("--threshold", type=float, default=0.88, help="similarity of merged tags")
+    tags.add_argument("--figure", default=None, help="only this sleutelfiguur, e.g. sleutelfiguur_1")
+    tags.add_argument("--limit", type=int, default=25, help="canonical tags listed by `top`")
+    tags.add_argument("--tag", default=None, help="`find`: results citing this tag or its cluster")
+    tags.add_argument("--word", default=None, help="`find`: results citing any tag containing the word(s)")
+    tags.set_defaults(handler=cmd_tags)
+
+    results = subparsers.add_parser("results", help="store the results with their dataset rows and query them")
+    results.add_argument("action", choices=("ingest", "stats", "crosstab", "filter"))
+    results.add_argument("--store", default=results_store_path)
+    results.add_argument("--journal", default=journal_path)
+    results.add_argument("--dedup-mapping", default=dedup_mapping_path)
+    results.add_argument("--csv", default=data_path, help="`ingest`: dataset the results are joined to")
+    results.add_argument("--index", default="sleutelfiguur", help="`crosstab`: dimension of the rows")
+    results.add_argument("--columns", default="value", help="`crosstab`: dimension of the columns")
+    results.add_argument("--label", default=None, help="only this label, e.g. rechtmatigheid")
+    results.add_argument("--value", default=None, help="only this label value, e.g. nee")
+    results.add_argument("--figure", default=None, help="only this sleutelfiguur, e.g. sleutelfiguur_1")
+    results.add_argument("--model", default=None, help="only results of rows of this model")
+    results.add_argument("--crypto-relevant", choices=("true", "false"), default=None)
+    results.add_argument("--limit", type=int, default=None, help="`filter`: maximum rows")
+    results.add_argument("--out", default=None, help="`filter`: write the rows as csv")
+    results.set_defaults(handler=cmd_results)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    import_subsystems(args.command, profile=args.profile_imports)
+    try:
+        return args.handler(args)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,20 @@
+import hashlib
 import pandas as pd
 
 
+def snippet_id(text: str) -> str:
+    """
+    Stable identifier of a text snippet, derived from its content.
+
+    Args:
+        text (str): The text snippet.
+
+    Returns:
+        str: 16 character hex digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
 class CSV_Loader:
     """
     Class that loads the data needed for the analysis of Dutch court cases
@@ -42,6 +56,107 @@ class CSV_Loader:
             print(f"File not found at path: {self.path}")
             return pd.DataFrame()
 
+    def iter_snippets(self,
+                      column_name: str,
+                      cols_to_filter: str,
+                      model_name: str,
+                      chunksize: int = 10_000,
+                      engine: str = "c"):
+        """
+        Streams snippets from the csv without loading the whole dataset.
+
+        Only the snippet and filter columns are parsed, and the model filter is applied
+        per chunk, so memory stays flat regardless of the size of the file.
+
+        Args:
+            column_name (str): Name of the column containing the text snippets.
+            cols_to_filter (str): Name of the column holding the model name.
+            model_name (str): Model to select, see `load_dataset`.
+            chunksize (int): Number of rows parsed at a time.
+            engine (str): 'c' (pandas default) or 'pyarrow' for the faster
+                streaming reader of pyarrow.
+
+        Yields:
+            str: Non-null text snippets in file order.
+        """
+        if model_name not in ("Llama 3 8B", "GPT-3.5-Turbo"):
+            print(f"Model '{model_name}' not supported")
+            return
+
+        try:
+            if engine == "pyarrow":
+                yield from self._iter_snippets_pyarrow(column_name, cols_to_filter, model_name, chunksize)
+                return
+
+            reader = pd.read_csv(
+                self.path,
+                sep=";",
+                usecols=[cols_to_filter, column_name],
+                chunksize=chunksize,
+                engine=engine
+            )
+            with reader:
+                for chunk in reader:
+                    selected = chunk.loc[chunk[cols_to_filter] == model_name, column_name].dropna()
+                    yield from selected.tolist()
+
+        # usecols raises a ValueError when a column is missing
+        except ValueError as e:
+            print(f"Column '{cols_to_filter}' or '{column_name}' not present in dataset: {e}")
+        except FileNotFoundError:
+            print(f"File not found at path: {self.path}")
+
+    def _iter_snippets_pyarrow(self, column_name, cols_to_filter, model_name, chunksize):
+        """
+        pyarrow variant of `iter_snippets`, reading the file as a stream of record batches.
+        """
+        try:
+            import pyarrow.csv as pv
+            import pyarrow.compute as pc
+        except ImportError as e:
+            raise ImportError("engine='pyarrow' requires the pyarrow package to be installed.") from e
+
+        # block size in bytes; assume roughly 1 KiB per row
+        reader = pv.open_csv(
+            self.path,
+            read_options=pv.ReadOptions(block_size=max(chunksize * 1024, 1 << 20)),
+            parse_options=pv.ParseOptions(delimiter=";", newlines_in_values=True),
+            convert_options=pv.ConvertOptions(include_columns=[cols_to_filter, column_name])
+        )
+        for batch in reader:
+            mask = pc.equal(batch.column(cols_to_filter), model_name)
+            selected = batch.filter(mask).column(column_name).drop_null()
+            yield from selected.to_pylist()
+
+    def iter_metadata(self, column_name: str, chunksize: int = 10_000):
+        """
+        Streams the metadata of every row: the snippet id of its text, its position in
+        the file and all other columns, so results can be joined back to their rows.
+
+        Args:
+            column_name (str): Name of the column containing the text snippets.
+            chunksize (int): Number of rows parsed at a time.
+
+        Yields:
+            pd.DataFrame: Chunks with 'snippet_id' and 'source_row' (0-based data row)
+            followed by the other columns, read as strings so an id reads the same in
+            every chunk; missing values are NaN and rows without text are left out.
+        """
+        try:
+            reader = pd.read_csv(self.path, sep=";", chunksize=chunksize, dtype=str)
+            with reader:
+                for chunk in reader:
+                    if column_name not in chunk.columns:
+                        print(f"Column '{column_name}' not present in dataset")
+                        return
+                    chunk = chunk[chunk[column_name].notna()]
+                    metadata = chunk.drop(columns=column_name)
+                    metadata.insert(0, "source_row", chunk.index)
+                    metadata.insert(0, "snippet_id", [snippet_id(text) for text in chunk[column_name]])
+                    yield metadata
+        except FileNotFoundError:
+            print(f"File not found at path: {self.path}")
+
     def generate_txt_snippets(self, df: pd.DataFrame, column_name: str) -> list:
         """
         Prepares snippets of text from a DataFrame column to be inputted in API call.
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import numpy as np
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a snippet for duplicate detection: unicode NFKC, casefolding,
+    punctuation removed and whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _optimal_bands(num_perm: int, threshold: float) -> tuple:
+    """
+    Picks the LSH band layout whose similarity threshold (1/b)^(1/r) is closest
+    to the requested threshold.
+
+    Returns:
+        tuple: (number of bands, rows per band)
+    """
+    layouts = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - threshold))
+
+
+class SnippetDeduplicator:
+    """
+    Groups exact and near-duplicate snippets so only one representative per group is analyzed.
+
+    Exact duplicates are detected by the hash of the normalized text. Near duplicates
+    are found with MinHash signatures over word shingles and banded LSH, and accepted
+    when the estimated Jaccard similarity reaches `threshold`. The index is built
+    incrementally, so snippets can be streamed through `filter`.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Initializes the SnippetDeduplicator.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of near duplicates.
+                Values of 1 or more disable near-duplicate detection.
+            num_perm (int): Number of MinHash permutations.
+            shingle_size (int): Number of words per shingle.
+            seed (int): Seed of the permutations, fixed so groupings are reproducible.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _optimal_bands(num_perm, threshold)
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._exact = {}
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures = {}
+        # snippet id -> representative id, in the order the snippets were seen
+        self.mapping = {}
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        words = normalized.split(" ")
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # permuted hashes (a * h + b) mod p, truncated to 32 bits; wrap-around is intended
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=1)
+
+    def add(self, sid: str, text: str) -> str:
+        """
+        Registers a snippet.
+
+        Args:
+            sid (str): Stable id of the snippet.
+            text (str): The snippet text.
+
+        Returns:
+            str: Id of the representative of the snippet's group; `sid` itself when the
+            snippet starts a new group.
+        """
+        if sid in self.mapping:
+            return self.mapping[sid]
+
+        normalized = normalize_text(text)
+        exact_key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if exact_key in self._exact:
+            self.exact_duplicates += 1
+            self.mapping[sid] = self._exact[exact_key]
+            return self.mapping[sid]
+
+        representative = sid
+        if self.threshold < 1 and normalized:
+            signature = self._signature(normalized)
+            keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+            best, best_score = None, self.threshold
+            for band, key in enumerate(keys):
+                candidate = self._buckets[band].get(key)
+                if candidate is None or candidate == best:
+                    continue
+                score = float(np.mean(self._signatures[candidate] == signature))
+                if score >= best_score:
+                    best, best_score = candidate, score
+
+            if best is not None:
+                self.near_duplicates += 1
+                representative = best
+            else:
+                self._signatures[sid] = signature
+                for band, key in enumerate(keys):
+                    self._buckets[band].setdefault(key, sid)
+
+        if representative == sid:
+            self._exact[exact_key] = sid
+        self.mapping[sid] = representative
+        return representative
+
+    def filter(self, items):
+        """
+        Streams (snippet id, text) pairs and yields only the group representatives.
+
+        Yields:
+            tuple: (snippet id, text) of every snippet that starts a new group.
+        """
+        for sid, text in items:
+            if sid not in self.mapping and self.add(sid, text) == sid:
+                yield sid, text
+
+    def groups(self) -> dict:
+        """
+        Returns:
+            dict: Representative id -> list of member ids, the representative included.
+        """
+        groups = {}
+        for sid, representative in self.mapping.items():
+            groups.setdefault(representative, []).append(sid)
+        return groups
+
+    def fan_out(self, responses: dict) -> dict:
+        """
+        Copies the response of every representative to all members of its group.
+
+        Args:
+            responses (dict): Representative id -> response.
+
+        Returns:
+            dict: Snippet id -> response, for every snippet whose representative has one.
+        """
+        return {
+            sid: responses[representative]
+            for sid, representative in self.mapping.items()
+            if representative in responses
+        }
+
+    def stats(self) -> dict:
+        total = len(self.mapping)
+        unique = total - self.exact_duplicates - self.near_duplicates
+        return {
+            "snippets": total,
+            "representatives": unique,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "calls_saved_ratio": round(1 - unique / total, 4) if total else 0.0
+        }
+
+    def save_mapping(self, path: str) -> str:
+        """
+        Stores the snippet -> representative mapping as JSON.
+
+        Returns:
+            str: The path of the written file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"threshold": self.threshold, "stats": self.stats(), "mapping": self.mapping},
+                f,
+                indent=4
+            )
+        return path
@@ -1,99 +1,599 @@
-
 import os
-import json
 import glob
-from nl_case_analyzer.data_loader import CSV_Loader
-from nl_case_analyzer.openai_config import ConfigGPT
-from nl_case_analyzer.analyze import AnalyzeGPT
-from nl_case_analyzer.validate_json import ResponseValidator
-from nl_case_analyzer.json_writer import JSONWriter
-from nl_case_analyzer.visualizer import Visualizer
+import json
+import asyncio
 
+# Subsystems (pandas, openai, matplotlib, ...) are imported inside the stage that
+# needs them, so every stage, and every CLI subcommand built on it, starts fast.
 
-def main():
 
-    # root directory of project
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    # build path to data folder
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
-    path = os.path.join(project_root, "data", "Analyses_Dataset.csv")
-    output_dir = os.path.join(project_root, "results")
 
+async def run_analysis(openai_api, validator, journal, snippets, snippet_ids, snippet_texts,
+                       concurrency=None, pack_size=1):
+    """
+    Consumes the async analysis stream, validating each response as it arrives and
+    appending the valid ones to the checkpoint journal.
+
+    Args:
+        openai_api (AnalyzeGPT): The configured API handler.
+        validator (ResponseValidator): Validator for the API responses.
+        journal (CheckpointJournal): Journal receiving the validated responses.
+        snippets (iterable): Text snippets to analyze, may be a lazy generator.
+        snippet_ids (list): Stable ids of the snippets, in the same order. It may be
+            filled while `snippets` is consumed.
+        snippet_texts (dict): Snippet id -> text of the snippets in flight; handled
+            snippets are removed, so only the failures are kept.
+        concurrency (int): Maximum number of concurrent API calls.
+        pack_size (int): Number of snippets per API call, 1 disables packing.
+
+    Returns:
+        tuple: (number of valid responses, dict of snippet id -> (text, response) of
+        the invalid or failed snippets)
+    """
+    if pack_size > 1:
+        stream = openai_api.analyze_snippets_packed_async(
+            snippets, validator, pack_size=pack_size, concurrency=concurrency
+        )
+    else:
+        stream = openai_api.analyze_snippets_async(snippets, concurrency=concurrency)
+
+    valid_count = 0
+    failures = {}
+    async for idx, response in stream:
+        sid = snippet_ids[idx]
+        text = snippet_texts.pop(sid, None)
+        if response and validator.is_valid(response):
+            journal.append(sid, response)
+            valid_count += 1
+        else:
+            print(f"Snippet {sid} is invalid.")
+            failures[sid] = (text, response)
+    return valid_count, failures
+
+
+def run_batch(openai_api, validator, journal, snippets, snippet_ids, snippet_texts, backend, work_dir):
+    """
+    Runs the snippets through the Batch API and validates and journals the streamed
+    output, like `run_analysis` does for the interactive path.
+
+    Returns:
+        tuple: (number of valid responses, dict of snippet id -> (text, response) of
+        the invalid or failed snippets)
+    """
+    valid_count = 0
+    failures = {}
+    for sid, response in openai_api.analyze_snippets_batch(snippets, snippet_ids, backend, work_dir):
+        text = snippet_texts.pop(sid, None)
+        if response and validator.is_valid(response):
+            journal.append(sid, response)
+            valid_count += 1
+        else:
+            print(f"Snippet {sid} is invalid.")
+            failures[sid] = (text, response)
+    return valid_count, failures
+
+
+async def requeue_snippets(openai_api, validator, repairer, journal, pending, concurrency=None):
+    """
+    Requests new responses for snippets whose earlier response could not be used.
+
+    Args:
+        pending (dict): Snippet id -> text of the snippets to re-request.
+
+    Returns:
+        dict: Snippet id -> text of the snippets that still have no valid response.
+    """
+    snippet_ids = list(pending)
+    still_pending = {}
+    stream = openai_api.analyze_snippets_async(
+        (pending[sid] for sid in snippet_ids), concurrency=concurrency, refresh=True
+    )
+    async for idx, response in stream:
+        sid = snippet_ids[idx]
+        if response and validator.is_valid(response):
+            journal.append(sid, response)
+            continue
+        repaired = repairer.repair(response) if response else None
+        if repaired is not None:
+            journal.append(sid, repaired)
+        else:
+            still_pending[sid] = pending[sid]
+    return still_pending
+
+
+async def repair_stage(openai_api, validator, journal, failures, max_attempts=2, concurrency=None):
+    """
+    Repairs invalid responses locally and re-requests only the snippets that still
+    fail, at most `max_attempts` times.
+
+    Args:
+        openai_api (AnalyzeGPT): The configured API handler.
+        validator (ResponseValidator): Validator for the API responses.
+        journal (CheckpointJournal): Journal receiving the repaired responses.
+        failures (dict): Snippet id -> (text, response) of the invalid snippets.
+        max_attempts (int): Maximum number of re-requests per snippet.
+        concurrency (int): Maximum number of concurrent API calls.
+
+    Returns:
+        list: Ids of the snippets that have no valid response after all attempts.
+    """
+    from nl_case_analyzer.repair import ResponseRepairer
+
+    if not failures:
+        return []
+
+    repairer = ResponseRepairer(validator)
+    pending = {}
+    unrecoverable = []
+    for sid, (text, response) in failures.items():
+        repaired = repairer.repair(response) if response else None
+        if repaired is not None:
+            journal.append(sid, repaired)
+        elif text is None:
+            unrecoverable.append(sid)
+        else:
+            pending[sid] = text
+    print(f"Repaired {repairer.repaired} of {len(failures)} invalid snippets locally.")
+
+    for attempt in range(1, max_attempts + 1):
+        if not pending:
+            break
+        print(f"Re-requesting {len(pending)} snippets (attempt {attempt}/{max_attempts})...")
+        pending = await requeue_snippets(
+            openai_api, validator, repairer, journal, pending, concurrency=concurrency
+        )
+    print(f"Repair: {repairer.stats()}")
+    return unrecoverable + list(pending)
+
+
+def load_snippets(path, model_name="GPT-3.5-Turbo", column_name="Answer", stream=True):
+    """
+    Loads the text snippets of one model from the dataset.
+
+    Args:
+        path (str): Location of the semicolon separated csv.
+        model_name (str): Model whose answers are analyzed.
+        column_name (str): Column holding the text snippets.
+        stream (bool): Stream snippets lazily instead of loading the full dataset.
+
+    Returns:
+        iterable: The text snippets.
+    """
+    from nl_case_analyzer.data_loader import CSV_Loader
 
-    # Loading data
     print(f"Loading data from: {path}")
     loader = CSV_Loader(path)
+    if stream:
+        return loader.iter_snippets(
+            column_name=column_name,
+            cols_to_filter="Model",
+            model_name=model_name
+        )
+
     df = loader.load_dataset(
         cols_to_filter = "Model",
-        model_name = "GPT-3.5-Turbo"
+        model_name = model_name
         )
-    
+
     # Validate
-    snippets = loader.validate_txt(df, column_name="Answer")
+    return loader.validate_txt(df, column_name=column_name)
 
 
-    if snippets:
-        # Initialize API configurations
-        config_gpt = ConfigGPT()
-        config = config_gpt.get_configuration()
-
-        schema = config['json_schema']
-
-        # Initialize the OpenAI API handler
-        openai_api = AnalyzeGPT(config)
-
-        # Initialize the validation function 
-        validator = ResponseValidator(schema=schema)
-
-        
-
-        # Analyze snippts
-        print("Starting API calls for text snippets...")
-        results = openai_api.analyze_snippets(snippets[600:], timeout=1)
-
-        # Validate
-        invalid_snippets = []
-        for idx, response in enumerate(results):
-            print(f"\n Validating Snippet {idx}")
-            if not validator.is_valid(response):
-                 print(f"Snippet {idx + 1} is invalid.")
-                 # append to list 
-                 invalid_snippets.append(idx)
-            else:
-                print(f"Snippet {idx + 1} is valid.")
-
-        print("\nSummary of Validation:")
-        if invalid_snippets:
-            print(f"The following snippets are invalid: {invalid_snippets}")
+def analyze_stage(snippets,
+                  journal_path,
+                  cache_path,
+                  dedup_mapping_path=None,
+                  batch_dir=None,
+                  use_batch=False,
+                  pack_size=1,
+                  deduplicate=True,
+                  dedup_threshold=0.85,
+                  prefilter=True,
+                  trim_input=False,
+                  trim_context=1,
+                  concurrency=None,
+                  max_repair_attempts=2,
+                  metrics_dir=None,
+                  backends_path=None):
+    """
+    Analyzes the snippets that are not yet in the journal and validates the responses.
+
+    Args:
+        snippets (iterable): Text snippets to analyze.
+        journal_path (str): Checkpoint journal receiving the validated responses.
+        cache_path (str): Location of the persistent response cache.
+        dedup_mapping_path (str): Where the snippet -> representative mapping is stored.
+        batch_dir (str): Work directory of the Batch API mode.
+        use_batch (bool): Use the cheaper Batch API instead of interactive calls.
+        pack_size (int): Snippets analyzed per API call.
+        deduplicate (bool): Analyze one representative per group of (near-)duplicates.
+        dedup_threshold (float): Similarity threshold of near duplicates.
+        prefilter (bool): Journal the all-null result for snippets without any crypto
+            term instead of analyzing them.
+        trim_input (bool): Send only the sentences mentioning key figures, crypto or
+            evidence terms, see `trimming.InputTrimmer`.
+        trim_context (int): Neighbouring sentences kept around a relevant sentence.
+        concurrency (int): Maximum number of concurrent API calls.
+        max_repair_attempts (int): Re-requests per snippet whose response is invalid
+            and cannot be repaired locally, 0 disables them.
+        metrics_dir (str): Directory receiving the per-call metrics (calls.jsonl,
+            appended run over run), the tokens saved per trimmed snippet
+            (trimming.jsonl) and a Prometheus snapshot (metrics.prom).
+        backends_path (str): Optional JSON file of endpoints to route the calls over,
+            see `backends.load_router`; each endpoint then applies its own rate limits,
+            the configured ones when the file sets none.
+
+    Returns:
+        dict: Snippet id -> validated response, for every analyzed snippet.
+    """
+    from nl_case_analyzer.data_loader import snippet_id
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.analyze import AnalyzeGPT
+    from nl_case_analyzer.response_cache import ResponseCache
+    from nl_case_analyzer.rate_limiter import AdaptiveRateLimiter
+    from nl_case_analyzer.validate_json import ResponseValidator
+    from nl_case_analyzer.checkpoint import CheckpointJournal
+    from nl_case_analyzer.batch import OpenAIBatchBackend
+    from nl_case_analyzer.dedup import SnippetDeduplicator
+    from nl_case_analyzer.prefilter import CryptoPrefilter
+    from nl_case_analyzer.trimming import InputTrimmer
+    from nl_case_analyzer.telemetry import CallTelemetry
+    from nl_case_analyzer.backends import load_router
+
+    # Initialize API configurations
+    config_gpt = ConfigGPT()
+    config = config_gpt.get_configuration()
+
+    schema = config['json_schema']
+
+    # Initialize the OpenAI API handler, reusing responses of earlier runs
+    response_cache = ResponseCache(cache_path)
+    router = load_router(
+        backends_path, default_rate_limits=config["rate_limits"]
+    ).start_health_checks() if backends_path else None
+    rate_limiter = AdaptiveRateLimiter(**config["rate_limits"])
+    telemetry = CallTelemetry(
+        prices=config.get("prices"),
+        jsonl_path=os.path.join(metrics_dir, "calls.jsonl") if metrics_dir else None
+    )
+    # Initialize the validation function, also deciding which responses are cached
+    validator = ResponseValidator(schema=schema)
+
+    openai_api = AnalyzeGPT(
+        config, cache=response_cache, rate_limiter=rate_limiter, telemetry=telemetry, router=router,
+        validator=validator
+    )
+
+    # Resume from the journal, skipping snippets that were already analyzed by the model;
+    # snippets answered by the pre-filter are filtered again, with the current terms
+    journal = CheckpointJournal(journal_path)
+    completed = journal.completed_ids()
+    prefiltered = journal.sources_by_id()
+    print(f"{len(completed)} snippets already in journal, {len(prefiltered)} answered by the pre-filter.")
+
+    deduplicator = SnippetDeduplicator(threshold=dedup_threshold) if deduplicate else None
+    relevance_filter = CryptoPrefilter(schema) if prefilter else None
+    trimmer = InputTrimmer(
+        schema,
+        context=trim_context,
+        report_path=os.path.join(metrics_dir, "trimming.jsonl") if metrics_dir else None
+    ) if trim_input else None
+
+    # ids are collected while the snippets are consumed, so streaming stays lazy;
+    # texts are kept until their response is handled, for the repair stage
+    snippet_ids = []
+    snippet_texts = {}
+
+    def journal_skipped(sid, result, source):
+        # journaled once, also when the snippet is skipped again on every resume
+        if prefiltered.get(sid) != source:
+            journal.append(sid, result, source)
+
+    def pending_snippets():
+        items = ((snippet_id(snippet), snippet) for snippet in snippets)
+        if deduplicator is not None:
+            items = deduplicator.filter(items)
+        items = ((sid, snippet) for sid, snippet in items if sid not in completed)
+        if relevance_filter is not None:
+            # snippets that cannot produce a finding get their null result right away
+            items = relevance_filter.filter(items, on_skip=journal_skipped)
+        if trimmer is not None:
+            items = trimmer.filter(items)
+        for sid, snippet in items:
+            snippet_ids.append(sid)
+            snippet_texts[sid] = snippet
+            yield snippet
+
+    # Analyze and validate snippets
+    print("Starting API calls for text snippets...")
+    with journal:
+        if use_batch:
+            valid_count, failures = run_batch(
+                openai_api,
+                validator,
+                journal,
+                list(pending_snippets()),
+                snippet_ids,
+                snippet_texts,
+                OpenAIBatchBackend(config["client"]),
+                batch_dir
+            )
+            invalid_snippets = asyncio.run(repair_stage(
+                openai_api, validator, journal, failures,
+                max_attempts=max_repair_attempts, concurrency=concurrency
+            ))
         else:
-            print("All snippets are valid.")
+            # one event loop for analysis and repair, the async client is bound to it
+            async def analyze_and_repair():
+                valid_count, failures = await run_analysis(
+                    openai_api,
+                    validator,
+                    journal,
+                    pending_snippets(),
+                    snippet_ids,
+                    snippet_texts,
+                    concurrency=concurrency,
+                    pack_size=pack_size
+                )
+                return valid_count, await repair_stage(
+                    openai_api, validator, journal, failures,
+                    max_attempts=max_repair_attempts, concurrency=concurrency
+                )
 
+            valid_count, invalid_snippets = asyncio.run(analyze_and_repair())
+    print(f"Response cache: {response_cache.stats()}")
+    print(telemetry.summary())
+    if metrics_dir:
+        telemetry.export_prometheus(os.path.join(metrics_dir, "metrics.prom"))
+    telemetry.close()
+    if router is not None:
+        router.stop()
+
+    print("\nSummary of Validation:")
+    print(f"{valid_count} new snippets are valid.")
+    if invalid_snippets:
+        print(f"The following snippets are invalid: {invalid_snippets}")
+    else:
+        print("All snippets are valid.")
+    if relevance_filter is not None:
+        print(f"Pre-filter: {relevance_filter.stats()}")
+    if trimmer is not None:
+        print(f"Input trimming: {trimmer.stats()}")
+        trimmer.close()
+
+    if deduplicator is not None:
+        # fan the representative results back out to every member snippet
+        print(f"Deduplication: {deduplicator.stats()}")
+        if dedup_mapping_path:
+            deduplicator.save_mapping(dedup_mapping_path)
+        return deduplicator.fan_out(journal.responses_by_id())
+    return journal.responses_by_id()
+
+
+def write_stage(results_by_id, output_dir, file_name, parquet=True):
+    """
+    Writes the results as a JSON list and, optionally, as a flattened Parquet file.
+
+    Args:
+        results_by_id (dict): Snippet id -> response.
+        output_dir (str): Directory the results are written to.
+        file_name (str): Name of the JSON file; the Parquet file gets the same stem.
+        parquet (bool): Also write the columnar copy.
+
+    Returns:
+        str: Path of the JSON results file.
+    """
+    from nl_case_analyzer.json_writer import JSONWriter
+
+    results = list(results_by_id.values())
+
+    # write JSON (list of jsons)s
+    json_writer = JSONWriter(output_dir)
+    result_file = json_writer.write_json(results, file_name)
+
+    if parquet:
+        from nl_case_analyzer.parquet_writer import ParquetWriter
+
+        # flattened, columnar copy for column-selective downstream reads
+        parquet_writer = ParquetWriter(output_dir)
+        parquet_writer.write_parquet(
+            results,
+            os.path.splitext(file_name)[0] + ".parquet",
+            snippet_ids=list(results_by_id.keys())
+        )
+    return result_file
+
+
+def index_tags_stage(results_by_id, index_path, threshold=0.88):
+    """
+    Adds the tags of the results to the persistent inverted tag index, clustering
+    them into canonical tags.
+
+    Args:
+        results_by_id (dict): Snippet id -> validated response.
+        index_path (str): Location of the tag index database.
+        threshold (float): Similarity of tags merged into one canonical tag.
+
+    Returns:
+        dict: Statistics of the index.
+    """
+    from nl_case_analyzer.tags import TagIndex
+
+    with TagIndex(index_path, threshold=threshold) as index:
+        postings = index.ingest(results_by_id)
+        stats = index.stats()
+    print(f"Indexed {postings} tag postings of {len(results_by_id)} results: {stats}")
+    return stats
+
+
+def journal_sources(journal_path, dedup_mapping_path=None):
+    """
+    Returns:
+        dict: Snippet id -> source of the journaled responses that did not come from
+        the model, e.g. 'prefilter', fanned out over the duplicates when a
+        deduplication mapping is present.
+    """
+    from nl_case_analyzer.checkpoint import CheckpointJournal
+
+    if not journal_path.endswith(".jsonl") or not os.path.exists(journal_path):
+        return {}
+    with CheckpointJournal(journal_path) as journal:
+        sources = journal.sources_by_id()
+    if dedup_mapping_path and os.path.exists(dedup_mapping_path):
+        with open(dedup_mapping_path, "r", encoding="utf-8") as f:
+            mapping = json.load(f)["mapping"]
+        sources = {
+            sid: sources[representative]
+            for sid, representative in mapping.items()
+            if representative in sources
+        }
+    return sources
+
+
+def store_stage(results_by_id, store_path, data_path=None, source="analysis", sources=None):
+    """
+    Adds the results to the analytical results store, keyed by snippet id, and
+    (re)loads the dataset rows they join to when the dataset changed.
+
+    Args:
+        results_by_id (dict): Snippet id -> validated response.
+        store_path (str): Location of the results store database.
+        data_path (str): Location of the dataset, None to leave the rows as they are.
+        source (str): Origin recorded with the model results.
+        sources (dict): Snippet id -> source of the results that did not come from
+            the model, see `journal_sources`; they are recorded with that source.
+
+    Returns:
+        dict: Statistics of the store.
+    """
+    from nl_case_analyzer.results_store import ResultsStore
+
+    sources = sources or {}
+    with ResultsStore(store_path) as store:
+        if data_path and os.path.exists(data_path):
+            store.ingest_metadata(data_path)
+        store.ingest_results(
+            {sid: response for sid, response in results_by_id.items() if sid not in sources}, source
+        )
+        for other in sorted(set(sources.values())):
+            store.ingest_results(
+                {sid: response for sid, response in results_by_id.items() if sources.get(sid) == other}, other
+            )
+        stats = store.stats()
+    print(f"Results store: {stats}")
+    return stats
 
-        # write JSON (list of jsons)s
-        json_writer = JSONWriter(output_dir)
-        result_file = json_writer.write_json(results, "Results_3.json")
 
-    
-        # Loading in Results 
-        results_file_path = glob.glob(os.path.join(output_dir, "*.json"))
-        result_list = []
+def visualize_stage(output_dir, aggregate_path, max_workers=4, tag_index_path=None):
+    """
+    Updates the aggregate counts with new or changed results files and re-renders
+    the figures whose counts changed.
 
-        for file in results_file_path:
+    Args:
+        output_dir (str): Directory of the results files.
+        aggregate_path (str): Location of the aggregate store.
+        max_workers (int): Render processes.
+        tag_index_path (str): Optional tag index; the wordcloud then shows canonical
+            tags instead of the raw tags.
 
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                result_list.extend(data)
-        # Visualization
+    Returns:
+        list: Names of the re-rendered figures.
+    """
+    import matplotlib
+    from nl_case_analyzer.aggregate_store import AggregateStore
+    from nl_case_analyzer.results_store import is_test_file
 
-        visualizer = Visualizer(result_list, output_dir)
-        visualizer.generate_wordcloud()
-        visualizer.plot_label_distributions()
+    # figures are only saved here, also in headless runs without a display
+    matplotlib.use("Agg")
+    from nl_case_analyzer.visualizer import Visualizer
+
+    # Update the aggregate counts with new or changed results files only, test runs excluded
+    aggregate_store = AggregateStore(aggregate_path)
+    aggregate_store.sync([
+        path for path in glob.glob(os.path.join(output_dir, "*.json")) if not is_test_file(path)
+    ])
+
+    tag_counts = None
+    if tag_index_path and os.path.exists(tag_index_path):
+        from nl_case_analyzer.tags import TagIndex
+
+        with TagIndex(tag_index_path) as index:
+            tag_counts = dict(index.frequencies())
+
+    # Visualization, re-rendering only figures whose counts changed
+    visualizer = Visualizer([], output_dir)
+    return visualizer.save_plots_incremental(aggregate_store, max_workers=max_workers, tag_counts=tag_counts)
+
+
+def main():
+
+    # root directory of project
+    project_root = PROJECT_ROOT
+    # build path to data folder
+
+    path = os.path.join(project_root, "data", "Analyses_Dataset.csv")
+    output_dir = os.path.join(project_root, "results")
+    cache_path = os.path.join(project_root, "cache", "responses.sqlite")
+    aggregate_path = os.path.join(project_root, "cache", "aggregates.sqlite")
+    tag_index_path = os.path.join(project_root, "cache", "tags.sqlite")
+    results_store_path = os.path.join(project_root, "cache", "results.sqlite")
+    journal_path = os.path.join(project_root, "checkpoints", "Results_3.jsonl")
+    batch_dir = os.path.join(project_root, "checkpoints", "batches")
+    dedup_mapping_path = os.path.join(project_root, "checkpoints", "dedup_mapping.json")
+    metrics_dir = os.path.join(project_root, "metrics")
+
+    # bulk reprocessing through the cheaper Batch API instead of interactive calls
+    use_batch = False
+    # snippets analyzed per API call, sharing the system prompt and schema
+    pack_size = 1
+    # stream snippets from the csv instead of loading the full dataset first
+    stream_snippets = True
+    # analyze one representative per group of (near-)duplicate snippets
+    deduplicate = True
+    dedup_threshold = 0.85
+    # skip snippets without any crypto term, they get the all-null result
+    prefilter = True
+    # send only the key figure / evidence sentences, check with `cli trim-eval` first
+    trim_input = False
+    # re-requests of snippets whose invalid response cannot be repaired locally
+    max_repair_attempts = 2
+
+    # Loading data
+    snippets = load_snippets(path, model_name="GPT-3.5-Turbo", stream=stream_snippets)
+
+    if snippets:
+        results_by_id = analyze_stage(
+            snippets,
+            journal_path,
+            cache_path,
+            dedup_mapping_path=dedup_mapping_path,
+            batch_dir=batch_dir,
+            use_batch=use_batch,
+            pack_size=pack_size,
+            deduplicate=deduplicate,
+            dedup_threshold=dedup_threshold,
+            prefilter=prefilter,
+            trim_input=trim_input,
+            max_repair_attempts=max_repair_attempts,
+            metrics_dir=metrics_dir
+        )
+
+        write_stage(results_by_id, output_dir, "Results_3.json")
+
+        index_tags_stage(results_by_id, tag_index_path)
+
+        store_stage(results_by_id, results_store_path, data_path=path, source=journal_path,
+                    sources=journal_sources(journal_path, dedup_mapping_path))
+
+        visualize_stage(output_dir, aggregate_path, max_workers=4, tag_index_path=tag_index_path)
 
         print("chepoint mate")
-    
+
     else:
         print("Loading snippets went down the drain")
-    
-    
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,388 @@
+import os
+import re
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import threading
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from nl_case_analyzer.rate_limiter import TokenBucket
+from nl_case_analyzer.packing import PACKED_FIELD, FRAGMENT_FIELD
+
+
+_FRAGMENT_PATTERN = re.compile(r"^Fragment (\d+):", re.MULTILINE)
+
+_WORDS = (
+    "de", "rechtbank", "acht", "het", "bewijs", "betrouwbaar", "rechtmatig", "verkregen", "data",
+    "servers", "berichten", "verdediging", "betwist", "integriteit", "onderzoek", "hof", "gebruik",
+)
+
+SAMPLE_SNIPPET = (
+    "De rechtbank oordeelt dat de {data} betrouwbaar zijn en voor het bewijs kunnen worden gebruikt. "
+    "De verdediging heeft de rechtmatigheid van de verkrijging van de {data} betwist, maar de "
+    "officier van justitie stelt dat de gegevens via een rechtshulpverzoek zijn verkregen."
+)
+
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution.
+
+    Supported forms are 'fixed:SECONDS', 'uniform:LOW,HIGH', 'exponential:MEAN' and
+    'lognormal:MEDIAN,SIGMA'.
+
+    Returns:
+        callable: Function drawing a latency in seconds from a `random.Random`.
+    """
+    kind, _, arguments = spec.partition(":")
+    values = [float(value) for value in arguments.split(",") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unsupported latency distribution '{spec}'.")
+
+
+def sample_instance(schema: dict, rng: random.Random, null_ratio: float = 0.3):
+    """
+    Draws a random instance that is valid against a (response format) schema.
+
+    Args:
+        schema (dict): JSON schema using type, enum, properties and items.
+        rng (random.Random): Source of randomness.
+        null_ratio (float): Chance of picking null where the schema allows it.
+
+    Returns:
+        A JSON-serializable value.
+    """
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    types = schema.get("type", "object")
+    types = [types] if isinstance(types, str) else list(types)
+    if "null" in types and (len(types) == 1 or rng.random() < null_ratio):
+        return None
+    kind = next(t for t in types if t != "null")
+
+    if kind == "object":
+        return {name: sample_instance(subschema, rng, null_ratio)
+                for name, subschema in schema.get("properties", {}).items()}
+    if kind == "array":
+        length = schema.get("minItems", 5)
+        return [sample_instance(schema.get("items", {}), rng, null_ratio) for _ in range(length)]
+    if kind == "string":
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 12)))
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "number":
+        return rng.random()
+    return None
+
+
+class MockCompletionServer:
+    """
+    Local stand-in for the chat completions endpoint, for load tests that must not
+    touch the paid API.
+
+    Answers `POST /v1/chat/completions` with random instances of the requested
+    `json_schema` response format (packed requests get one element per fragment),
+    after a latency drawn from a configurable distribution. It enforces its own
+    requests/min and tokens/min quotas, returns the `x-ratelimit-*` headers of the
+    real API, simulates prompt caching of repeated system prompts, and injects 429
+    and 500 errors at configurable rates.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: str = "lognormal:0.8,0.5",
+                 error_rate_429: float = 0.0,
+                 error_rate_500: float = 0.0,
+                 requests_per_minute: int = 5000,
+                 tokens_per_minute: int = 2_000_000,
+                 seed: int = None):
+        """
+        Initializes the MockCompletionServer.
+
+        Args:
+            host (str): Interface to bind.
+            port (int): Port to bind, 0 picks a free port.
+            latency (str): Latency distribution, see `parse_latency`.
+            error_rate_429 (float): Fraction of requests answered with a 429.
+            error_rate_500 (float): Fraction of requests answered with a 500.
+            requests_per_minute (int): Request quota of the server.
+            tokens_per_minute (int): Token quota of the server.
+            seed (int): Seed for reproducible latencies, errors and payloads.
+        """
+        self.latency = parse_latency(latency)
+        self.error_rate_429 = error_rate_429
+        self.error_rate_500 = error_rate_500
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0}
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        handler = type("MockCompletionHandler", (_CompletionHandler,), {"mock": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _quota_headers(self) -> dict:
+        headers = {}
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            bucket.refill()
+            headers[f"x-ratelimit-limit-{kind}"] = str(int(bucket.capacity))
+            headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, int(bucket.level)))
+            headers[f"x-ratelimit-reset-{kind}"] = f"{(bucket.capacity - bucket.level) / bucket.rate:.3f}s"
+        return headers
+
+    def _admit(self, tokens: int):
+        """
+        Returns:
+            tuple: (status, headers, draw) where status is 200, 429 or 500 and draw
+            holds the random values used to answer the request.
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            draw = {"roll": self.rng.random(), "latency": max(0.0, self.latency(self.rng)),
+                    "seed": self.rng.getrandbits(32)}
+            if draw["roll"] < self.error_rate_429 or \
+                    self.requests.wait_time(1) > 0 or self.tokens.wait_time(tokens) > 0:
+                self.stats["rate_limited"] += 1
+                headers = self._quota_headers()
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens), 0.05)
+                headers["retry-after"] = f"{wait:.3f}"
+                return 429, headers, draw
+            if draw["roll"] < self.error_rate_429 + self.error_rate_500:
+                self.stats["server_errors"] += 1
+                return 500, {}, draw
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.stats["ok"] += 1
+            return 200, self._quota_headers(), draw
+
+    def _cached_tokens(self, messages) -> int:
+        # the system prompt is the cacheable prefix; reported in 128 token steps like the API
+        prefix = "".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = key in self._seen_prefixes
+            self._seen_prefixes.add(key)
+        tokens = len(prefix) // 4
+        return (tokens // 128) * 128 if seen and tokens >= 1024 else 0
+
+    def completion(self, request: dict, seed: int) -> dict:
+        """
+        Builds a chat completion answering `request` with a schema-valid payload.
+        """
+        rng = random.Random(seed)
+        response_format = request.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema", {"type": "object"})
+        messages = request.get("messages", [])
+
+        properties = schema.get("properties", {})
+        if PACKED_FIELD in properties:
+            user_message = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+            fragments = [int(number) for number in _FRAGMENT_PATTERN.findall(user_message)]
+            item_schema = properties[PACKED_FIELD]["items"]
+            items = []
+            for number in fragments:
+                item = sample_instance(item_schema, rng)
+                item[FRAGMENT_FIELD] = number
+                items.append(item)
+            payload = {PACKED_FIELD: items}
+        else:
+            payload = sample_instance(schema, rng)
+
+        content = json.dumps(payload, ensure_ascii=False)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content, "refusal": None}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self._cached_tokens(messages)}
+            }
+        }
+
+    def start(self):
+        """
+        Serves in a background thread.
+
+        Returns:
+            MockCompletionServer: The started server.
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        print(f"Mock completions server listening on {self.base_url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        # model listing, used by the backend router's health checks
+        if self.path.rstrip("/") != "/v1/models":
+            self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        self._send(200, {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "mock"}]})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            self._send(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        # quota is charged like the API does: prompt estimate plus the completion budget
+        tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4 \
+            + int(request.get("max_tokens") or 0)
+        status, headers, draw = self.mock._admit(tokens)
+        if status == 429:
+            self._send(429, {"error": {"message": "Rate limit reached (mock).", "type": "requests",
+                                       "code": "rate_limit_exceeded"}}, headers)
+            return
+
+        time.sleep(draw["latency"])
+        if status == 500:
+            self._send(500, {"error": {"message": "Injected server error (mock).", "type": "server_error"}})
+            return
+        self._send(200, self.mock.completion(request, draw["seed"]), headers)
+
+    def log_message(self, format, *args):
+        # keep load test output readable
+        pass
+
+
+def run_load_test(base_url: str,
+                  snippets: int = 500,
+                  concurrency: int = 16,
+                  pack_size: int = 1,
+                  rate_limited: bool = True,
+                  requests_per_minute: int = None,
+                  tokens_per_minute: int = None) -> dict:
+    """
+    Drives `AnalyzeGPT` against an OpenAI-compatible endpoint and measures the run.
+
+    Args:
+        base_url (str): Endpoint, e.g. `MockCompletionServer.base_url`.
+        snippets (int): Number of synthetic snippets to analyze.
+        concurrency (int): Maximum concurrent requests.
+        pack_size (int): Snippets per request, 1 disables packing.
+        rate_limited (bool): Use the client-side adaptive rate limiter.
+        requests_per_minute (int): Initial request quota of the limiter.
+        tokens_per_minute (int): Initial token quota of the limiter.
+
+    Returns:
+        dict: Sustained throughput, outcome counts, retries and the telemetry snapshot
+        with tail latencies.
+    """
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.analyze import AnalyzeGPT
+    from nl_case_analyzer.rate_limiter import AdaptiveRateLimiter, RetryPolicy
+    from nl_case_analyzer.validate_json import ResponseValidator
+
+    config_gpt = ConfigGPT(api_key="mock", base_url=base_url)
+    config_gpt.concurrency = concurrency
+    config = config_gpt.get_configuration()
+
+    rate_limiter = None
+    if rate_limited:
+        rate_limits = dict(config["rate_limits"])
+        rate_limits["requests_per_minute"] = requests_per_minute or rate_limits["requests_per_minute"]
+        rate_limits["tokens_per_minute"] = tokens_per_minute or rate_limits["tokens_per_minute"]
+        rate_limiter = AdaptiveRateLimiter(**rate_limits)
+    openai_api = AnalyzeGPT(config, rate_limiter=rate_limiter, retry_policy=RetryPolicy(base_delay=0.2, max_delay=5))
+    validator = ResponseValidator(schema=config["json_schema"])
+
+    datasets = ("EncroChat-data", "SkyECC-data", "Ennetcom-data")
+    texts = (f"{idx}. " + SAMPLE_SNIPPET.format(data=datasets[idx % len(datasets)]) for idx in range(snippets))
+
+    async def consume():
+        if pack_size > 1:
+            stream = openai_api.analyze_snippets_packed_async(texts, validator, pack_size=pack_size,
+                                                              concurrency=concurrency)
+        else:
+            stream = openai_api.analyze_snippets_async(texts, concurrency=concurrency)
+        valid = failed = 0
+        async for _, response in stream:
+            if response and validator.validate_many([response]).valid_count:
+                valid += 1
+            else:
+                failed += 1
+        return valid, failed
+
+    started = time.perf_counter()
+    # the per-snippet progress lines would dominate the output of a load test
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        valid, failed = asyncio.run(consume())
+    elapsed = time.perf_counter() - started
+    return {
+        "snippets": snippets,
+        "concurrency": concurrency,
+        "pack_size": pack_size,
+        "elapsed_s": round(elapsed, 3),
+        "snippets_per_second": round(snippets / elapsed, 2) if elapsed else 0.0,
+        "valid": valid,
+        "failed": failed,
+        "retries": dict(openai_api.retry_policy.retries),
+        "drops": dict(openai_api.retry_policy.drops),
+        "telemetry": openai_api.telemetry.snapshot()
+    }
@@ -1,7 +1,27 @@
 # Class to configure API + Response JSON SCHEMA
 
 import os
-from openai import OpenAI
+
+
+class LazyClient:
+    """
+    Proxy that creates the wrapped API client on first attribute access, so that
+    configurations used only for their prompt, schema or parameters never import
+    the openai package or require an API key.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = self._factory()
+        return getattr(self._client, name)
+
+
+# default `api_key` of ConfigGPT: read the key from the 'OPENAI_API' environment variable
+FROM_ENVIRONMENT = object()
+
 
 class ConfigGPT:
 
@@ -12,14 +32,24 @@ class ConfigGPT:
         - required response format
         - parameter settings for gpt
     """
-    def __init__(self):
-        # init api key
-        self.api_key = os.getenv("OPENAI_API")
-        if not self.api_key:
-            raise ValueError("API key is not set in the environment variable 'OPENAI_API'.")
-        
+    def __init__(self, api_key=FROM_ENVIRONMENT, base_url=None):
+        """
+        Args:
+            api_key (str): API key, defaults to the 'OPENAI_API' environment variable.
+                An explicit None stays unset, it does not fall back to that variable.
+            base_url (str): Alternative OpenAI-compatible endpoint, e.g. the local mock server.
+        """
+        # init api key, checked when the first API call is made
+        self.api_key = os.getenv("OPENAI_API") if api_key is FROM_ENVIRONMENT else api_key
+        self.base_url = base_url
+
+        # clients are created on first use
+        self.client = LazyClient(self._create_client)
+
+        # async client sharing one pooled HTTP connection pool across requests
+        self.concurrency = 8
+        self.async_client = LazyClient(self._create_async_client)
 
-        self.client = OpenAI(api_key=self.api_key)
         ## system prompt
         self.system_prompt = """
 Je bent een taalmodel dat gespecialiseerd is in het analyseren van samenvattingen van gerechtelijke uitspraken. Je taak is om de tekstfragmenten te analyseren en de correcte sleutelfiguren te identificeren. Deze sleutelfiguren zijn:
@@ -376,6 +406,40 @@ Je moet altijd output produceren die strikt voldoet aan het volgende JSON-schema
             "frequency_penalty": 0,
             "presence_penalty": 0
         }
+
+        # initial quota guess, corrected at runtime from the x-ratelimit-* headers
+        self.rate_limits = {
+            "requests_per_minute": 500,
+            "tokens_per_minute": 30000
+        }
+
+    def _require_api_key(self):
+        if not self.api_key:
+            raise ValueError("API key is not set, pass it or set the environment variable 'OPENAI_API'.")
+        return self.api_key
+
+    def _create_client(self):
+        from openai import OpenAI
+
+        # retries are handled by AnalyzeGPT's RetryPolicy, not by the client
+        return OpenAI(api_key=self._require_api_key(), base_url=self.base_url, max_retries=0)
+
+    def _create_async_client(self):
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        return AsyncOpenAI(
+            api_key=self._require_api_key(),
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.concurrency * 2,
+                    max_keepalive_connections=self.concurrency
+                )
+            )
+        )
+
     def get_configuration(self):
         """
         Fetches the configuration for the API.
@@ -384,6 +448,9 @@ Je moet altijd output produceren die strikt voldoet aan het volgende JSON-schema
         """
         return {
             "client": self.client,
+            "async_client": self.async_client,
+            "concurrency": self.concurrency,
+            "rate_limits": self.rate_limits,
 
             "api_key": self.api_key,
             "system_prompt": self.system_prompt,
@@ -0,0 +1,102 @@
+import copy
+import json
+
+
+PACKED_FIELD = "resultaten"
+FRAGMENT_FIELD = "fragment"
+
+PACKED_INSTRUCTIONS = """
+**Meerdere fragmenten:**
+
+- Je ontvangt meerdere tekstfragmenten, elk voorafgegaan door `Fragment <nummer>`.
+- Analyseer elk fragment volledig afzonderlijk; gebruik geen informatie uit andere fragmenten.
+- Geef voor elk fragment precies één element in de lijst `resultaten`, met het veld `fragment` gelijk aan het nummer van het fragment.
+"""
+
+
+def build_packed_schema(json_schema: dict) -> dict:
+    """
+    Derives the schema of a packed request from the single-snippet schema.
+
+    Each array element is the single-snippet object extended with the number of
+    the fragment it belongs to.
+
+    Args:
+        json_schema (dict): The `sleutelfiguren_schema` response format.
+
+    Returns:
+        dict: Response format wrapping the single-snippet schema in an array.
+    """
+    item = copy.deepcopy(json_schema["schema"])
+    item["properties"] = {
+        FRAGMENT_FIELD: {
+            "type": "integer",
+            "description": "Het nummer van het fragment waar dit resultaat bij hoort."
+        },
+        **item["properties"]
+    }
+    item["required"] = [FRAGMENT_FIELD] + list(item["required"])
+
+    return {
+        "name": f"{json_schema['name']}_packed",
+        "strict": json_schema.get("strict", True),
+        "schema": {
+            "type": "object",
+            "properties": {
+                PACKED_FIELD: {
+                    "type": "array",
+                    "items": item
+                }
+            },
+            "required": [PACKED_FIELD],
+            "additionalProperties": False
+        }
+    }
+
+
+def pack_snippets(snippets) -> str:
+    """
+    Joins snippets into one user message, numbering the fragments from 1.
+
+    Returns:
+        str: The packed user message.
+    """
+    return "\n\n".join(
+        f"Fragment {number}:\n\"\"\"\n{snippet}\n\"\"\""
+        for number, snippet in enumerate(snippets, start=1)
+    )
+
+
+def unpack_response(content: str, count: int) -> list:
+    """
+    Splits a packed response back into per-snippet responses.
+
+    Args:
+        content (str): JSON response following the packed schema.
+        count (int): Number of snippets in the packed request.
+
+    Returns:
+        list: `count` single-snippet JSON strings, None where the fragment is
+        missing, duplicated or the response could not be parsed.
+    """
+    results = [None] * count
+    try:
+        elements = json.loads(content)[PACKED_FIELD]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        print(f"Packed response could not be unpacked: {e}")
+        return results
+
+    seen = set()
+    for element in elements:
+        if not isinstance(element, dict):
+            continue
+        number = element.pop(FRAGMENT_FIELD, None)
+        if not isinstance(number, int) or not 1 <= number <= count:
+            continue
+        if number in seen:
+            # ambiguous answer, let the single-snippet fallback decide
+            results[number - 1] = None
+            continue
+        seen.add(number)
+        results[number - 1] = json.dumps(element, ensure_ascii=False)
+    return results
@@ -0,0 +1,130 @@
+import os
+import json
+
+
+SLEUTELFIGUREN = ("sleutelfiguur_1", "sleutelfiguur_2", "sleutelfiguur_3")
+LABELS = ("betrouwbaarheid", "rechtmatigheid", "overtuigend")
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([
+        ("snippet_id", pa.string()),
+        ("sleutelfiguur", category),
+        ("rol", category),
+        ("crypto_relevant", pa.bool_()),
+        *[(label, category) for label in LABELS],
+        ("tags", pa.list_(pa.string())),
+        ("zin", pa.string()),
+        ("reden", pa.string())
+    ])
+
+
+def flatten_response(response, snippet_id=None) -> list:
+    """
+    Flattens one response into one row per sleutelfiguur that took a position.
+
+    Args:
+        response (str or dict): A response following `sleutelfiguren_schema`.
+        snippet_id (str): Id of the snippet the response belongs to.
+
+    Returns:
+        list: Row dicts with the columns of the columnar results file.
+    """
+    data = json.loads(response) if isinstance(response, str) else response
+    rows = []
+    for figuur in SLEUTELFIGUREN:
+        fig_data = data.get(figuur)
+        if not fig_data:
+            continue
+        labels = fig_data.get("labels", {})
+        rows.append({
+            "snippet_id": snippet_id,
+            "sleutelfiguur": figuur,
+            "rol": fig_data.get("rol"),
+            "crypto_relevant": bool(fig_data.get("crypto_relevant", False)),
+            # labels are stored lowercase, like the Visualizer compares them
+            **{label: labels.get(label, "NVT").lower() for label in LABELS},
+            "tags": list(fig_data.get("tags", [])),
+            "zin": fig_data.get("zin"),
+            "reden": fig_data.get("reden")
+        })
+    return rows
+
+
+class ParquetWriter:
+    """
+    Writes responses as a flattened, compressed Parquet file next to the JSON results.
+
+    Every row is one sleutelfiguur of one response, with typed columns so readers can
+    load only the columns they need. Requires the pyarrow package.
+    """
+
+    def __init__(self, output_dir: str, compression: str = "zstd"):
+        """
+        Initializes the ParquetWriter.
+
+        Args:
+            output_dir (str): The directory where the Parquet files will be saved.
+            compression (str): Parquet compression codec.
+        """
+        self.output_dir = output_dir
+        self.compression = compression
+
+    def write_parquet(self, responses, file_name: str, snippet_ids=None):
+        """
+        Flattens the responses and writes them to a Parquet file in the output directory.
+
+        Args:
+            responses (list): Responses as JSON strings or dicts.
+            file_name (str): The name of the output Parquet file.
+            snippet_ids (list): Snippet ids in the order of `responses`. Defaults to
+                the position of each response.
+
+        Returns:
+            str: The full path to the saved file, or None when writing failed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("Writing Parquet results requires the pyarrow package to be installed.")
+            return None
+
+        if snippet_ids is None:
+            snippet_ids = [str(idx) for idx in range(len(responses))]
+
+        rows = []
+        for sid, response in zip(snippet_ids, responses):
+            try:
+                rows.extend(flatten_response(response, sid))
+            except (json.JSONDecodeError, AttributeError) as e:
+                print(f"Invalid response {sid} skipped: {e}")
+
+        file_path = os.path.join(self.output_dir, file_name)
+        try:
+            table = pa.Table.from_pylist(rows, schema=_arrow_schema())
+            pq.write_table(table, file_path, compression=self.compression)
+            print(f"Results successfully saved to: {file_path}")
+            return file_path
+        except Exception as e:
+            print(f"Failed to save Parquet data: {e}")
+            return None
+
+
+def read_results(path: str, columns=None):
+    """
+    Reads a columnar results file.
+
+    Args:
+        path (str): Location of the Parquet file.
+        columns (list): Columns to load, None loads all of them.
+
+    Returns:
+        pd.DataFrame: The requested columns, labels as pandas categoricals.
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, columns=columns).to_pandas()
@@ -0,0 +1,198 @@
+import json
+from collections import Counter, deque
+
+
+# Curated terms for evidence from encrypted communication. A trailing '*' matches any
+# word starting with the term (versleutelde, versleuteling, ...).
+CRYPTO_TERMS = (
+    "encrochat", "sky ecc", "sky-ecc", "skyecc", "ennetcom", "anom", "an0m", "exclu",
+    "phantom secure", "iron chat", "ironchat", "ghost chat", "blackberry pgp",
+    "pgp*", "crypto*", "versleutel*", "ontsleutel*", "encrypt*",
+    "end-to-end", "berichtenapp*", "chatberichten", "chatgesprekken",
+)
+
+# Synonyms of the key figures from the system prompt, next to the 'rol' enums of the schema
+KEY_FIGURE_TERMS = (
+    "rechter*", "hof", "rechtbank", "magistraat", "voorzitter", "rechtsprekende instantie",
+    "officier van justitie", "advocaat-generaal", "aanklager", "openbaar ministerie",
+    "verdediging", "raadsman", "raadsvrouw", "advocaat*",
+)
+
+# journal source of the null results given by the pre-filter instead of the model
+SOURCE = "prefilter"
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton matching many terms in a single pass over the text.
+
+    Matching is case insensitive, except for all-uppercase terms such as 'OM', which
+    would otherwise match the common word 'om'. Terms only match whole words; a term
+    ending in '*' also matches words that start with it.
+    """
+
+    def __init__(self, terms):
+        """
+        Initializes the TermMatcher.
+
+        Args:
+            terms (iterable): (term, category) pairs.
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for term, category in terms:
+            prefix = term.endswith("*")
+            word = term.rstrip("*")
+            case_sensitive = word.isupper()
+            node = 0
+            for char in word.lower():
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node].append((word, category, prefix, case_sensitive))
+
+        # breadth first, so the failure link of every parent is known
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str):
+        """
+        Yields:
+            tuple: (term, category, start offset) of every match in the text.
+        """
+        lowered = text.lower()
+        # lowering can change the length of some characters, offsets then no longer line up
+        aligned = len(lowered) == len(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for end, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for word, category, prefix, case_sensitive in output[node]:
+                start = end - len(word) + 1
+                if start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if not prefix and end + 1 < len(lowered) and lowered[end + 1].isalnum():
+                    continue
+                if case_sensitive and aligned and text[start:end + 1] != word:
+                    continue
+                yield word, category, start
+
+
+class CryptoPrefilter:
+    """
+    Local pre-filter that skips snippets which cannot produce a finding.
+
+    A finding needs a key figure taking a position on evidence from encrypted
+    communication, so snippets that mention none of the crypto terms are answered
+    with the all-null result the model would return, without an API call. Key figure
+    mentions are counted as well and, with `require_key_figure`, also required.
+    """
+
+    def __init__(self, schema: dict, crypto_terms=CRYPTO_TERMS, key_figure_terms=KEY_FIGURE_TERMS,
+                 require_key_figure: bool = False):
+        """
+        Initializes the CryptoPrefilter.
+
+        Args:
+            schema (dict): The response format; its 'rol' enums are added to the key
+                figure terms and its required fields make up the null result.
+            crypto_terms (iterable): Terms indicating encrypted-communication evidence.
+            key_figure_terms (iterable): Synonyms of the key figures.
+            require_key_figure (bool): Also skip snippets that mention no key figure.
+                Off by default, the model is asked to recognise key figures from context.
+        """
+        properties = schema["schema"]["properties"]
+        roles = [
+            role
+            for figure in properties.values()
+            for role in figure.get("properties", {}).get("rol", {}).get("enum", [])
+        ]
+        terms = {(term, "crypto") for term in crypto_terms}
+        terms |= {(term if term.isupper() else term.lower(), "key_figure")
+                  for term in list(key_figure_terms) + roles}
+        self.matcher = TermMatcher(sorted(terms))
+        self.require_key_figure = require_key_figure
+
+        self.null_result = json.dumps({name: None for name in schema["schema"]["required"]})
+        self.checked = 0
+        self.passed = 0
+        self.term_counts = Counter()
+        self.skip_reasons = Counter()
+
+    def matches(self, text: str) -> dict:
+        """
+        Returns:
+            dict: Category -> Counter of the terms found in the text.
+        """
+        found = {"crypto": Counter(), "key_figure": Counter()}
+        for term, category, _ in self.matcher.find(text or ""):
+            found[category][term] += 1
+        return found
+
+    def is_relevant(self, text: str) -> bool:
+        """
+        Checks whether a snippet can contain a finding, and updates the statistics.
+
+        Args:
+            text (str): The text snippet.
+
+        Returns:
+            bool: True when the snippet must be analyzed by the model.
+        """
+        found = self.matches(text)
+        self.checked += 1
+        self.term_counts.update(found["crypto"])
+
+        if not found["crypto"]:
+            self.skip_reasons["no_crypto_term"] += 1
+            return False
+        if self.require_key_figure and not found["key_figure"]:
+            self.skip_reasons["no_key_figure"] += 1
+            return False
+        self.passed += 1
+        return True
+
+    def filter(self, items, on_skip):
+        """
+        Streams (snippet id, text) pairs and yields only the relevant ones.
+
+        Args:
+            items (iterable): (snippet id, text) pairs.
+            on_skip (callable): Called with (snippet id, null result, SOURCE) for every
+                skipped snippet, e.g. `CheckpointJournal.append`.
+
+        Yields:
+            tuple: (snippet id, text) of every snippet that must be analyzed.
+        """
+        for sid, text in items:
+            if self.is_relevant(text):
+                yield sid, text
+            else:
+                on_skip(sid, self.null_result, SOURCE)
+
+    def stats(self) -> dict:
+        skipped = self.checked - self.passed
+        return {
+            "snippets": self.checked,
+            "analyzed": self.passed,
+            "skipped": skipped,
+            "skip_reasons": dict(self.skip_reasons),
+            "calls_saved_ratio": round(skipped / self.checked, 4) if self.checked else 0.0,
+            "top_terms": dict(self.term_counts.most_common(10))
+        }
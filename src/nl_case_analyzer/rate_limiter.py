@@ -0,0 +1,254 @@
+import re
+import time
+import random
+import asyncio
+import threading
+from collections import Counter
+
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset_duration(value) -> float:
+    """
+    Parses the duration format of the `x-ratelimit-reset-*` headers, e.g. '6m0s' or '20ms'.
+
+    Returns:
+        float: Duration in seconds, or None when the value cannot be parsed.
+    """
+    if value is None:
+        return None
+    matches = _DURATION_PATTERN.findall(str(value))
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+class TokenBucket:
+    """
+    Token bucket refilling continuously at `capacity` units per `period` seconds.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.level = float(capacity)
+        self.updated_at = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Returns:
+            float: Seconds until `amount` units are available, 0 when they are available now.
+        """
+        self.refill()
+        # requests larger than the whole bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    """
+    Client-side limiter for both requests/min and tokens/min.
+
+    The limits are corrected from the `x-ratelimit-*` response headers, so the limiter
+    converges on the real quota of the API key instead of the configured guess.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Initializes the AdaptiveRateLimiter.
+
+        Args:
+            requests_per_minute (int): Initial request quota.
+            tokens_per_minute (int): Initial token quota.
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Consumes capacity for one request when available.
+
+        Returns:
+            float: 0 when the request may proceed, otherwise seconds to wait before retrying.
+        """
+        with self._lock:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                return pause
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            return 0.0
+
+    def acquire(self, tokens: int):
+        """
+        Blocks until a request of `tokens` estimated tokens may be sent.
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int):
+        """
+        Async counterpart of `acquire`.
+        """
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        Holds back all requests for `seconds`, e.g. after a 429.
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """
+        Adjusts the buckets to the quota reported by the API.
+
+        Args:
+            headers (Mapping): Response headers containing `x-ratelimit-*` fields.
+        """
+        if headers is None:
+            return
+        with self._lock:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                try:
+                    if limit is not None:
+                        bucket.refill()
+                        bucket.capacity = float(limit)
+                    if remaining is not None:
+                        bucket.refill()
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+
+                # out of quota: wait for the reported reset before the next request
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and reset and float(remaining) <= 0:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, with retry decisions split by error class.
+
+    Retryable classes are rate limits (429), timeouts, connection errors and server
+    errors (5xx). Other errors, such as invalid requests, are dropped immediately.
+    """
+
+    RETRYABLE = ("rate_limit", "timeout", "connection", "server")
+
+    def __init__(self, max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Initializes the RetryPolicy.
+
+        Args:
+            max_retries (int): Maximum number of retries per request.
+            base_delay (float): Delay in seconds of the first retry.
+            max_delay (float): Upper bound of a single delay in seconds.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = Counter()
+        self.drops = Counter()
+
+    @staticmethod
+    def classify(error) -> str:
+        """
+        Maps an exception raised by the OpenAI client onto an error class.
+
+        Returns:
+            str: 'rate_limit', 'timeout', 'connection', 'server' or 'fatal'.
+        """
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            return "rate_limit"
+        if isinstance(error, openai.APITimeoutError):
+            return "timeout"
+        if isinstance(error, openai.APIConnectionError):
+            return "connection"
+        if isinstance(error, openai.APIStatusError) and error.status_code >= 500:
+            return "server"
+        return "fatal"
+
+    @staticmethod
+    def retry_after(error) -> float:
+        """
+        Returns:
+            float: Seconds the server asked us to wait, or None.
+        """
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        value = response.headers.get("retry-after")
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        return parse_reset_duration(
+            response.headers.get("x-ratelimit-reset-requests")
+            or response.headers.get("x-ratelimit-reset-tokens")
+        )
+
+    def backoff(self, attempt: int, error=None) -> float:
+        """
+        Returns:
+            float: Seconds to sleep before retry number `attempt` (starting at 0).
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = self.retry_after(error) if error is not None else None
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, error_class: str, attempt: int) -> bool:
+        return error_class in self.RETRYABLE and attempt < self.max_retries
+
+    def record_retry(self, error_class: str):
+        self.retries[error_class] += 1
+
+    def record_drop(self, error_class: str):
+        self.drops[error_class] += 1
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: Human readable overview of retries and dropped requests per error class.
+        """
+        retries = ", ".join(f"{k}: {v}" for k, v in sorted(self.retries.items())) or "none"
+        drops = ", ".join(f"{k}: {v}" for k, v in sorted(self.drops.items())) or "none"
+        return (
+            f"Retries: {sum(self.retries.values())} ({retries}). "
+            f"Dropped: {sum(self.drops.values())} ({drops})."
+        )
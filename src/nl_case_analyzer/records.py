@@ -0,0 +1,195 @@
+import sys
+import json
+from array import array
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+
+SLEUTELFIGUREN = ("sleutelfiguur_1", "sleutelfiguur_2", "sleutelfiguur_3")
+LABELS = ("betrouwbaarheid", "rechtmatigheid", "overtuigend")
+LABEL_VALUES = ("ja", "nee", "nvt")
+
+# code of a label that is absent from a response
+MISSING = 255
+
+
+class FigureRecord:
+    """
+    Read-only view on a single sleutelfiguur of a single response.
+    """
+    __slots__ = ("result_index", "figure", "rol", "zin", "crypto_relevant", "reden", "tags", "labels")
+
+    def __init__(self, result_index, figure, rol, zin, crypto_relevant, reden, tags, labels):
+        self.result_index = result_index
+        self.figure = figure
+        self.rol = rol
+        self.zin = zin
+        self.crypto_relevant = crypto_relevant
+        self.reden = reden
+        self.tags = tags
+        self.labels = labels
+
+
+class ResultRecords:
+    """
+    Column-oriented store of parsed responses, one entry per sleutelfiguur that took a position.
+
+    Every response is parsed exactly once. Figures, crypto relevance and label values
+    are kept as small ints in compact arrays, and roles and tags are interned, so the
+    Visualizer can build its DataFrames and counters in one linear pass.
+    """
+
+    def __init__(self):
+        self.result_index = array("I")
+        self.figure = array("B")
+        self.crypto_relevant = array("B")
+        self.label_codes = {label: array("B") for label in LABELS}
+        self.values = list(LABEL_VALUES)
+        self._value_codes = {value: code for code, value in enumerate(self.values)}
+        self.rol = []
+        self.zin = []
+        self.reden = []
+        self.tags = []
+        self.result_count = 0
+
+    def __len__(self):
+        return len(self.figure)
+
+    def _value_code(self, value) -> int:
+        if value is None:
+            return MISSING
+        value = value.lower()
+        code = self._value_codes.get(value)
+        if code is None:
+            # unexpected label values are kept, not dropped
+            code = len(self.values)
+            self.values.append(value)
+            self._value_codes[value] = code
+        return code
+
+    def add(self, data: dict):
+        """
+        Adds one parsed response.
+
+        Args:
+            data (dict): A response following `sleutelfiguren_schema`.
+        """
+        index = self.result_count
+        self.result_count += 1
+        for figure, figuur in enumerate(SLEUTELFIGUREN):
+            fig_data = data.get(figuur)
+            if not fig_data:
+                continue
+            labels = fig_data.get("labels") or {}
+            self.result_index.append(index)
+            self.figure.append(figure)
+            self.crypto_relevant.append(1 if fig_data.get("crypto_relevant", False) else 0)
+            for label in LABELS:
+                self.label_codes[label].append(self._value_code(labels.get(label)))
+            rol = fig_data.get("rol")
+            self.rol.append(sys.intern(rol) if isinstance(rol, str) else rol)
+            self.zin.append(fig_data.get("zin"))
+            self.reden.append(fig_data.get("reden"))
+            self.tags.append(tuple(sys.intern(tag) for tag in fig_data.get("tags") or () if isinstance(tag, str)))
+
+    @classmethod
+    def from_json_list(cls, json_list):
+        """
+        Parses a list of response strings, skipping invalid JSON.
+
+        Returns:
+            ResultRecords: The parsed records.
+        """
+        records = cls()
+        for json_str in json_list:
+            try:
+                data = json.loads(json_str) if isinstance(json_str, str) else json_str
+            except json.JSONDecodeError as e:
+                print(f"Invalid JSON string skipped: {e}")
+                # keep result numbering aligned with the input list
+                records.result_count += 1
+                continue
+            records.add(data)
+        return records
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield FigureRecord(
+                self.result_index[i],
+                SLEUTELFIGUREN[self.figure[i]],
+                self.rol[i],
+                self.zin[i],
+                bool(self.crypto_relevant[i]),
+                self.reden[i],
+                self.tags[i],
+                {label: self._decode(self.label_codes[label][i]) for label in LABELS}
+            )
+
+    def _decode(self, code):
+        return None if code == MISSING else self.values[code]
+
+    def _value_lookup(self) -> np.ndarray:
+        lookup = np.empty(256, dtype=object)
+        lookup[:len(self.values)] = self.values
+        return lookup
+
+    def label_frame(self, figure_names=SLEUTELFIGUREN) -> pd.DataFrame:
+        """
+        One row per (sleutelfiguur, label) with the label present, in response order.
+
+        Args:
+            figure_names (sequence): Display name per sleutelfiguur position.
+
+        Returns:
+            pd.DataFrame: Columns sleutelfiguur, label, value and crypto_relevant ('Ja'/'Nee').
+        """
+        n = len(self)
+        codes = np.column_stack([np.frombuffer(self.label_codes[label], dtype=np.uint8) for label in LABELS]) \
+            if n else np.empty((0, len(LABELS)), dtype=np.uint8)
+        present = (codes != MISSING).ravel()
+        rows = np.repeat(np.arange(n), len(LABELS))[present]
+
+        figure = np.frombuffer(self.figure, dtype=np.uint8)
+        crypto = np.frombuffer(self.crypto_relevant, dtype=np.uint8)
+        return pd.DataFrame({
+            'sleutelfiguur': np.array(figure_names, dtype=object)[figure[rows]] if n else [],
+            'label': np.tile(np.array(LABELS, dtype=object), n)[present],
+            'value': self._value_lookup()[codes.ravel()[present]],
+            'crypto_relevant': np.array(['Nee', 'Ja'], dtype=object)[crypto[rows]] if n else []
+        })
+
+    def full_frame(self) -> pd.DataFrame:
+        """
+        One row per sleutelfiguur with all fields; absent labels default to 'nvt'.
+
+        Returns:
+            pd.DataFrame: Columns json_index (1-based), sleutelfiguur, rol, zin,
+            crypto_relevant, reden, tags (comma separated) and the three labels.
+        """
+        lookup = self._value_lookup()
+        lookup[MISSING] = 'nvt'
+        figure = np.frombuffer(self.figure, dtype=np.uint8)
+        crypto = np.frombuffer(self.crypto_relevant, dtype=np.uint8)
+        frame = {
+            'json_index': np.frombuffer(self.result_index, dtype=np.uint32) + 1,
+            'sleutelfiguur': np.array(SLEUTELFIGUREN, dtype=object)[figure],
+            'rol': self.rol,
+            'zin': self.zin,
+            'crypto_relevant': np.array(['Nee', 'Ja'], dtype=object)[crypto],
+            'reden': self.reden,
+            'tags': [", ".join(tags) for tags in self.tags]
+        }
+        for label in LABELS:
+            frame[label] = lookup[np.frombuffer(self.label_codes[label], dtype=np.uint8)]
+        return pd.DataFrame(frame)
+
+    def tag_counter(self) -> Counter:
+        """
+        Returns:
+            Counter: Frequency of every tag over all sleutelfiguren.
+        """
+        counter = Counter()
+        for tags in self.tags:
+            counter.update(tags)
+        return counter
@@ -0,0 +1,164 @@
+import re
+import json
+from collections import Counter
+
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+_LIST_SEPARATORS = re.compile(r"[,;\n]")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_code_fence(content: str) -> str:
+    match = _CODE_FENCE.match(content)
+    return match.group(1) if match else content
+
+
+def close_truncated_json(content: str, max_attempts: int = 50, lossy: bool = False):
+    """
+    Parses JSON that was cut off, e.g. when the completion hit its token limit.
+
+    Open objects are closed. When that does not parse, the text is cut back to the
+    last complete member and closed again. Text cut off inside a string or array
+    would be repaired into a sentence that stops mid-way or a list missing its last
+    items, so it is only closed when `lossy` is set.
+
+    Args:
+        content (str): The (possibly truncated) JSON text.
+        max_attempts (int): Maximum number of cut points tried.
+        lossy (bool): Also repair text cut off inside a string or array.
+
+    Returns:
+        The parsed value, or None when no prefix could be repaired.
+    """
+    stack = []
+    cuts = []
+    in_string = escaped = False
+    for pos, char in enumerate(content):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            cuts.append((pos + 1, tuple(stack)))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == ",":
+            cuts.append((pos, tuple(stack)))
+
+    if not lossy and (in_string or "[" in stack):
+        return None
+
+    tail = content[:-1] if escaped else content
+    if in_string:
+        tail += '"'
+    candidates = [(tail, tuple(stack))] + [(content[:pos], opened) for pos, opened in reversed(cuts)]
+
+    for prefix, opened in candidates[:max_attempts]:
+        closers = "".join(_CLOSERS[char] for char in reversed(opened))
+        try:
+            return json.loads(prefix.rstrip().rstrip(",:") + closers)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+class ResponseRepairer:
+    """
+    Fixes common defects of responses locally, without calling the API again.
+
+    Repairs are truncated JSON and markdown code fences, enum values with the wrong
+    casing or surrounding whitespace (labels such as 'Ja'/'nvt', roles), a comma
+    separated string where a list is expected and 'true'/'false' strings where a
+    boolean is expected. A repair is only accepted when the result is valid.
+
+    A response cut off inside a string or array is not repaired but counted under
+    `rejected`, so the snippet is re-requested instead of stored incomplete.
+    """
+
+    def __init__(self, validator):
+        """
+        Initializes the ResponseRepairer.
+
+        Args:
+            validator (ResponseValidator): Validator of the repaired responses; its
+                schema also tells which values can be coerced.
+        """
+        self.validator = validator
+        self.schema = validator.schema['schema']
+        self.fixes = Counter()
+        self.repaired = 0
+        self.failed = 0
+        self.rejected = Counter()
+
+    def _coerce(self, value, schema, fixes):
+        types = schema.get("type", [])
+        types = [types] if isinstance(types, str) else types
+
+        if isinstance(value, str) and "enum" in schema and value not in schema["enum"]:
+            matches = [option for option in schema["enum"]
+                       if isinstance(option, str) and option.casefold() == value.strip().casefold()]
+            if len(matches) == 1:
+                fixes["enum_case"] += 1
+                return matches[0]
+
+        if isinstance(value, str) and "array" in types and "string" not in types:
+            fixes["string_to_list"] += 1
+            value = [part.strip() for part in _LIST_SEPARATORS.split(value) if part.strip()]
+
+        if isinstance(value, str) and "boolean" in types and value.strip().lower() in ("true", "false"):
+            fixes["string_to_boolean"] += 1
+            return value.strip().lower() == "true"
+
+        if isinstance(value, dict):
+            for name, subschema in schema.get("properties", {}).items():
+                if name in value:
+                    value[name] = self._coerce(value[name], subschema, fixes)
+        elif isinstance(value, list) and isinstance(schema.get("items"), dict):
+            value = [self._coerce(item, schema["items"], fixes) for item in value]
+        return value
+
+    def repair(self, response):
+        """
+        Tries to turn an invalid response into a valid one.
+
+        Args:
+            response (str or dict): The invalid response.
+
+        Returns:
+            str or None: The repaired response as JSON, or None when it cannot be repaired.
+        """
+        fixes = Counter()
+        data = response
+        if isinstance(response, str):
+            content = strip_code_fence(response)
+            if content != response:
+                fixes["code_fence"] += 1
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError:
+                data = close_truncated_json(content)
+                fixes["truncated_json"] += 1
+                if data is None and close_truncated_json(content, lossy=True) is not None:
+                    self.rejected["truncated_content"] += 1
+
+        if data is not None:
+            data = self._coerce(data, self.schema, fixes)
+            repaired = json.dumps(data, ensure_ascii=False)
+            if fixes and not self.validator.get_validation_errors(repaired):
+                self.fixes.update(fixes)
+                self.repaired += 1
+                return repaired
+
+        self.failed += 1
+        return None
+
+    def stats(self) -> dict:
+        return {"repaired": self.repaired, "failed": self.failed, "rejected": dict(self.rejected),
+                "fixes": dict(self.fixes)}
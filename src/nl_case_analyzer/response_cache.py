@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of API responses backed by SQLite.
+
+    Entries are keyed by a hash of everything that determines the response:
+    model, parameters, system prompt, JSON schema and the snippet text.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, max_age_seconds: float = None,
+                 evict_interval: int = 100):
+        """
+        Initializes the ResponseCache.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            max_entries (int): Maximum number of cached responses, least recently
+                used entries are evicted first. None disables the size limit.
+            max_age_seconds (float): Entries older than this are treated as stale
+                and evicted. None disables the age limit.
+            evict_interval (int): Number of writes between eviction sweeps.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model, parameters, system_prompt, json_schema, text) -> str:
+        """
+        Builds the content hash for a single request.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = json.dumps(
+            [model, parameters, system_prompt, json_schema, text],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Looks up a cached response.
+
+        Args:
+            key (str): Key created by `make_key`.
+
+        Returns:
+            str or None: The cached response, or None on a miss.
+        """
+        row = self.connection.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or (self.max_age_seconds is not None and now - row[1] > self.max_age_seconds):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.connection.commit()
+        return row[0]
+
+    def set(self, key: str, response: str):
+        """
+        Stores a response, periodically evicting entries that exceed the configured limits.
+        """
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, response, now, now)
+        )
+        self._writes += 1
+        if self._writes % self.evict_interval == 0:
+            self.evict()
+        self.connection.commit()
+
+    def evict(self) -> int:
+        """
+        Removes stale entries and, when the cache is too large, the least recently used ones.
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        removed = 0
+        if self.max_age_seconds is not None:
+            cursor = self.connection.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+            )
+            removed += cursor.rowcount
+        if self.max_entries is not None:
+            cursor = self.connection.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            removed += cursor.rowcount
+        self.connection.commit()
+        return removed
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters of this session.
+
+        Returns:
+            dict: hits, misses, hit_ratio and number of stored entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self)
+        }
+
+    def close(self):
+        self.connection.close()
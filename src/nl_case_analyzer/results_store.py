@@ -0,0 +1,335 @@
+import os
+import re
+import json
+import time
+import sqlite3
+from nl_case_analyzer.parquet_writer import flatten_response, LABELS
+from nl_case_analyzer.prefilter import SOURCE as PREFILTER_SOURCE
+
+
+# results files of test runs, left out of the aggregates, e.g. Results_test.json
+TEST_FILE = re.compile(r"(^|[_\-.])test([_\-.]|$)", re.IGNORECASE)
+
+# query dimensions and the column each one maps onto
+DIMENSIONS = {
+    "sleutelfiguur": "l.sleutelfiguur",
+    "label": "l.label",
+    "value": "l.value",
+    "crypto_relevant": "l.crypto_relevant",
+    "rol": "f.rol",
+    "model": "r.model",
+    "case_id": "r.case_id",
+}
+
+# dimensions that need the dataset rows joined in
+_ROW_DIMENSIONS = {"model", "case_id"}
+
+
+def is_test_file(path: str) -> bool:
+    return bool(TEST_FILE.search(os.path.splitext(os.path.basename(path))[0]))
+
+
+class ResultsStore:
+    """
+    Embedded analytical store of the results, linked to the dataset rows they came from.
+
+    Results are keyed by snippet id, so a snippet analyzed in several runs or results
+    files is stored once, the last ingested response wins. Dataset rows are keyed by
+    (dataset, source row) and carry the snippet id of their text, which joins every
+    result to its case id, model and other metadata. Label values are kept in a long
+    table indexed on (sleutelfiguur, label, value, crypto_relevant), so cross-tabs
+    and filters are index scans instead of parsing the results files.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the ResultsStore.
+
+        Args:
+            path (str): Location of the SQLite database file.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS rows (
+                dataset TEXT NOT NULL,
+                source_row INTEGER NOT NULL,
+                snippet_id TEXT NOT NULL,
+                case_id TEXT,
+                model TEXT,
+                metadata TEXT,
+                PRIMARY KEY (dataset, source_row)
+            );
+            CREATE TABLE IF NOT EXISTS datasets (
+                dataset TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS rows_snippet ON rows (snippet_id, model, case_id);
+            CREATE TABLE IF NOT EXISTS results (
+                snippet_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                response TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS figures (
+                snippet_id TEXT NOT NULL,
+                sleutelfiguur TEXT NOT NULL,
+                rol TEXT,
+                crypto_relevant INTEGER NOT NULL,
+                {", ".join(f"{label} TEXT" for label in LABELS)},
+                tags TEXT,
+                zin TEXT,
+                reden TEXT,
+                PRIMARY KEY (snippet_id, sleutelfiguur)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS figures_dims ON figures (sleutelfiguur, crypto_relevant);
+            CREATE TABLE IF NOT EXISTS labels (
+                snippet_id TEXT NOT NULL,
+                sleutelfiguur TEXT NOT NULL,
+                label TEXT NOT NULL,
+                value TEXT NOT NULL,
+                crypto_relevant INTEGER NOT NULL,
+                PRIMARY KEY (snippet_id, sleutelfiguur, label)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS labels_dims ON labels (sleutelfiguur, label, value, crypto_relevant, snippet_id);
+            CREATE INDEX IF NOT EXISTS labels_values ON labels (label, value, crypto_relevant, sleutelfiguur, snippet_id);
+            """
+        )
+        self.connection.commit()
+
+    def ingest_metadata(self, csv_path: str, column_name: str = "Answer", id_column: str = "ID",
+                        model_column: str = "Model", chunksize: int = 50_000, force: bool = False) -> int:
+        """
+        (Re)loads the rows of a dataset, replacing earlier rows of the same file. A
+        dataset whose size and modification time did not change is not read again.
+
+        Args:
+            csv_path (str): Location of the semicolon separated dataset.
+            column_name (str): Column holding the text snippets.
+            id_column (str): Column holding the case id.
+            model_column (str): Column holding the model name.
+            chunksize (int): Rows parsed at a time.
+            force (bool): Reload an unchanged dataset.
+
+        Returns:
+            int: Number of rows stored, 0 when the dataset was unchanged.
+        """
+        from nl_case_analyzer.data_loader import CSV_Loader
+
+        dataset = os.path.abspath(csv_path)
+        stat = os.stat(dataset)
+        known = self.connection.execute(
+            "SELECT mtime, size FROM datasets WHERE dataset = ?", (dataset,)
+        ).fetchone()
+        if known == (stat.st_mtime, stat.st_size) and not force:
+            print(f"Dataset {dataset} unchanged, rows not reloaded")
+            return 0
+
+        count = 0
+        with self.connection:
+            self.connection.execute("DELETE FROM rows WHERE dataset = ?", (dataset,))
+            for chunk in CSV_Loader(csv_path).iter_metadata(column_name, chunksize=chunksize):
+                extra = [column for column in chunk.columns
+                         if column not in ("snippet_id", "source_row", id_column, model_column)]
+                rows = []
+                # missing values are stored as NULL
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                for record in chunk.to_dict("records"):
+                    metadata = {column: record[column] for column in extra if record[column] is not None}
+                    rows.append((
+                        dataset,
+                        int(record["source_row"]),
+                        record["snippet_id"],
+                        record.get(id_column),
+                        record.get(model_column),
+                        json.dumps(metadata, ensure_ascii=False) if metadata else None
+                    ))
+                self.connection.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)", rows)
+                count += len(rows)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?)", (dataset, stat.st_mtime, stat.st_size)
+            )
+        print(f"Stored {count} dataset rows of {dataset}")
+        return count
+
+    def ingest_results(self, results_by_id: dict, source: str) -> int:
+        """
+        Stores responses keyed by snippet id, replacing earlier responses of those ids.
+
+        Args:
+            results_by_id (dict): Snippet id -> JSON response.
+            source (str): Where the responses come from, e.g. the journal path.
+
+        Returns:
+            int: Number of responses stored; responses that cannot be parsed are skipped.
+        """
+        now = time.time()
+        stored = 0
+        with self.connection:
+            for sid, response in results_by_id.items():
+                try:
+                    rows = flatten_response(response, sid)
+                except (json.JSONDecodeError, AttributeError) as e:
+                    print(f"Invalid response {sid} skipped: {e}")
+                    continue
+                for table in ("figures", "labels"):
+                    self.connection.execute(f"DELETE FROM {table} WHERE snippet_id = ?", (sid,))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (sid, source, response if isinstance(response, str) else json.dumps(response), now)
+                )
+                self.connection.executemany(
+                    f"INSERT INTO figures VALUES (?, ?, ?, ?, {', '.join('?' for _ in LABELS)}, ?, ?, ?)",
+                    ((sid, row["sleutelfiguur"], row["rol"], int(row["crypto_relevant"]),
+                      *(row[label] for label in LABELS), json.dumps(row["tags"], ensure_ascii=False),
+                      row["zin"], row["reden"]) for row in rows)
+                )
+                self.connection.executemany(
+                    "INSERT INTO labels VALUES (?, ?, ?, ?, ?)",
+                    ((sid, row["sleutelfiguur"], label, row[label], int(row["crypto_relevant"]))
+                     for row in rows for label in LABELS)
+                )
+                stored += 1
+        print(f"Stored {stored} results from {source}")
+        return stored
+
+    def _where(self, filters: dict, columns: dict) -> tuple:
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in columns:
+                raise ValueError(f"Unknown filter '{name}', expected one of {sorted(columns)}.")
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{columns[name]} IN ({', '.join('?' for _ in value)})")
+                params.extend(int(v) if isinstance(v, bool) else v for v in value)
+            else:
+                clauses.append(f"{columns[name]} = ?")
+                params.append(int(value) if isinstance(value, bool) else value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def counts(self, by, **filters) -> list:
+        """
+        Counts label values grouped by one or more dimensions.
+
+        Dimensions are the keys of DIMENSIONS. Counts over 'model' or 'case_id' are per
+        dataset row, so a snippet that occurs in several rows is counted for each row;
+        other counts are per result.
+
+        Args:
+            by (list): Dimensions to group by, e.g. ['sleutelfiguur', 'value'].
+            **filters: Dimension -> value (or list of values) the rows must match.
+
+        Returns:
+            list: Tuples of the dimension values followed by the count.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = [name for name in by if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}, expected some of {sorted(DIMENSIONS)}.")
+
+        used = set(by) | {name for name, value in filters.items() if value is not None}
+        joins = ""
+        if "rol" in used:
+            joins += " JOIN figures f ON f.snippet_id = l.snippet_id AND f.sleutelfiguur = l.sleutelfiguur"
+        if used & _ROW_DIMENSIONS:
+            joins += " JOIN rows r ON r.snippet_id = l.snippet_id"
+        where, params = self._where(filters, DIMENSIONS)
+        columns = ", ".join(DIMENSIONS[name] for name in by)
+        query = f"SELECT {columns}, COUNT(*) FROM labels l{joins}{where} GROUP BY {columns} ORDER BY {columns}"
+        return self.connection.execute(query, params).fetchall()
+
+    def crosstab(self, index: str, columns: str, **filters):
+        """
+        Cross-tabulates two dimensions, e.g. sleutelfiguur against value for one label:
+
+            store.crosstab("sleutelfiguur", "value", label="rechtmatigheid", crypto_relevant=True)
+
+        Returns:
+            pd.DataFrame: Counts with `index` values as rows and `columns` values as columns.
+        """
+        import pandas as pd
+
+        rows = self.counts([index, columns], **filters)
+        frame = pd.DataFrame(rows, columns=[index, columns, "count"])
+        return frame.pivot_table(index=index, columns=columns, values="count", fill_value=0, aggfunc="sum")
+
+    def filter(self, limit: int = None, **filters):
+        """
+        Selects the key figure results matching the filters, joined to their dataset rows.
+
+        Filters are 'sleutelfiguur', 'rol', 'crypto_relevant', 'model', 'case_id' and
+        the label names, e.g. `store.filter(sleutelfiguur="sleutelfiguur_3", rechtmatigheid="nee")`.
+
+        Args:
+            limit (int): Maximum number of rows returned.
+
+        Returns:
+            pd.DataFrame: One row per key figure and dataset row.
+        """
+        import pandas as pd
+
+        columns = {
+            "sleutelfiguur": "f.sleutelfiguur",
+            "rol": "f.rol",
+            "crypto_relevant": "f.crypto_relevant",
+            "model": "r.model",
+            "case_id": "r.case_id",
+            **{label: f"f.{label}" for label in LABELS},
+        }
+        where, params = self._where(filters, columns)
+        query = (
+            "SELECT f.snippet_id, r.source_row, r.case_id, r.model, f.sleutelfiguur, f.rol, f.crypto_relevant, "
+            f"{', '.join(f'f.{label}' for label in LABELS)}, f.tags, f.zin, f.reden "
+            f"FROM figures f LEFT JOIN rows r ON r.snippet_id = f.snippet_id{where} "
+            "ORDER BY f.snippet_id, f.sleutelfiguur, r.source_row"
+        )
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        frame = pd.read_sql_query(query, self.connection, params=params)
+        frame["crypto_relevant"] = frame["crypto_relevant"].astype(bool)
+        frame["tags"] = frame["tags"].map(lambda tags: json.loads(tags) if tags else [])
+        return frame
+
+    def query(self, sql: str, params=()):
+        """
+        Runs an ad-hoc SQL query over the rows, results, figures and labels tables.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        import pandas as pd
+
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def stats(self) -> dict:
+        counts = {
+            table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("rows", "results", "figures", "labels")
+        }
+        counts["unmatched_results"] = self.connection.execute(
+            "SELECT COUNT(*) FROM results WHERE snippet_id NOT IN (SELECT snippet_id FROM rows)"
+        ).fetchone()[0]
+        # null results of the pre-filter, not answered by the model
+        counts["prefiltered_results"] = self.connection.execute(
+            "SELECT COUNT(*) FROM results WHERE source = ?", (PREFILTER_SOURCE,)
+        ).fetchone()[0]
+        return counts
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,437 @@
+import os
+import re
+import json
+import sqlite3
+import unicodedata
+from difflib import SequenceMatcher
+
+
+_NON_WORD = re.compile(r"[^\w\s-]")
+_WHITESPACE = re.compile(r"[\s-]+")
+_VOWELS = set("aeiouyè")
+_DOUBLE_VOWEL_END = re.compile(r"([aeou])\1([^aeiouy])$")
+
+# Dutch function words that do not change the meaning of a tag
+STOPWORDS = {
+    "de", "het", "een", "van", "en", "in", "op", "te", "voor", "met", "door", "aan", "bij",
+    "als", "dat", "die", "dit", "is", "zijn", "wordt", "worden", "er", "om", "tot", "naar",
+    "uit", "over", "of", "ook", "zeer", "erg",
+}
+
+NEGATION = "niet"
+NEGATION_PREFIX = "on"
+
+# version of the tag keys, stored in the index so a stale index can be recognized
+KEY_VERSION = 2
+
+
+def polarity(key: str) -> tuple:
+    """
+    Returns:
+        tuple: Number of 'niet' tokens and of 'on'-prefixed tokens of a tag key. Keys
+        with a different polarity are never merged, whatever their similarity, so
+        'bewijs niet uitgesloten' stays apart from 'bewijs uitgesloten'.
+    """
+    tokens = key.split(" ")
+    return (
+        tokens.count(NEGATION),
+        sum(1 for token in tokens if token.startswith(NEGATION_PREFIX) and token != NEGATION)
+    )
+
+
+def normalize_tag(tag: str) -> str:
+    """
+    Normalizes the surface form of a tag: unicode NFKC, casefolding, punctuation
+    removed and whitespace and hyphens collapsed to single spaces.
+    """
+    tag = unicodedata.normalize("NFKC", tag).casefold()
+    tag = _NON_WORD.sub(" ", tag)
+    return _WHITESPACE.sub(" ", tag).strip()
+
+
+def _undouble(word: str) -> str:
+    if len(word) > 2 and word[-1] in "kdt" and word[-1] == word[-2]:
+        return word[:-1]
+    return word
+
+
+def light_dutch_stem(word: str) -> str:
+    """
+    Small suffix stripper used when nltk's Snowball stemmer is not installed.
+
+    Removes the inflection suffixes -heden, -en, -s and -e, following the first steps
+    of the Snowball Dutch algorithm, and writes a doubled vowel before the final
+    consonant once, so plural and adjective forms share a stem ('gegevens'/'gegeven',
+    'onbetrouwbare'/'onbetrouwbaar').
+    """
+    return _DOUBLE_VOWEL_END.sub(r"\1\2", _strip_suffix(word))
+
+
+def _strip_suffix(word: str) -> str:
+    if len(word) <= 3:
+        return word
+    if word.endswith("heden") and len(word) > 5:
+        return word[:-5] + "heid"
+    for suffix in ("ene", "en"):
+        stem = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem) >= 3 and stem[-1] not in _VOWELS and not stem.endswith("gem"):
+            return _undouble(stem)
+    for suffix in ("se", "s"):
+        stem = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem) >= 3 and stem[-1] not in _VOWELS | {"j"}:
+            return stem
+    if word.endswith("e") and len(word) > 4 and word[-2] not in _VOWELS:
+        return _undouble(word[:-1])
+    return word
+
+
+def load_stemmer():
+    """
+    Returns:
+        callable: nltk's Snowball Dutch stemmer when nltk is installed, otherwise
+        `light_dutch_stem`.
+    """
+    try:
+        from nltk.stem.snowball import DutchStemmer
+    except ImportError:
+        return light_dutch_stem
+    return DutchStemmer().stem
+
+
+class TagNormalizer:
+    """
+    Maps free-text tags onto a canonical key.
+
+    Tags are normalized, stop words dropped and 'niet <word>' rewritten to 'on<word>',
+    so 'manipulatie niet aannemelijk' and 'manipulatie onaannemelijk' coincide. Before
+    a word that already starts with 'on' the negation is kept as a token of its own,
+    so 'niet ontvankelijk' and 'niet onrechtmatig' keep their meaning. The remaining
+    words are stemmed and sorted, which also ignores the word order.
+    """
+
+    def __init__(self, stemmer=None):
+        """
+        Initializes the TagNormalizer.
+
+        Args:
+            stemmer (callable): Word stemmer, `load_stemmer()` when None.
+        """
+        self.stem = stemmer or load_stemmer()
+        self.stemmer_name = "light" if self.stem is light_dutch_stem else getattr(
+            self.stem, "__qualname__", type(self.stem).__name__
+        )
+        self._keys = {}
+
+    def tokens(self, alias: str) -> list:
+        """
+        Returns:
+            list: Sorted, unique stems of a normalized tag.
+        """
+        words = alias.split(" ")
+        stems = set()
+        negate = False
+        for word in words:
+            if word == NEGATION:
+                negate = True
+                continue
+            if word in STOPWORDS or not word:
+                continue
+            if negate:
+                if word.startswith(NEGATION_PREFIX):
+                    # 'niet onrechtmatig' is not 'onrechtmatig', keep the negation
+                    stems.add(NEGATION)
+                else:
+                    word = NEGATION_PREFIX + word
+            negate = False
+            stems.add(self.stem(word))
+        if negate:
+            stems.add(NEGATION)
+        return sorted(stems)
+
+    def key(self, alias: str) -> str:
+        key = self._keys.get(alias)
+        if key is None:
+            key = self._keys[alias] = " ".join(self.tokens(alias))
+        return key
+
+
+class TagIndex:
+    """
+    Persistent inverted index from canonical tag to (result id, sleutelfiguur).
+
+    Tags are clustered on ingestion: every normalized surface form (alias) is mapped
+    to a canonical tag whose key, the sorted stems, is identical or at least
+    `threshold` similar. Aliases are remembered, so a known surface form is resolved
+    with one lookup. Tag frequencies and the results citing a tag are then index
+    queries instead of parsing every response.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.88, normalizer: TagNormalizer = None):
+        """
+        Initializes the TagIndex.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            threshold (float): Minimum similarity of the keys of one canonical tag,
+                values of 1 or more only merge identical keys.
+            normalizer (TagNormalizer): Tag normalizer, a default one when None.
+        """
+        self.path = path
+        self.threshold = threshold
+        self.normalizer = normalizer or TagNormalizer()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tags (
+                tag_id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                label TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tag_aliases (
+                alias TEXT PRIMARY KEY,
+                tag_id INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tag_tokens (
+                token TEXT NOT NULL,
+                tag_id INTEGER NOT NULL,
+                PRIMARY KEY (token, tag_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                tag_id INTEGER NOT NULL,
+                result_id TEXT NOT NULL,
+                sleutelfiguur TEXT NOT NULL,
+                alias TEXT NOT NULL,
+                PRIMARY KEY (tag_id, result_id, sleutelfiguur)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_result ON postings (result_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        # an index holding tags but no key version was built before the negation fix
+        built = self.connection.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        self.connection.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('stemmer', ?)", (self.normalizer.stemmer_name,)
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('key_version', ?)", ("1" if built else str(KEY_VERSION),)
+        )
+        self.connection.commit()
+        meta = dict(self.connection.execute("SELECT name, value FROM meta"))
+        if meta["stemmer"] != self.normalizer.stemmer_name:
+            print(f"Tag index {path} was built with the '{meta['stemmer']}' stemmer, now "
+                  f"'{self.normalizer.stemmer_name}' is used; rebuild the index to keep the clusters consistent.")
+        if meta["key_version"] != str(KEY_VERSION):
+            print(f"Tag index {path} was built with tag keys of version {meta['key_version']}, now "
+                  f"{KEY_VERSION}; rebuild the index so negated tags are not merged with their opposites.")
+
+        self._aliases = dict(self.connection.execute("SELECT alias, tag_id FROM tag_aliases"))
+        self._tags = {}
+        self._keys = {}
+        self._token_tags = {}
+        for tag_id, key in self.connection.execute("SELECT tag_id, key FROM tags"):
+            self._remember(tag_id, key)
+
+    def _remember(self, tag_id: int, key: str):
+        self._tags[key] = tag_id
+        self._keys[tag_id] = key
+        for block in self._blocks(key):
+            self._token_tags.setdefault(block, set()).add(tag_id)
+
+    @staticmethod
+    def _blocks(key: str) -> set:
+        # stems and stem prefixes, so misspelt stems still meet their cluster
+        tokens = key.split(" ")
+        return set(tokens) | {"#" + token[:4] for token in tokens if len(token) > 4}
+
+    def _closest(self, key: str):
+        """
+        Returns:
+            int or None: The canonical tag whose key is the most similar to `key`, when
+            the similarity reaches the threshold. Only tags sharing a stem and with
+            the same polarity (see `polarity`) are compared.
+        """
+        if key in self._tags:
+            return self._tags[key]
+        if self.threshold >= 1:
+            return None
+        candidates = set()
+        for block in self._blocks(key):
+            candidates |= self._token_tags.get(block, set())
+        if not candidates:
+            return None
+
+        best, best_ratio = None, self.threshold
+        key_polarity = polarity(key)
+        # the candidate varies, the key is seq2 so its index is built once
+        matcher = SequenceMatcher(None, "", key)
+        for tag_id in sorted(candidates):
+            if polarity(self._keys[tag_id]) != key_polarity:
+                continue
+            matcher.set_seq1(self._keys[tag_id])
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = tag_id, ratio
+        return best
+
+    def resolve(self, tag: str, create: bool = True):
+        """
+        Maps a raw tag onto its canonical tag id.
+
+        Args:
+            tag (str): The tag as returned by the model.
+            create (bool): Start a new canonical tag when no existing one matches.
+
+        Returns:
+            tuple: (canonical tag id or None, normalized alias)
+        """
+        alias = normalize_tag(tag)
+        if alias in self._aliases:
+            return self._aliases[alias], alias
+        key = self.normalizer.key(alias)
+        if not key:
+            return None, alias
+
+        tag_id = self._closest(key)
+        if tag_id is None:
+            if not create:
+                return None, alias
+            tag_id = self.connection.execute(
+                "INSERT INTO tags (key, label) VALUES (?, ?)", (key, alias)
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO tag_tokens VALUES (?, ?)", ((token, tag_id) for token in key.split(" "))
+            )
+            self._remember(tag_id, key)
+        if create:
+            self.connection.execute("INSERT OR REPLACE INTO tag_aliases VALUES (?, ?)", (alias, tag_id))
+            self._aliases[alias] = tag_id
+        return tag_id, alias
+
+    def ingest(self, results_by_id: dict) -> int:
+        """
+        Indexes the tags of validated responses, replacing earlier postings of the
+        same result ids, so results can be re-ingested after a re-run.
+
+        Args:
+            results_by_id (dict): Result (snippet) id -> JSON response.
+
+        Returns:
+            int: Number of postings written.
+        """
+        from nl_case_analyzer.records import SLEUTELFIGUREN
+
+        postings = 0
+        with self.connection:
+            for result_id, response in results_by_id.items():
+                self.connection.execute("DELETE FROM postings WHERE result_id = ?", (result_id,))
+                data = json.loads(response) if isinstance(response, str) else response
+                rows = []
+                for figure in SLEUTELFIGUREN:
+                    fig_data = (data or {}).get(figure)
+                    for tag in (fig_data or {}).get("tags") or []:
+                        if not isinstance(tag, str):
+                            continue
+                        tag_id, alias = self.resolve(tag)
+                        if tag_id is not None:
+                            rows.append((tag_id, result_id, figure, alias))
+                self.connection.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?)", rows)
+                postings += len(rows)
+
+            # the label of a canonical tag is its most frequent surface form
+            self.connection.execute(
+                """
+                UPDATE tags SET label = (
+                    SELECT alias FROM postings WHERE postings.tag_id = tags.tag_id
+                    GROUP BY alias ORDER BY COUNT(*) DESC, alias LIMIT 1
+                )
+                WHERE tag_id IN (SELECT DISTINCT tag_id FROM postings)
+                """
+            )
+        return postings
+
+    def frequencies(self, sleutelfiguur: str = None, limit: int = None) -> list:
+        """
+        Returns:
+            list: (canonical label, count) tuples, most frequent first, optionally for
+            a single sleutelfiguur.
+        """
+        where = "WHERE p.sleutelfiguur = ?" if sleutelfiguur else ""
+        query = (
+            f"SELECT t.label, COUNT(*) FROM postings p JOIN tags t ON t.tag_id = p.tag_id {where} "
+            "GROUP BY p.tag_id ORDER BY COUNT(*) DESC, t.label"
+        )
+        params = (sleutelfiguur,) if sleutelfiguur else ()
+        if limit:
+            query += " LIMIT ?"
+            params += (limit,)
+        return self.connection.execute(query, params).fetchall()
+
+    def lookup(self, tag: str, sleutelfiguur: str = None) -> list:
+        """
+        Finds the results citing a tag, or any tag of its canonical cluster.
+
+        Returns:
+            list: (result id, sleutelfiguur) tuples.
+        """
+        tag_id, _ = self.resolve(tag, create=False)
+        if tag_id is None:
+            return []
+        return self._postings([tag_id], sleutelfiguur)
+
+    def search(self, word: str, sleutelfiguur: str = None) -> list:
+        """
+        Finds the results citing any canonical tag that contains a word, e.g. 'EVRM'.
+
+        Returns:
+            list: (result id, sleutelfiguur) tuples.
+        """
+        tokens = self.normalizer.tokens(normalize_tag(word))
+        if not tokens:
+            return []
+        tag_ids = None
+        for token in tokens:
+            ids = {row[0] for row in self.connection.execute("SELECT tag_id FROM tag_tokens WHERE token = ?", (token,))}
+            tag_ids = ids if tag_ids is None else tag_ids & ids
+        return self._postings(sorted(tag_ids), sleutelfiguur)
+
+    def _postings(self, tag_ids, sleutelfiguur=None) -> list:
+        if not tag_ids:
+            return []
+        placeholders = ", ".join("?" for _ in tag_ids)
+        query = f"SELECT DISTINCT result_id, sleutelfiguur FROM postings WHERE tag_id IN ({placeholders})"
+        params = list(tag_ids)
+        if sleutelfiguur:
+            query += " AND sleutelfiguur = ?"
+            params.append(sleutelfiguur)
+        return self.connection.execute(query + " ORDER BY result_id, sleutelfiguur", params).fetchall()
+
+    def stats(self) -> dict:
+        aliases, tags, postings = (
+            self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("tag_aliases", "tags", "postings")
+        )
+        return {
+            "aliases": aliases,
+            "canonical_tags": tags,
+            "postings": postings,
+            "merge_ratio": round(1 - tags / aliases, 4) if aliases else 0.0
+        }
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
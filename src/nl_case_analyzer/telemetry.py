@@ -0,0 +1,277 @@
+import os
+import math
+import json
+import time
+from collections import Counter, deque
+
+
+def cached_tokens_of(usage) -> int:
+    """
+    Returns:
+        int: `usage.prompt_tokens_details.cached_tokens`, 0 when not reported.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+
+
+# USD per 1M tokens (input, cached input, output); override through the "prices" config entry
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _percentile(sorted_values, q: float) -> float:
+    # nearest-rank percentile of an already sorted sequence
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class CallTelemetry:
+    """
+    Per-call metrics of API requests: latency, time to first byte, tokens, retries
+    and estimated cost, including the provider-side prompt cache hits and what
+    they saved at the cached input price of `MODEL_PRICES`.
+
+    Totals cover the whole run; percentiles and throughput are computed over a
+    rolling window of the most recent calls. Every call can be streamed to a JSONL
+    file, and a snapshot can be written in the Prometheus text format, so runs can
+    be compared with each other.
+    """
+
+    def __init__(self, window: int = 1000, prices: dict = None, jsonl_path: str = None, run_id: str = None):
+        """
+        Initializes the CallTelemetry.
+
+        Args:
+            window (int): Number of recent calls used for percentiles and throughput.
+            prices (dict): Model -> (input, cached input, output) USD per 1M tokens,
+                merged over `MODEL_PRICES`.
+            jsonl_path (str): Optional file every call is appended to as a JSON line.
+            run_id (str): Label of this run in the JSONL records, defaults to the start time.
+        """
+        self.prices = {**MODEL_PRICES, **(prices or {})}
+        self.recent = deque(maxlen=window)
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self.calls = Counter()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.calls_with_cache_hit = 0
+        self.retries = 0
+        self.cost = 0.0
+        self.cache_savings = 0.0
+        self.latency_sum = 0.0
+        self.ttfb_sum = 0.0
+
+        self._jsonl = None
+        if jsonl_path:
+            directory = os.path.dirname(jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._jsonl = open(jsonl_path, "a", encoding="utf-8")
+
+    def estimate_cost(self, model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+        """
+        Returns:
+            float: Estimated USD cost of a call, 0 for models without a known price.
+        """
+        # dated snapshots such as gpt-4o-2024-08-06 are priced like their base model
+        price = self.prices.get(model) or next(
+            (self.prices[name] for name in sorted(self.prices, key=len, reverse=True) if model.startswith(name)),
+            None
+        )
+        if price is None:
+            return 0.0
+        input_price, cached_price, output_price = price
+        return ((prompt_tokens - cached_tokens) * input_price
+                + cached_tokens * cached_price
+                + completion_tokens * output_price) / 1_000_000
+
+    def record_call(self, model: str, latency: float, ttfb: float = None, usage=None,
+                    retries: int = 0, wall_time: float = None, status: str = "ok"):
+        """
+        Records one API call.
+
+        Args:
+            model (str): The requested model.
+            latency (float): Seconds from sending the final attempt to the full response.
+            ttfb (float): Seconds from sending the final attempt to the response headers.
+            usage (CompletionUsage): The `usage` field of the response, None when dropped.
+            retries (int): Number of retried attempts before the final one.
+            wall_time (float): Seconds spent on the call including retries and waits.
+            status (str): 'ok' or 'dropped'.
+        """
+        prompt_tokens = (getattr(usage, "prompt_tokens", None) or 0) if usage is not None else 0
+        completion_tokens = (getattr(usage, "completion_tokens", None) or 0) if usage is not None else 0
+        cached_tokens = cached_tokens_of(usage) if usage is not None else 0
+        cost = self.estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens)
+        if cached_tokens:
+            self.calls_with_cache_hit += 1
+            self.cache_savings += self.estimate_cost(model, prompt_tokens, 0, completion_tokens) - cost
+
+        self.calls[status] += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        self.completion_tokens += completion_tokens
+        self.retries += retries
+        self.cost += cost
+        self.latency_sum += latency
+        self.ttfb_sum += ttfb or 0.0
+
+        finished = time.time()
+        record = {
+            "run_id": self.run_id,
+            "timestamp": round(finished, 3),
+            "model": model,
+            "status": status,
+            "latency": round(latency, 4),
+            "ttfb": round(ttfb, 4) if ttfb is not None else None,
+            "wall_time": round(wall_time if wall_time is not None else latency, 4),
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": completion_tokens,
+            "retries": retries,
+            "cost_usd": round(cost, 6)
+        }
+        self.recent.append((finished - latency, finished, latency, ttfb, prompt_tokens + completion_tokens,
+                            completion_tokens))
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record) + "\n")
+            self._jsonl.flush()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def latency_percentiles(self) -> dict:
+        latencies = sorted(entry[2] for entry in self.recent)
+        return {q: _percentile(latencies, q) for q in QUANTILES}
+
+    def ttfb_percentiles(self) -> dict:
+        ttfbs = sorted(entry[3] for entry in self.recent if entry[3] is not None)
+        return {q: _percentile(ttfbs, q) for q in QUANTILES}
+
+    def tokens_per_second(self) -> tuple:
+        """
+        Returns:
+            tuple: (total tokens/sec, completion tokens/sec) over the rolling window.
+        """
+        if not self.recent:
+            return 0.0, 0.0
+        span = max(entry[1] for entry in self.recent) - min(entry[0] for entry in self.recent)
+        if span <= 0:
+            return 0.0, 0.0
+        return (sum(entry[4] for entry in self.recent) / span,
+                sum(entry[5] for entry in self.recent) / span)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Run totals with windowed latency percentiles and throughput.
+        """
+        tokens_per_second, completion_tokens_per_second = self.tokens_per_second()
+        latency = self.latency_percentiles()
+        ttfb = self.ttfb_percentiles()
+        return {
+            "calls": dict(self.calls),
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "calls_with_cache_hit": self.calls_with_cache_hit,
+            "cache_hit_ratio": round(self.cache_hit_ratio, 4),
+            "cost_usd": round(self.cost, 4),
+            "cache_savings_usd": round(self.cache_savings, 4),
+            **{f"latency_p{int(q * 100)}": round(value, 4) for q, value in latency.items()},
+            **{f"ttfb_p{int(q * 100)}": round(value, 4) for q, value in ttfb.items()},
+            "tokens_per_second": round(tokens_per_second, 1),
+            "completion_tokens_per_second": round(completion_tokens_per_second, 1)
+        }
+
+    def summary(self) -> str:
+        snapshot = self.snapshot()
+        return (
+            f"API calls: {self.total_calls} ({self.retries} retries), latency p50/p95/p99 "
+            f"{snapshot['latency_p50']:.2f}/{snapshot['latency_p95']:.2f}/{snapshot['latency_p99']:.2f}s, "
+            f"{snapshot['tokens_per_second']:.0f} tokens/s, ~${snapshot['cost_usd']:.4f}; "
+            f"prompt cache: {self.cached_tokens}/{self.prompt_tokens} prompt tokens cached "
+            f"({self.cache_hit_ratio:.1%}) in {self.calls_with_cache_hit} calls, ~${self.cache_savings:.4f} saved"
+        )
+
+    def prometheus_text(self, prefix: str = "nl_case_analyzer_api") -> str:
+        """
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+        """
+        tokens_per_second, completion_tokens_per_second = self.tokens_per_second()
+        lines = [
+            f"# HELP {prefix}_calls_total API calls by final status.",
+            f"# TYPE {prefix}_calls_total counter",
+            *[f'{prefix}_calls_total{{status="{status}"}} {count}' for status, count in sorted(self.calls.items())],
+            f"# HELP {prefix}_retries_total Retried attempts.",
+            f"# TYPE {prefix}_retries_total counter",
+            f"{prefix}_retries_total {self.retries}",
+            f"# HELP {prefix}_tokens_total Tokens by kind.",
+            f"# TYPE {prefix}_tokens_total counter",
+            f'{prefix}_tokens_total{{kind="prompt"}} {self.prompt_tokens}',
+            f'{prefix}_tokens_total{{kind="cached"}} {self.cached_tokens}',
+            f'{prefix}_tokens_total{{kind="completion"}} {self.completion_tokens}',
+            f"# HELP {prefix}_cost_usd_total Estimated cost in USD.",
+            f"# TYPE {prefix}_cost_usd_total counter",
+            f"{prefix}_cost_usd_total {self.cost:.6f}",
+            f"# HELP {prefix}_cache_savings_usd_total Estimated USD saved by cached prompt tokens.",
+            f"# TYPE {prefix}_cache_savings_usd_total counter",
+            f"{prefix}_cache_savings_usd_total {self.cache_savings:.6f}",
+        ]
+        for name, percentiles, total, help_text in (
+            ("latency_seconds", self.latency_percentiles(), self.latency_sum, "Latency of the final attempt."),
+            ("ttfb_seconds", self.ttfb_percentiles(), self.ttfb_sum, "Time to first byte of the final attempt.")
+        ):
+            lines += [
+                f"# HELP {prefix}_{name} {help_text} Quantiles over the recent calls.",
+                f"# TYPE {prefix}_{name} summary",
+                *[f'{prefix}_{name}{{quantile="{q}"}} {value:.6f}' for q, value in percentiles.items()],
+                f"{prefix}_{name}_sum {total:.6f}",
+                f"{prefix}_{name}_count {self.total_calls}",
+            ]
+        lines += [
+            f"# HELP {prefix}_tokens_per_second Tokens per second over the recent calls.",
+            f"# TYPE {prefix}_tokens_per_second gauge",
+            f'{prefix}_tokens_per_second{{kind="total"}} {tokens_per_second:.3f}',
+            f'{prefix}_tokens_per_second{{kind="completion"}} {completion_tokens_per_second:.3f}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str) -> str:
+        """
+        Writes the metrics in the Prometheus text format, replacing the file atomically
+        so a textfile collector never reads a partial file.
+
+        Returns:
+            str: The path of the written file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+        return path
+
+    def close(self):
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
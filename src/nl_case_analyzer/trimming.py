@@ -0,0 +1,288 @@
+import os
+import re
+import json
+import random
+import asyncio
+
+from nl_case_analyzer.prefilter import TermMatcher, CRYPTO_TERMS, KEY_FIGURE_TERMS
+
+
+# Terms of positions on evidence, next to the crypto and key figure terms of the pre-filter
+EVIDENCE_TERMS = (
+    "bewijs*", "betrouwba*", "onbetrouwba*", "rechtmatig*", "onrechtmatig*", "overtuig*",
+    "verweer", "verwer*", "uitsluiting", "uitgesloten", "integriteit", "authenticiteit",
+    "onderzoeksgegevens", "dataset*", "berichten", "vertrouwensbeginsel", "interstatelijk*",
+)
+
+# Abbreviations whose period does not end a sentence
+ABBREVIATIONS = {
+    "mr", "dr", "prof", "ing", "jo", "art", "artt", "nr", "nrs", "o.a", "bijv", "bv", "i.c",
+    "e.d", "e.a", "m.b.t", "t.a.v", "t.o.v", "i.v.m", "z.g", "p", "pag", "blz", "vgl", "resp",
+    "ca", "jl", "sr", "sv", "wvsr", "wvsv", "evrm", "ecli", "hr", "rb", "gh", "cf", "etc",
+}
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9À-Ý])")
+_LAST_WORD = re.compile(r"([\w.]+)[.!?]+[\"')\]]*\s+$")
+
+# Number of characters per token of the rough estimate used throughout the package
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def split_sentences(text: str) -> list:
+    """
+    Splits a Dutch court summary into sentences.
+
+    A sentence ends at '.', '!' or '?' followed by whitespace and a capital or digit,
+    unless the period belongs to an abbreviation such as 'mr.', 'art.' or 'o.a.', or
+    to an initial.
+    Sentences are returned verbatim, so quotes taken from them still match the input.
+
+    Args:
+        text (str): The text snippet.
+
+    Returns:
+        list: The sentences, without surrounding whitespace.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        word = _LAST_WORD.search(text, start, match.end())
+        if word and (word.group(1).lower().rstrip(".") in ABBREVIATIONS or len(word.group(1)) == 1):
+            # abbreviation or initial
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+class InputTrimmer:
+    """
+    Reduces a snippet to the sentences that can hold a key figure's position on the
+    crypto-data evidence, before it is sent to the model.
+
+    Every sentence is scored by the number of distinct key figure, crypto and evidence
+    terms it mentions. Sentences reaching `min_score` are kept together with `context`
+    neighbouring sentences on each side, in their original order. Snippets where no
+    sentence reaches the score, or that are too short to gain from trimming, are sent
+    unchanged.
+    """
+
+    def __init__(self, schema: dict, context: int = 1, min_score: int = 1, min_tokens: int = 200,
+                 report_path: str = None):
+        """
+        Initializes the InputTrimmer.
+
+        Args:
+            schema (dict): The response format; its 'rol' enums are added to the key figure terms.
+            context (int): Neighbouring sentences kept on each side of a relevant sentence.
+            min_score (int): Distinct terms a sentence needs to be relevant.
+            min_tokens (int): Snippets with fewer estimated tokens are not trimmed.
+            report_path (str): Optional JSONL file receiving the tokens saved per snippet.
+        """
+        properties = schema["schema"]["properties"]
+        roles = [
+            role
+            for figure in properties.values()
+            for role in figure.get("properties", {}).get("rol", {}).get("enum", [])
+        ]
+        terms = {(term, "crypto") for term in CRYPTO_TERMS}
+        terms |= {(term, "evidence") for term in EVIDENCE_TERMS}
+        terms |= {(term if term.isupper() else term.lower(), "key_figure")
+                  for term in list(KEY_FIGURE_TERMS) + roles}
+        self.matcher = TermMatcher(sorted(terms))
+        self.context = context
+        self.min_score = min_score
+        self.min_tokens = min_tokens
+
+        self.snippets = 0
+        self.trimmed = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+        self._report = None
+        if report_path:
+            directory = os.path.dirname(report_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._report = open(report_path, "a", encoding="utf-8")
+
+    def score(self, sentence: str) -> int:
+        return len({term for term, _, _ in self.matcher.find(sentence)})
+
+    def trim(self, text: str) -> str:
+        """
+        Returns:
+            str: The relevant sentences of the text, or the text itself when it is not trimmed.
+        """
+        if estimate_tokens(text) < self.min_tokens:
+            return text
+        sentences = split_sentences(text)
+        relevant = [idx for idx, sentence in enumerate(sentences) if self.score(sentence) >= self.min_score]
+        if not relevant:
+            return text
+
+        keep = set()
+        for idx in relevant:
+            keep.update(range(max(0, idx - self.context), min(len(sentences), idx + self.context + 1)))
+        if len(keep) == len(sentences):
+            return text
+        return " ".join(sentences[idx] for idx in sorted(keep))
+
+    def filter(self, items):
+        """
+        Streams (snippet id, text) pairs and yields them with the trimmed text.
+
+        Yields:
+            tuple: (snippet id, trimmed text)
+        """
+        for sid, text in items:
+            trimmed = self.trim(text)
+            tokens_in, tokens_out = estimate_tokens(text), estimate_tokens(trimmed)
+            self.snippets += 1
+            self.trimmed += trimmed is not text
+            self.tokens_in += tokens_in
+            self.tokens_out += tokens_out
+            if self._report is not None:
+                self._report.write(json.dumps({
+                    "snippet_id": sid,
+                    "tokens_in": tokens_in,
+                    "tokens_out": tokens_out,
+                    "tokens_saved": tokens_in - tokens_out
+                }) + "\n")
+            yield sid, trimmed
+
+    def stats(self) -> dict:
+        saved = self.tokens_in - self.tokens_out
+        return {
+            "snippets": self.snippets,
+            "trimmed": self.trimmed,
+            "input_tokens": self.tokens_in,
+            "input_tokens_sent": self.tokens_out,
+            "input_tokens_saved": saved,
+            "saved_ratio": round(saved / self.tokens_in, 4) if self.tokens_in else 0.0
+        }
+
+    def close(self):
+        if self._report is not None and not self._report.closed:
+            self._report.close()
+
+
+def _figure_outcomes(response: str) -> dict:
+    """
+    Returns:
+        dict: Key figure -> (present, crypto_relevant, labels) of a valid response.
+    """
+    from nl_case_analyzer.records import SLEUTELFIGUREN, LABELS
+
+    data = json.loads(response)
+    outcomes = {}
+    for figure in SLEUTELFIGUREN:
+        fig_data = data.get(figure)
+        if not fig_data:
+            outcomes[figure] = (False, None, {label: None for label in LABELS})
+            continue
+        labels = fig_data.get("labels") or {}
+        outcomes[figure] = (True, fig_data.get("crypto_relevant"), {label: labels.get(label) for label in LABELS})
+    return outcomes
+
+
+def compare_responses(pairs) -> dict:
+    """
+    Measures how well responses to trimmed input agree with those to the full input.
+
+    Args:
+        pairs (iterable): (full response, trimmed response) pairs of valid responses.
+
+    Returns:
+        dict: Agreement ratios of key figure presence, crypto relevance and every
+        label, where a label only counts for figures present in both responses.
+    """
+    from nl_case_analyzer.records import LABELS
+
+    counts = {"presence": [0, 0], "crypto_relevant": [0, 0], **{label: [0, 0] for label in LABELS}}
+    snippets = identical = 0
+    for full, trimmed in pairs:
+        full_outcomes, trimmed_outcomes = _figure_outcomes(full), _figure_outcomes(trimmed)
+        snippets += 1
+        identical += full_outcomes == trimmed_outcomes
+        for figure, (present, crypto_relevant, labels) in full_outcomes.items():
+            other_present, other_crypto_relevant, other_labels = trimmed_outcomes[figure]
+            counts["presence"][0] += present == other_present
+            counts["presence"][1] += 1
+            if present and other_present:
+                counts["crypto_relevant"][0] += crypto_relevant == other_crypto_relevant
+                counts["crypto_relevant"][1] += 1
+                for label in LABELS:
+                    counts[label][0] += labels[label] == other_labels[label]
+                    counts[label][1] += 1
+
+    return {
+        "snippets": snippets,
+        "identical_ratio": round(identical / snippets, 4) if snippets else 0.0,
+        "agreement": {
+            name: round(agree / total, 4) if total else None
+            for name, (agree, total) in counts.items()
+        }
+    }
+
+
+def evaluate_trimming(openai_api, validator, snippets, trimmer, sample_size=100, seed=1, concurrency=None):
+    """
+    Analyzes a sample of snippets both untrimmed and trimmed and compares the outcomes.
+
+    Only snippets that the trimmer actually shortens are sampled, the others are sent
+    unchanged anyway. Pairs where either response is invalid are left out of the
+    agreement and counted separately.
+
+    Args:
+        openai_api (AnalyzeGPT): The configured API handler.
+        validator (ResponseValidator): Validator of the responses.
+        snippets (iterable): Candidate text snippets.
+        trimmer (InputTrimmer): The trimmer under evaluation.
+        sample_size (int): Number of trimmed snippets analyzed.
+        seed (int): Seed of the sample.
+        concurrency (int): Maximum number of concurrent API calls.
+
+    Returns:
+        dict: Agreement report, including the tokens saved on the sample.
+    """
+    candidates = [(text, trimmed) for text, trimmed in ((text, trimmer.trim(text)) for text in snippets)
+                  if trimmed is not text]
+    sample = random.Random(seed).sample(candidates, min(sample_size, len(candidates)))
+    inputs = [text for pair in sample for text in pair]
+
+    async def analyze():
+        responses = [None] * len(inputs)
+        async for idx, response in openai_api.analyze_snippets_async(inputs, concurrency=concurrency):
+            responses[idx] = response
+        return responses
+
+    responses = asyncio.run(analyze())
+    pairs = []
+    invalid = 0
+    for full, trimmed in zip(responses[0::2], responses[1::2]):
+        if full and trimmed and validator.is_valid(full) and validator.is_valid(trimmed):
+            pairs.append((full, trimmed))
+        else:
+            invalid += 1
+
+    report = compare_responses(pairs)
+    tokens_in = sum(estimate_tokens(text) for text, _ in sample)
+    tokens_out = sum(estimate_tokens(trimmed) for _, trimmed in sample)
+    report.update({
+        "candidates": len(candidates),
+        "sampled": len(sample),
+        "invalid_pairs": invalid,
+        "input_tokens_saved": tokens_in - tokens_out,
+        "saved_ratio": round((tokens_in - tokens_out) / tokens_in, 4) if tokens_in else 0.0
+    })
+    return report
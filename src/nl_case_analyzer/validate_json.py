@@ -1,18 +1,190 @@
 import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from jsonschema import validate, Draft7Validator, exceptions
 
+
+# Draft7 type checks, mirroring jsonschema's default type checker
+_TYPE_CHECKS = {
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+    "string": "isinstance({0}, str)",
+    "boolean": "isinstance({0}, bool)",
+    "null": "{0} is None",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "integer": "((isinstance({0}, int) and not isinstance({0}, bool)) or (isinstance({0}, float) and {0}.is_integer()))",
+}
+
+# keywords without effect on the validation outcome
+_ANNOTATIONS = {"description", "title", "$comment", "default", "examples", "$schema", "$id"}
+
+_SUPPORTED = {"type", "enum", "properties", "required", "additionalProperties", "items"} | _ANNOTATIONS
+
+
+class _SchemaCompiler:
+    """
+    Generates the source of a single predicate function for a schema, with every
+    keyword check inlined, so no per-keyword dispatch happens at validation time.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self.variables = 0
+
+    def constant(self, value) -> str:
+        name = f"c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def variable(self) -> str:
+        self.variables += 1
+        return f"v{self.variables}"
+
+    def emit(self, schema, var: str, indent: int) -> bool:
+        if not isinstance(schema, dict) or not set(schema) <= _SUPPORTED:
+            return False
+        pad = "    " * indent
+
+        types = schema.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            if not all(t in _TYPE_CHECKS for t in types):
+                return False
+            condition = " or ".join(_TYPE_CHECKS[t].format(var) for t in types)
+            self.lines.append(f"{pad}if not ({condition}): return False")
+
+        if "enum" in schema:
+            # enums mixing types would need jsonschema's bool/int aware equality
+            if not all(isinstance(option, str) for option in schema["enum"]):
+                return False
+            options = self.constant(frozenset(schema["enum"]))
+            self.lines.append(f"{pad}if not (isinstance({var}, str) and {var} in {options}): return False")
+
+        properties = schema.get("properties", {})
+        required = schema.get("required", ())
+        additional = schema.get("additionalProperties", True)
+        if properties or required or additional is not True:
+            self.lines.append(f"{pad}if isinstance({var}, dict):")
+            inner = pad + "    "
+            if required:
+                self.lines.append(f"{inner}if not {var}.keys() >= {self.constant(frozenset(required))}: return False")
+            for name, subschema in properties.items():
+                item = self.variable()
+                self.lines.append(f"{inner}if {name!r} in {var}:")
+                self.lines.append(f"{inner}    {item} = {var}[{name!r}]")
+                if not self.emit(subschema, item, indent + 2):
+                    return False
+            known = self.constant(frozenset(properties))
+            if additional is False:
+                self.lines.append(f"{inner}if not {var}.keys() <= {known}: return False")
+            elif additional is not True:
+                key, item = self.variable(), self.variable()
+                self.lines.append(f"{inner}for {key}, {item} in {var}.items():")
+                self.lines.append(f"{inner}    if {key} in {known}: continue")
+                if not self.emit(additional, item, indent + 2):
+                    return False
+
+        if "items" in schema:
+            item = self.variable()
+            self.lines.append(f"{pad}if isinstance({var}, list):")
+            self.lines.append(f"{pad}    for {item} in {var}:")
+            if not self.emit(schema["items"], item, indent + 2):
+                return False
+        return True
+
+
+def compile_schema(schema: dict):
+    """
+    Compiles a schema into a plain Python predicate specialised to its structure.
+
+    Only the keywords used by `sleutelfiguren_schema` are supported (type, enum with
+    string values, properties, required, additionalProperties and single-schema
+    items). Schemas using anything else return None, so callers fall back to the
+    generic Draft7 validator.
+
+    Args:
+        schema (dict): A JSON schema (the inner 'schema' of the response format).
+
+    Returns:
+        callable: Predicate returning True when an instance is valid, or None.
+    """
+    compiler = _SchemaCompiler()
+    if not compiler.emit(schema, "v0", 1):
+        return None
+    source = "def check(v0):\n" + "\n".join(compiler.lines) + "\n    return True\n"
+    namespace = dict(compiler.constants)
+    exec(compile(source, "<compiled schema>", "exec"), namespace)
+    return namespace["check"]
+
+
+class ValidationReport:
+    """
+    Outcome of a bulk validation: one flag per response, in input order, and error
+    counts per (JSON path, validator keyword) instead of printed lines.
+    """
+
+    def __init__(self):
+        self.results = []
+        self.errors = Counter()
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def valid_count(self) -> int:
+        return sum(self.results)
+
+    def invalid_indices(self) -> list:
+        return [idx for idx, valid in enumerate(self.results) if not valid]
+
+    def merge(self, other):
+        self.results.extend(other.results)
+        self.errors.update(other.errors)
+        return self
+
+    def summary(self) -> dict:
+        return {
+            "responses": self.total,
+            "valid": self.valid_count,
+            "invalid": self.total - self.valid_count,
+            "errors": {f"{path} [{validator}]": count for (path, validator), count in self.errors.most_common()}
+        }
+
+
+# validator of a bulk validation worker process, set by `_init_validation_worker`
+_worker_validator = None
+
+
+def _init_validation_worker(schema):
+    global _worker_validator
+    _worker_validator = ResponseValidator(schema)
+
+
+def _validate_chunk(responses):
+    return _worker_validator._validate_chunk(responses)
+
+
 class ResponseValidator:
     def __init__(self, schema):
         self.schema = schema
         # Pre-compile the schema for better performance
         self.validator = Draft7Validator(self.schema['schema'])
+        # Fast predicate specialised to the schema, None when the schema is unsupported
+        self.fast_check = compile_schema(self.schema['schema'])
 
-    def is_valid(self, response_json):
+    def _passes(self, response_data):
+        # the fast path only decides valid responses; failures go through Draft7
+        return self.fast_check is not None and self.fast_check(response_data)
+
+    def is_valid(self, response_json, quiet=False):
         """
         Validates the response JSON against the schema.
 
         Parameters:
             response_json (str or dict): The JSON response from the API.
+            quiet (bool): Do not print the reason of a failed validation.
 
         Returns:
             bool: True if valid, False otherwise.
@@ -24,14 +196,19 @@ class ResponseValidator:
             else:
                 response_data = response_json
 
+            if self._passes(response_data):
+                return True
+
             # Perform the validation
             self.validator.validate(response_data)
             return True
         except exceptions.ValidationError as ve:
-            print(f"Validation Error: {ve.message}")
+            if not quiet:
+                print(f"Validation Error: {ve.message}")
             return False
         except json.JSONDecodeError as je:
-            print(f"JSON Decode Error: {je.msg}")
+            if not quiet:
+                print(f"JSON Decode Error: {je.msg}")
             return False
 
     def get_validation_errors(self, response_json):
@@ -56,4 +233,58 @@ class ResponseValidator:
         except json.JSONDecodeError as je:
             errors.append(f"JSON Decode Error: {je.msg}")
         return errors
-# 
\ No newline at end of file
+
+    def _validate_chunk(self, responses):
+        report = ValidationReport()
+        for response_json in responses:
+            try:
+                response_data = json.loads(response_json) if isinstance(response_json, str) else response_json
+            except json.JSONDecodeError:
+                report.results.append(False)
+                report.errors[("$", "json")] += 1
+                continue
+
+            if self._passes(response_data):
+                report.results.append(True)
+                continue
+
+            errors = list(self.validator.iter_errors(response_data))
+            report.results.append(not errors)
+            report.errors.update((error.json_path, error.validator) for error in errors)
+        return report
+
+    def validate_many(self, responses, workers=None, chunksize=2000):
+        """
+        Validates many responses at once, without printing per-response errors.
+
+        Valid responses are accepted by the compiled fast check; every other response
+        is validated by Draft7 `iter_errors`, so outcomes and errors match jsonschema.
+
+        Parameters:
+            responses (iterable): JSON responses as strings or dicts.
+            workers (int): Number of worker processes, None or 1 validates inline.
+            chunksize (int): Responses sent to a worker at once.
+
+        Returns:
+            ValidationReport: Per-response outcomes and aggregated error counts.
+        """
+        if not workers or workers <= 1:
+            return self._validate_chunk(responses)
+
+        def chunks():
+            chunk = []
+            for response_json in responses:
+                chunk.append(response_json)
+                if len(chunk) == chunksize:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        report = ValidationReport()
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_validation_worker,
+                                 initargs=(self.schema,)) as executor:
+            for chunk_report in executor.map(_validate_chunk, chunks()):
+                report.merge(chunk_report)
+        return report
@@ -1,14 +1,124 @@
 import os
-import json
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import seaborn as sns
 import pandas as pd
-from IPython.display import display
+from nl_case_analyzer.records import ResultRecords
+
+
+def plot_label_distribution(figuur, counts):
+    """
+    Draw the label distribution bar plot of one sleutelfiguur from pre-aggregated counts.
+
+    Parameters:
+        figuur (str): The sleutelfiguur display name, used in the title.
+        counts (pd.DataFrame): Columns label, value and count.
+
+    Returns:
+        matplotlib.figure.Figure: The generated figure.
+    """
+    plt.figure(figsize=(16, 10))
+    # countplot is barplot summing a count of 1 per row, so summing pre-aggregated
+    # counts without error bars draws the same figure, pixel for pixel
+    ax = sns.barplot(
+        data=counts,
+        x='label',
+        y='count',
+        hue='value',
+        estimator='sum',
+        errorbar=None,
+        palette='Set2',
+        order=['betrouwbaarheid', 'rechtmatigheid', 'overtuigend'],
+        hue_order=['ja', 'nee', 'nvt']
+        )
+
+    plt.suptitle(f"De {figuur}", fontsize=20)
+    plt.title("Verdeling van de standpunten volgens de criteria", fontsize=14, x=.55)
+
+    plt.xlabel('Criterium', fontsize= 16)
+    plt.ylabel('Aantal', fontsize = 16)
+    plt.xticks(fontsize=14)
+
+    handles, labels = ax.get_legend_handles_labels()
+    ax.legend(handles, labels, title='Voldoet aan criterium:', loc='upper right', bbox_to_anchor=(1.15,1),
+              fontsize=14)
+    plt.tight_layout()
+
+    for p in ax.patches:
+        height = round(p.get_height())
+        if height > 0:
+            ax.annotate(
+                f'{height}',
+                (p.get_x() + p.get_width() / 2., height),
+                ha='center',  # Horizontal alignment
+                va='bottom',  # Vertical alignment
+                fontsize=14,
+                color='black',
+                xytext=(0, 2),  # Offset text by 5 points above the bar
+                textcoords='offset points'
+            )
+    
+    # Capture the current figure
+    fig = ax.get_figure()
+    plt.close(fig)  # Prevents the figure from displaying automatically
+    return fig
+
+
+def render_wordcloud(word_counts, wordcloud_path):
+    """
+    Render the wordcloud of the top 50% most frequent tags to a file.
+
+    Parameters:
+        word_counts (Counter): Tag frequencies.
+        wordcloud_path (str): Output path of the image.
+    """
+    # Select top 50% most frequent words
+    most_common_words = word_counts.most_common()
+    top_50_percent_index = len(most_common_words) // 2
+    top_words = dict(most_common_words[:top_50_percent_index])
+    # Generate word cloud
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(top_words)
+    # Save the word cloud
+    plt.figure(figsize=(15, 7.5))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+    plt.tight_layout(pad=0)
+    plt.savefig(wordcloud_path)
+    plt.close()
+
+
+def _init_render_worker():
+    # worker processes never display figures; the backend of the importing process,
+    # e.g. a notebook, is left alone, headless entry points select Agg themselves
+    matplotlib.use('Agg')
+
+
+def _render_plot_job(figuur, counts_rows, plot_path):
+    fig = plot_label_distribution(figuur, pd.DataFrame(counts_rows, columns=['label', 'value', 'count']))
+    fig.savefig(plot_path)
+    return plot_path
+
+
+def _render_wordcloud_job(frequencies, wordcloud_path):
+    render_wordcloud(Counter(dict(frequencies)), wordcloud_path)
+    return wordcloud_path
+
 
 class Visualizer:
-    def __init__(self, json_list, output_dir):
+    def __init__(self, json_list, output_dir, df=None, tags=None):
+        """
+        Initializes the Visualizer.
+
+        Args:
+            json_list (list): Responses as JSON strings.
+            output_dir (str): Directory the visuals folder is created in.
+            df (pd.DataFrame): Prepared label data, skips parsing `json_list`.
+            tags (list): Prepared tags for the wordcloud, skips parsing `json_list`.
+        """
         self.json_list = json_list
         self.output_dir = output_dir
         self.visuals_dir = os.path.join(self.output_dir, 'vizuals')
@@ -20,150 +130,101 @@ class Visualizer:
                         }
         self.sleutelfiguren = list(self.sleutelfiguren_mapping.keys())
 
-        self.df = self._prepare_data_viz()
+        # parse every response exactly once, all views are built from these records
+        self.records = ResultRecords.from_json_list(json_list)
+        self.tags = tags
+        self.df = df if df is not None else self._prepare_data_viz()
+
+    @classmethod
+    def from_parquet(cls, path, output_dir):
+        """
+        Builds a Visualizer from a columnar results file written by `ParquetWriter`,
+        reading only the label, crypto_relevant and tags columns.
+
+        Args:
+            path (str): Location of the Parquet results file.
+            output_dir (str): Directory the visuals folder is created in.
+
+        Returns:
+            Visualizer: Visualizer ready to plot, without any JSON parsing.
+        """
+        from nl_case_analyzer.parquet_writer import read_results, LABELS
+
+        columns = read_results(path, columns=['sleutelfiguur', 'crypto_relevant', *LABELS, 'tags'])
+        tags = [tag for fig_tags in columns['tags'] if fig_tags is not None for tag in fig_tags]
+
+        df = columns.drop(columns='tags').melt(
+            id_vars=['sleutelfiguur', 'crypto_relevant'],
+            value_vars=list(LABELS),
+            var_name='label',
+            value_name='value'
+        )
+        visualizer = cls([], output_dir, df=df, tags=tags)
+        df['sleutelfiguur'] = df['sleutelfiguur'].astype(str).map(visualizer.sleutelfiguren_mapping)
+        df['value'] = df['value'].astype(str)
+        df['crypto_relevant'] = df['crypto_relevant'].map({True: 'Ja', False: 'Nee'})
+        return visualizer
 
     def _prepare_data_viz(self):
         """
-        Process the JSON data and prepare a pandas DataFrame.
+        Prepare a pandas DataFrame with one row per (sleutelfiguur, label) from the parsed records.
         """
-        records = []
-        for json_str in self.json_list:
-            try:
-                data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                print(f"Invalid JSON string skipped: {e}")
-                continue
-            
-            for figuur in self.sleutelfiguren:
-                fig_data = data.get(figuur)
-
-                if fig_data:
-                    labels = fig_data.get('labels', {})
-                    crypto_relevant = fig_data.get('crypto_relevant', "false")
-                    for label_name, label_value in labels.items():
-                        records.append({
-                            'sleutelfiguur': self.sleutelfiguren_mapping.get(figuur),
-                            'label': label_name,
-                            'value': label_value.lower(), 
-                            'crypto_relevant': 'Ja' if crypto_relevant else 'Nee'
-                        })
-        df = pd.DataFrame(records)
+        df = self.records.label_frame(
+            [self.sleutelfiguren_mapping[figuur] for figuur in self.sleutelfiguren]
+        )
         if df.empty:
             print("Warning: The prepared DataFrame is empty.")
-        return df 
-                      
-    
+        return df
+
     def _prepare_data_full_conversion(self):
         """
-        Process the JSON data and prepare a pandas DataFrame.
+        Prepare a pandas DataFrame with one row per sleutelfiguur and all of its fields.
         """
-        records = []
-        for json_str in self.json_list:
-            try:
-                data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                print(f"Invalid JSON string skipped: {e}")
-                continue
-            for idx, json_str in enumerate(self.json_list, start=1):
-                for figuur in self.sleutelfiguren:
-                    fig_data = data.get(figuur)
-
-                    if fig_data:
-                        rol = fig_data.get('rol', None)
-                        zin = fig_data.get('zin', None)
-                        crypto_relevant = fig_data.get('crypto_relevant', False)
-                        reden = fig_data.get('reden', None)
-                        tags = fig_data.get('tags', [])
-                        labels = fig_data.get('labels', {})
-                        
-                        # Extract individual label values, defaulting to 'NVT' if not present
-                        betrouwbaarheid = labels.get('betrouwbaarheid', 'NVT')
-                        rechtmatigheid = labels.get('rechtmatigheid', 'NVT')
-                        overtuigend = labels.get('overtuigend', 'NVT')
-                        
-                        # Convert tags list to a comma-separated string
-                        tags_str = ", ".join(tags)
-                        
-                        records.append({
-                            'json_index': idx,  # To track which JSON string the data came from
-                            'sleutelfiguur': figuur,
-                            'rol': rol,
-                            'zin': zin,
-                            'crypto_relevant': 'Ja' if crypto_relevant else 'Nee',
-                            'reden': reden,
-                            'tags': tags_str,
-                            'betrouwbaarheid': betrouwbaarheid.lower(),  # Convert to lowercase for consistency
-                            'rechtmatigheid': rechtmatigheid.lower(),
-                            'overtuigend': overtuigend.lower()
-                        })
-                    
-        
-        df = pd.DataFrame(records)
+        df = self.records.full_frame()
         if df.empty:
             print("Warning: The prepared DataFrame is empty.")
         else:
             print(f"Data preparation complete. {len(df)} records added to the DataFrame.")
         return df
 
-    def generate_plot(self, figuur):
+    def label_counts(self, figuur):
         """
-        Generate a seaborn count plot for a given sleutelfiguur.
+        Count the label values of a given sleutelfiguur.
+
+        Parameters:
+            figuur (str): The sleutelfiguur display name, e.g. 'Rechter'.
+
+        Returns:
+            pd.DataFrame: Columns label, value and count.
+        """
+        fig_df = self.df[self.df['sleutelfiguur'] == figuur]
+        return fig_df.groupby(['label', 'value']).size().reset_index(name='count')
+
+    def generate_plot(self, figuur, counts=None):
+        """
+        Generate a seaborn bar plot of the label counts for a given sleutelfiguur.
         
         Parameters:
             figuur (str): The sleutelfiguur to plot.
+            counts (pd.DataFrame): Pre-aggregated label, value and count columns.
+                Defaults to the counts of the prepared DataFrame.
         
         Returns:
             matplotlib.figure.Figure: The generated figure.
         """
-        fig_df = self.df[self.df['sleutelfiguur'] == figuur]
-        if fig_df.empty:
+        if counts is None:
+            counts = self.label_counts(figuur)
+        if counts.empty:
             print(f"No data available for sleutelfiguur: {figuur}")
             return None
-        plt.figure(figsize=(16, 10))
-        ax = sns.countplot(
-            data=fig_df,
-            x='label',
-            hue='value',
-            palette='Set2',
-            order=['betrouwbaarheid', 'rechtmatigheid', 'overtuigend'],
-            hue_order=['ja', 'nee', 'nvt']
-            )
-
-        plt.suptitle(f"De {figuur}", fontsize=20)
-        plt.title("Verdeling van de standpunten volgens de criteria", fontsize=14, x=.55)
-
-        plt.xlabel('Criterium', fontsize= 16)
-        plt.ylabel('Aantal', fontsize = 16)
-        plt.xticks(fontsize=14)
-
-        handles, labels = ax.get_legend_handles_labels()
-        ax.legend(handles, labels, title='Voldoet aan criterium:', loc='upper right', bbox_to_anchor=(1.15,1),
-                  fontsize=14)
-        plt.tight_layout()
-
-        for p in ax.patches:
-            height = round(p.get_height())
-            if height > 0:
-                ax.annotate(
-                    f'{height}',
-                    (p.get_x() + p.get_width() / 2., height),
-                    ha='center',  # Horizontal alignment
-                    va='bottom',  # Vertical alignment
-                    fontsize=14,
-                    color='black',
-                    xytext=(0, 2),  # Offset text by 5 points above the bar
-                    textcoords='offset points'
-                )
-        
-        # Capture the current figure
-        fig = ax.get_figure()
-        plt.close(fig)  # Prevents the figure from displaying automatically
-        return fig
+        return plot_label_distribution(figuur, counts)
     
     def display_plots(self):
         """
         Display all generated plots inline within the Jupyter notebook.
         """
+        from IPython.display import display
+
         for figuur in self.sleutelfiguren:
             fig = self.generate_plot(self.sleutelfiguren_mapping.get(figuur))
             if fig:
@@ -187,28 +248,106 @@ class Visualizer:
 
 
 
-    def generate_wordcloud(self):
-        # Extract tags from all sleutelfiguren
-        tags = []
-        for json_str in self.json_list:
-            data = json.loads(json_str)
-            for figuur in self.sleutelfiguren:
-                if data.get(figuur) and data[figuur].get('tags'):
-                    tags.extend(data[figuur]['tags'])
-        # Calculate word frequencies
-        word_counts = Counter(tags)
-        # Select top 50% most frequent words
-        most_common_words = word_counts.most_common()
-        top_50_percent_index = len(most_common_words) // 2
-        top_words = dict(most_common_words[:top_50_percent_index])
-        # Generate word cloud
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(top_words)
-        # Save the word cloud
-        plt.figure(figsize=(15, 7.5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.tight_layout(pad=0)
+    def _run_render_jobs(self, jobs, max_workers=None):
+        """
+        Render figures from pre-aggregated counts, in a pool of headless worker
+        processes when `max_workers` is larger than 1.
+
+        Parameters:
+            jobs (list): (name, function, args) tuples of module-level render jobs.
+            max_workers (int): Number of worker processes, None or 1 renders inline.
+
+        Returns:
+            list: Names of the rendered figures.
+        """
+        started = time.perf_counter()
+        if not max_workers or max_workers <= 1 or len(jobs) <= 1:
+            for name, job, args in jobs:
+                print(f"Figure saved to {job(*args)}")
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)),
+                                     initializer=_init_render_worker) as executor:
+                futures = [executor.submit(job, *args) for _, job, args in jobs]
+                for future in futures:
+                    print(f"Figure saved to {future.result()}")
+        if jobs:
+            print(f"Rendered {len(jobs)} figures in {time.perf_counter() - started:.2f}s")
+        return [name for name, _, _ in jobs]
+
+    def save_plots_parallel(self, max_workers=4):
+        """
+        Save all label distribution plots and the wordcloud, rendering each figure
+        in its own worker process from pre-aggregated counts.
+
+        Parameters:
+            max_workers (int): Number of worker processes.
+
+        Returns:
+            list: Names of the rendered figures.
+        """
+        jobs = []
+        for figuur in self.sleutelfiguren:
+            name = self.sleutelfiguren_mapping.get(figuur)
+            counts = self.label_counts(name)
+            if counts.empty:
+                print(f"No data available for sleutelfiguur: {name}")
+                continue
+            plot_path = os.path.join(self.visuals_dir, f"{figuur}_label_distribution.png")
+            jobs.append((figuur, _render_plot_job, (name, counts.values.tolist(), plot_path)))
+
+        word_counts = Counter(self.tags) if self.tags is not None else self.records.tag_counter()
+        wordcloud_path = os.path.join(self.visuals_dir, 'wordcloud.png')
+        jobs.append(('wordcloud', _render_wordcloud_job, (list(word_counts.items()), wordcloud_path)))
+        return self._run_render_jobs(jobs, max_workers)
+
+    def save_plots_incremental(self, store, max_workers=None, tag_counts=None):
+        """
+        Render the label distribution plots and the wordcloud from an AggregateStore,
+        skipping every figure whose underlying counts did not change.
+
+        Parameters:
+            store (AggregateStore): Store holding the up-to-date counts.
+            max_workers (int): Number of worker processes to render in parallel,
+                None renders in this process.
+            tag_counts (dict): Tag frequencies of the wordcloud, e.g. the canonical tags
+                of a TagIndex; the raw tag counts of the store when None.
+
+        Returns:
+            list: Names of the figures that were re-rendered.
+        """
+        jobs = []
+        digests = {}
+        for figuur in self.sleutelfiguren:
+            counts = store.figure_counts(figuur)
+            digest = store.digest(counts)
+            plot_path = os.path.join(self.visuals_dir, f"{figuur}_label_distribution.png")
+            if not counts:
+                print(f"No data available for sleutelfiguur: {figuur}")
+            elif store.needs_render(figuur, digest, plot_path):
+                jobs.append((figuur, _render_plot_job, (self.sleutelfiguren_mapping.get(figuur), counts, plot_path)))
+                digests[figuur] = digest
+            else:
+                print(f"Label distribution plot for {figuur} is up to date.")
+
+        if tag_counts is None:
+            tag_counts = store.tag_counts()
+        digest = store.digest(tag_counts)
+        wordcloud_path = os.path.join(self.visuals_dir, 'wordcloud.png')
+        if store.needs_render('wordcloud', digest, wordcloud_path):
+            jobs.append(('wordcloud', _render_wordcloud_job, (list(tag_counts.items()), wordcloud_path)))
+            digests['wordcloud'] = digest
+        else:
+            print("Word cloud is up to date.")
+
+        rendered = self._run_render_jobs(jobs, max_workers)
+        for name in rendered:
+            store.mark_rendered(name, digests[name])
+        return rendered
+
+    def generate_wordcloud(self, word_counts=None):
+        # Calculate word frequencies of the tags of all sleutelfiguren
+        if word_counts is None:
+            word_counts = Counter(self.tags) if self.tags is not None else self.records.tag_counter()
         wordcloud_path = os.path.join(self.visuals_dir, 'wordcloud.png')
-        plt.savefig(wordcloud_path)
-        plt.close()
+        render_wordcloud(word_counts, wordcloud_path)
         print(f"Word cloud saved to {wordcloud_path}")
@@ -0,0 +1,441 @@
+import os
+import glob
+import json
+import time
+import socket
+import sqlite3
+import asyncio
+
+
+def shard_of(snippet_id: str, num_shards: int) -> int:
+    """
+    Returns:
+        int: Shard of a snippet, derived from its stable (hex) id so every run and
+        every node assigns the same snippets to the same shard.
+    """
+    return int(snippet_id[:8], 16) % num_shards
+
+
+class WorkQueue:
+    """
+    SQLite work queue of snippet shards, shared by any number of worker processes.
+
+    Snippets are partitioned into shards by their stable id. Workers claim a shard
+    under a lease that they renew with heartbeats; a shard whose lease expires, e.g.
+    because its worker died, is handed out again. Claims run in an immediate
+    transaction, so two workers never hold the same shard.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 5):
+        """
+        Initializes the WorkQueue.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            lease_seconds (float): Time a claim stays valid without a heartbeat.
+            max_attempts (int): Claims of a shard before it is marked as failed.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS snippets (
+                snippet_id TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_snippets_shard ON snippets (shard, position);
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result_path TEXT,
+                updated_at REAL NOT NULL
+            );
+            """
+        )
+
+    @property
+    def num_shards(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'num_shards'").fetchone()
+        return int(row[0]) if row else None
+
+    def enqueue(self, items, num_shards: int) -> int:
+        """
+        Adds snippets to the queue; snippets that are already queued are ignored.
+
+        Args:
+            items (iterable): (snippet id, text) pairs, in dataset order.
+            num_shards (int): Number of shards, fixed when the queue is first filled.
+
+        Returns:
+            int: Number of newly queued snippets.
+        """
+        current = self.num_shards
+        if current is not None and current != num_shards:
+            raise ValueError(f"Queue {self.path} already uses {current} shards, not {num_shards}.")
+
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('num_shards', ?)", (str(num_shards),)
+            )
+            offset = self.connection.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM snippets").fetchone()[0]
+            before = self.connection.execute("SELECT COUNT(*) FROM snippets").fetchone()[0]
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO snippets VALUES (?, ?, ?, ?)",
+                ((sid, shard_of(sid, num_shards), offset + position, text)
+                 for position, (sid, text) in enumerate(items))
+            )
+            added = self.connection.execute("SELECT COUNT(*) FROM snippets").fetchone()[0] - before
+            # shards that received new snippets have to be (re)analyzed
+            self.connection.execute(
+                "INSERT OR IGNORE INTO shards (shard, updated_at) SELECT DISTINCT shard, ? FROM snippets", (now,)
+            )
+            if added:
+                self.connection.execute(
+                    "UPDATE shards SET status = 'pending', attempts = 0, updated_at = ? "
+                    "WHERE status = 'done' AND shard IN (SELECT shard FROM snippets WHERE position >= ?)",
+                    (now, offset)
+                )
+        return added
+
+    def claim(self, worker: str):
+        """
+        Leases the next pending shard, or a shard whose lease has expired.
+
+        Returns:
+            int or None: The claimed shard, None when no shard is available.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            # shards that keep losing their worker are given up on
+            self.connection.execute(
+                "UPDATE shards SET status = 'failed', worker = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = self.connection.execute(
+                "SELECT shard FROM shards WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY attempts, shard LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE shard = ?",
+                (worker, now + self.lease_seconds, now, row[0])
+            )
+        return row[0]
+
+    def heartbeat(self, shard: int, worker: str) -> bool:
+        """
+        Renews the lease of a claimed shard.
+
+        Returns:
+            bool: False when the worker no longer holds the lease.
+        """
+        now = time.time()
+        with self.connection:
+            updated = self.connection.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? "
+                "WHERE shard = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, shard, worker)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, shard: int, worker: str, result_path: str) -> bool:
+        """
+        Marks a claimed shard as done.
+
+        Returns:
+            bool: False when the worker no longer held the lease.
+        """
+        with self.connection:
+            updated = self.connection.execute(
+                "UPDATE shards SET status = 'done', lease_expires = NULL, result_path = ?, updated_at = ? "
+                "WHERE shard = ? AND worker = ? AND status = 'leased'",
+                (result_path, time.time(), shard, worker)
+            ).rowcount
+        return updated == 1
+
+    def release(self, shard: int, worker: str):
+        """
+        Hands a claimed shard back, e.g. after an error, so another worker can take it.
+        """
+        with self.connection:
+            self.connection.execute(
+                "UPDATE shards SET status = 'pending', worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE shard = ? AND worker = ? AND status = 'leased'",
+                (time.time(), shard, worker)
+            )
+
+    def snippets(self, shard: int) -> list:
+        """
+        Returns:
+            list: (snippet id, text) pairs of a shard, in dataset order.
+        """
+        return self.connection.execute(
+            "SELECT snippet_id, text FROM snippets WHERE shard = ? ORDER BY position", (shard,)
+        ).fetchall()
+
+    def snippet_ids(self) -> list:
+        """
+        Returns:
+            list: All queued snippet ids, in dataset order.
+        """
+        return [row[0] for row in self.connection.execute("SELECT snippet_id FROM snippets ORDER BY position")]
+
+    def progress(self) -> dict:
+        """
+        Returns:
+            dict: Number of shards per status.
+        """
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+
+    def close(self):
+        self.connection.close()
+
+
+def enqueue_snippets(snippets, queue_path: str, num_shards: int = 64, deduplicate: bool = True,
+                     dedup_threshold: float = 0.85, dedup_mapping_path: str = None) -> int:
+    """
+    Fills the work queue with the snippets, one representative per group of
+    (near-)duplicates when `deduplicate` is set.
+
+    Returns:
+        int: Number of newly queued snippets.
+    """
+    from nl_case_analyzer.data_loader import snippet_id
+    from nl_case_analyzer.dedup import SnippetDeduplicator
+
+    items = ((snippet_id(snippet), snippet) for snippet in snippets)
+    deduplicator = SnippetDeduplicator(threshold=dedup_threshold) if deduplicate else None
+    if deduplicator is not None:
+        items = deduplicator.filter(items)
+
+    queue = WorkQueue(queue_path)
+    try:
+        added = queue.enqueue(items, num_shards)
+        print(f"Queued {added} new snippets in {num_shards} shards. Queue: {queue.progress()}")
+    finally:
+        queue.close()
+
+    if deduplicator is not None:
+        print(f"Deduplication: {deduplicator.stats()}")
+        if dedup_mapping_path:
+            deduplicator.save_mapping(dedup_mapping_path)
+    return added
+
+
+def shard_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"shard_{shard:05d}.jsonl")
+
+
+async def run_leased(coroutine, queue: WorkQueue, shard: int, worker: str, heartbeat_interval: float):
+    """
+    Runs `coroutine` while renewing the lease of a claimed shard, and cancels it as
+    soon as a heartbeat finds that the lease was lost, e.g. reclaimed by another
+    worker after it expired.
+
+    Returns:
+        The result of `coroutine`; CancelledError is raised when the lease was lost.
+    """
+    analysis = asyncio.ensure_future(coroutine)
+    while not analysis.done():
+        await asyncio.wait([analysis], timeout=heartbeat_interval)
+        if not analysis.done() and not queue.heartbeat(shard, worker):
+            print(f"Worker {worker} lost the lease of shard {shard}, stopping it.")
+            analysis.cancel()
+    return analysis.result()
+
+
+def run_worker(queue_path: str,
+               shard_dir: str,
+               worker_id: str = None,
+               api_key_env: str = "OPENAI_API",
+               base_url: str = None,
+               cache_path: str = None,
+               concurrency: int = None,
+               max_repair_attempts: int = 2,
+               prefilter: bool = True,
+               backends_path: str = None,
+               heartbeat_interval: float = 30,
+               lease_seconds: float = 300) -> list:
+    """
+    Claims shards until the queue is empty and analyzes them into per-shard journals.
+
+    Each worker uses its own credentials and rate limiter, so workers can spread a run
+    over several API keys and machines sharing the queue and shard directory. A shard
+    journal is resumed when a shard is re-claimed after a crash.
+
+    Args:
+        queue_path (str): Location of the work queue database.
+        shard_dir (str): Directory of the per-shard result journals.
+        worker_id (str): Name of the worker, defaults to host and process id.
+        api_key_env (str): Environment variable holding this worker's API key; it must
+            be set unless `backends_path` is given.
+        base_url (str): Alternative OpenAI-compatible endpoint.
+        cache_path (str): Optional response cache of this worker.
+        concurrency (int): Maximum number of concurrent API calls.
+        max_repair_attempts (int): Re-requests per snippet whose response is invalid.
+        prefilter (bool): Journal the all-null result for snippets without any crypto term.
+        backends_path (str): Optional JSON file of endpoints to route the calls over,
+            used instead of `api_key_env` and `base_url`.
+        heartbeat_interval (float): Seconds between lease renewals.
+        lease_seconds (float): Lease duration of a claim.
+
+    Returns:
+        list: The shards completed by this worker.
+    """
+    from nl_case_analyzer.openai_config import ConfigGPT
+    from nl_case_analyzer.analyze import AnalyzeGPT
+    from nl_case_analyzer.response_cache import ResponseCache
+    from nl_case_analyzer.rate_limiter import AdaptiveRateLimiter
+    from nl_case_analyzer.validate_json import ResponseValidator
+    from nl_case_analyzer.checkpoint import CheckpointJournal
+    from nl_case_analyzer.prefilter import CryptoPrefilter
+    from nl_case_analyzer.backends import load_router
+    from nl_case_analyzer.main import run_analysis, repair_stage
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    api_key = os.getenv(api_key_env)
+    if not api_key and backends_path is None:
+        # never fall back to the default key, the worker would share its quota unnoticed
+        raise ValueError(f"Worker {worker_id} reads its API key from '{api_key_env}', which is not set.")
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+
+    config = ConfigGPT(api_key=api_key, base_url=base_url).get_configuration()
+    response_cache = ResponseCache(cache_path) if cache_path else None
+    router = load_router(
+        backends_path, default_rate_limits=config["rate_limits"]
+    ).start_health_checks() if backends_path else None
+    validator = ResponseValidator(schema=config["json_schema"])
+    openai_api = AnalyzeGPT(
+        config,
+        cache=response_cache,
+        rate_limiter=AdaptiveRateLimiter(**config["rate_limits"]),
+        router=router,
+        validator=validator
+    )
+    relevance_filter = CryptoPrefilter(config["json_schema"]) if prefilter else None
+
+    async def analyze_shard(shard, journal):
+        completed = journal.completed_ids()
+        prefiltered = journal.sources_by_id()
+        pending = [(sid, text) for sid, text in queue.snippets(shard) if sid not in completed]
+
+        def journal_skipped(sid, result, source):
+            # journaled once, also when the snippet is skipped again on every resume
+            if prefiltered.get(sid) != source:
+                journal.append(sid, result, source)
+
+        if relevance_filter is not None:
+            pending = list(relevance_filter.filter(pending, on_skip=journal_skipped))
+        snippet_ids = [sid for sid, _ in pending]
+        snippet_texts = dict(pending)
+        _, failures = await run_analysis(
+            openai_api, validator, journal, [text for _, text in pending], snippet_ids, snippet_texts,
+            concurrency=concurrency
+        )
+        return await repair_stage(
+            openai_api, validator, journal, failures, max_attempts=max_repair_attempts, concurrency=concurrency
+        )
+
+    async def run():
+        completed_shards = []
+        while True:
+            shard = queue.claim(worker_id)
+            if shard is None:
+                return completed_shards
+            result_path = shard_path(shard_dir, shard)
+            print(f"Worker {worker_id} claimed shard {shard}.")
+            try:
+                with CheckpointJournal(result_path) as journal:
+                    invalid = await run_leased(
+                        analyze_shard(shard, journal), queue, shard, worker_id, heartbeat_interval
+                    )
+            except asyncio.CancelledError:
+                continue
+            except Exception:
+                queue.release(shard, worker_id)
+                raise
+            if invalid:
+                print(f"Shard {shard}: no valid response for {invalid}")
+            if queue.complete(shard, worker_id, result_path):
+                completed_shards.append(shard)
+                print(f"Worker {worker_id} completed shard {shard}. Queue: {queue.progress()}")
+
+    try:
+        # one event loop for all shards, the async client is bound to it
+        return asyncio.run(run())
+    finally:
+        if relevance_filter is not None:
+            print(f"Pre-filter: {relevance_filter.stats()}")
+        queue.close()
+        if router is not None:
+            router.stop()
+        if response_cache is not None:
+            response_cache.close()
+
+
+def merge_shards(queue_path: str, shard_dir: str, dedup_mapping_path: str = None) -> dict:
+    """
+    Combines the per-shard journals into one result set.
+
+    The order is deterministic and independent of which worker finished first: the
+    dataset order of the queue, or of the deduplication mapping when given, in which
+    case every duplicate gets the response of its representative.
+
+    Args:
+        queue_path (str): Location of the work queue database.
+        shard_dir (str): Directory of the per-shard result journals.
+        dedup_mapping_path (str): Snippet -> representative mapping of the enqueue step.
+
+    Returns:
+        dict: Snippet id -> response, ready for `main.write_stage`.
+    """
+    from nl_case_analyzer.checkpoint import CheckpointJournal
+
+    responses = {}
+    for path in sorted(glob.glob(os.path.join(shard_dir, "shard_*.jsonl"))):
+        with CheckpointJournal(path) as journal:
+            for sid, response in journal.responses_by_id().items():
+                responses.setdefault(sid, response)
+
+    queue = WorkQueue(queue_path)
+    try:
+        progress = queue.progress()
+        if set(progress) - {"done"}:
+            print(f"Warning: not every shard is done yet: {progress}")
+        order = queue.snippet_ids()
+    finally:
+        queue.close()
+
+    if dedup_mapping_path and os.path.exists(dedup_mapping_path):
+        with open(dedup_mapping_path, "r", encoding="utf-8") as f:
+            mapping = json.load(f)["mapping"]
+        return {
+            sid: responses[representative]
+            for sid, representative in mapping.items()
+            if representative in responses
+        }
+    return {sid: responses[sid] for sid in order if sid in responses}
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from nl_case_analyzer.checkpoint import CheckpointJournal
+
+
+class TornJournalTest(unittest.TestCase):
+    """
+    A journal whose last write was cut off by a crash must resume cleanly.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+        with CheckpointJournal(self.path) as journal:
+            journal.append("a", '{"x": 1}')
+            journal.append("b", '{"x": 2}')
+        # crash halfway through writing the record of "c"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"snippet_id": "c", "respo')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_torn_line_is_skipped(self):
+        with CheckpointJournal(self.path) as journal:
+            self.assertEqual(journal.completed_ids(), {"a", "b"})
+            self.assertEqual(journal.responses(), ['{"x": 1}', '{"x": 2}'])
+
+    def test_appends_after_torn_line(self):
+        with CheckpointJournal(self.path) as journal:
+            journal.append("c", '{"x": 3}')
+            journal.append("d", '{"x": 4}')
+
+        with CheckpointJournal(self.path) as journal:
+            self.assertEqual(
+                journal.responses_by_id(),
+                {"a": '{"x": 1}', "b": '{"x": 2}', "c": '{"x": 3}', "d": '{"x": 4}'}
+            )
+
+    def test_resume_twice(self):
+        # reopening must not add blank lines or lose records
+        for snippet_id in ("c", "d"):
+            with CheckpointJournal(self.path) as journal:
+                journal.append(snippet_id, "{}")
+        with CheckpointJournal(self.path) as journal:
+            self.assertEqual(journal.completed_ids(), {"a", "b", "c", "d"})
+            self.assertEqual(len(list(journal.iter_records())), 4)
+
+
+
+class PrefilteredRecordsTest(unittest.TestCase):
+    """
+    Null results of the pre-filter are kept apart from model responses.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_prefiltered_snippets_are_not_completed(self):
+        with CheckpointJournal(self.path) as journal:
+            journal.append("a", '{"x": null}', source="prefilter")
+            journal.append("b", '{"x": 1}')
+
+        with CheckpointJournal(self.path) as journal:
+            self.assertEqual(journal.completed_ids(), {"b"})
+            self.assertEqual(journal.sources_by_id(), {"a": "prefilter"})
+            self.assertEqual(journal.responses_by_id(), {"a": '{"x": null}', "b": '{"x": 1}'})
+
+    def test_model_response_replaces_prefiltered(self):
+        with CheckpointJournal(self.path) as journal:
+            journal.append("a", '{"x": null}', source="prefilter")
+            journal.append("b", '{"x": 1}')
+            journal.append("a", '{"x": 2}')
+            journal.append("a", '{"x": null}', source="prefilter")
+
+        with CheckpointJournal(self.path) as journal:
+            self.assertEqual(journal.completed_ids(), {"a", "b"})
+            self.assertEqual(journal.sources_by_id(), {})
+            self.assertEqual(journal.responses(), ['{"x": 2}', '{"x": 1}'])
+
+
+if __name__ == "__main__":
+    unittest.main()
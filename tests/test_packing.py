@@ -0,0 +1,67 @@
+import json
+import random
+import unittest
+
+from jsonschema import Draft7Validator
+
+from nl_case_analyzer.mock_server import sample_instance
+from nl_case_analyzer.openai_config import ConfigGPT
+from nl_case_analyzer.packing import (
+    FRAGMENT_FIELD, PACKED_FIELD, build_packed_schema, pack_snippets, unpack_response
+)
+
+
+class PackingRoundTripTest(unittest.TestCase):
+    """
+    Every snippet of a packed request gets back its own answer, or None.
+    """
+
+    def setUp(self):
+        self.json_schema = ConfigGPT(api_key="unused").json_schema
+        self.snippets = ["De rechtbank oordeelt...", "Fragment 7: de raadsman", 'Met """ aanhalingstekens']
+        self.answers = [
+            sample_instance(self.json_schema["schema"], random.Random(seed)) for seed in range(len(self.snippets))
+        ]
+
+    def packed(self, elements):
+        return json.dumps({PACKED_FIELD: elements}, ensure_ascii=False)
+
+    def element(self, number):
+        return {FRAGMENT_FIELD: number, **self.answers[number - 1]}
+
+    def test_numbered_fragments(self):
+        message = pack_snippets(self.snippets)
+        for number, snippet in enumerate(self.snippets, start=1):
+            self.assertIn(f"Fragment {number}:\n\"\"\"\n{snippet}\n\"\"\"", message)
+
+    def test_round_trip_in_any_order(self):
+        elements = [self.element(number) for number in (3, 1, 2)]
+        packed_schema = build_packed_schema(self.json_schema)["schema"]
+        self.assertTrue(Draft7Validator(packed_schema).is_valid(json.loads(self.packed(elements))))
+
+        parts = unpack_response(self.packed(elements), len(self.snippets))
+        self.assertEqual([json.loads(part) for part in parts], self.answers)
+        single = Draft7Validator(self.json_schema["schema"])
+        self.assertTrue(all(single.is_valid(json.loads(part)) for part in parts))
+
+    def test_missing_fragment(self):
+        parts = unpack_response(self.packed([self.element(1), self.element(3)]), len(self.snippets))
+        self.assertIsNone(parts[1])
+        self.assertEqual(json.loads(parts[2]), self.answers[2])
+
+    def test_extra_and_duplicate_fragments(self):
+        elements = [self.element(1), self.element(2), self.element(2), self.element(3),
+                    {FRAGMENT_FIELD: 4, **self.answers[0]}, {FRAGMENT_FIELD: "1"}, "geen object"]
+        parts = unpack_response(self.packed(elements), len(self.snippets))
+        self.assertEqual(json.loads(parts[0]), self.answers[0])
+        # an ambiguous answer is dropped, so the snippet gets a single-snippet call
+        self.assertIsNone(parts[1])
+        self.assertEqual(json.loads(parts[2]), self.answers[2])
+
+    def test_unparseable_response(self):
+        self.assertEqual(unpack_response('{"resultaten": [', 2), [None, None])
+        self.assertEqual(unpack_response('{"anders": []}', 2), [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import json
+import random
+import unittest
+
+from nl_case_analyzer.mock_server import sample_instance
+from nl_case_analyzer.openai_config import ConfigGPT
+from nl_case_analyzer.repair import ResponseRepairer
+from nl_case_analyzer.validate_json import ResponseValidator
+
+
+class TruncatedResponseTest(unittest.TestCase):
+    """
+    A response cut off by the token limit is only repaired when no content was lost.
+    """
+
+    def setUp(self):
+        schema = ConfigGPT(api_key="unused").json_schema
+        self.repairer = ResponseRepairer(ResponseValidator(schema=schema))
+        self.response = json.dumps(
+            sample_instance(schema["schema"], random.Random(7), null_ratio=0), ensure_ascii=False
+        )
+
+    def cut_after(self, marker, extra):
+        return self.response[:self.response.index(marker) + len(marker) + extra]
+
+    def test_missing_closing_braces_are_repaired(self):
+        repaired = self.repairer.repair(self.response[:-2])
+        self.assertEqual(json.loads(repaired), json.loads(self.response))
+
+    def test_cut_inside_string_is_rejected(self):
+        self.assertIsNone(self.repairer.repair(self.cut_after('"zin": "', 3)))
+        self.assertEqual(self.repairer.stats()["rejected"], {"truncated_content": 1})
+
+    def test_cut_inside_array_is_rejected(self):
+        self.assertIsNone(self.repairer.repair(self.cut_after('"tags": [', 0)))
+        self.assertEqual(self.repairer.stats()["rejected"], {"truncated_content": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from nl_case_analyzer.tags import TagIndex, TagNormalizer, light_dutch_stem
+
+
+class NegatedTagsTest(unittest.TestCase):
+    """
+    Tags with opposite outcomes must resolve to different canonical tags.
+    """
+
+    def setUp(self):
+        self.index = TagIndex(":memory:", normalizer=TagNormalizer(light_dutch_stem))
+
+    def tearDown(self):
+        self.index.close()
+
+    def assertDistinct(self, first, second):
+        # resolve both orders, a fuzzy merge depends on which tag comes first
+        for a, b in ((first, second), (second, first)):
+            index = TagIndex(":memory:", normalizer=TagNormalizer(light_dutch_stem))
+            with index:
+                self.assertNotEqual(index.resolve(a)[0], index.resolve(b)[0], f"'{a}' merged into '{b}'")
+
+    def test_niet_before_on_word(self):
+        self.assertDistinct("ontvankelijk", "niet ontvankelijk")
+        self.assertDistinct("ontvankelijk", "niet-ontvankelijk")
+        self.assertDistinct("onrechtmatig", "niet onrechtmatig")
+
+    def test_niet_is_not_fuzzy_merged(self):
+        self.assertDistinct("bewijs uitgesloten", "bewijs niet uitgesloten")
+        self.assertDistinct("bewijs uitgesloten", "bewijs onuitgesloten")
+
+    def test_spellings_of_one_negation_merge(self):
+        tag_id, _ = self.index.resolve("niet ontvankelijk")
+        self.assertEqual(self.index.resolve("niet-ontvankelijk")[0], tag_id)
+        self.assertEqual(self.index.resolve("Niet ontvankelijk.")[0], tag_id)
+
+        tag_id, _ = self.index.resolve("manipulatie niet aannemelijk")
+        self.assertEqual(self.index.resolve("manipulatie onaannemelijk")[0], tag_id)
+
+    def test_typos_still_merge(self):
+        tag_id, _ = self.index.resolve("onbetrouwbare gegevens")
+        self.assertEqual(self.index.resolve("onbetrouwbaar gegevns")[0], tag_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
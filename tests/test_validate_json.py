@@ -0,0 +1,108 @@
+import copy
+import random
+import unittest
+
+from jsonschema import Draft7Validator
+
+from nl_case_analyzer.mock_server import sample_instance
+from nl_case_analyzer.openai_config import ConfigGPT
+from nl_case_analyzer.validate_json import compile_schema
+
+
+# values of every JSON type, including the bool/int and int/float edge cases
+_REPLACEMENTS = [None, True, False, 0, 1, 1.0, 1.5, "", "Ja", "x", [], ["x"], {}, {"x": 1}]
+
+
+def mutations(instance):
+    """
+    Yields copies of `instance` with one defect each: a value replaced by a value of
+    another type, a required member removed or an unknown member added.
+    """
+    def paths(value, path=()):
+        yield path
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from paths(item, path + (key,))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                yield from paths(item, path + (index,))
+
+    def replaced(path, new=None, delete=False, add=False):
+        copied = copy.deepcopy(instance)
+        parent = copied
+        for step in path[:-1]:
+            parent = parent[step]
+        if add:
+            target = parent[path[-1]] if path else copied
+            target["onbekend"] = "x"
+        elif delete:
+            del parent[path[-1]]
+        else:
+            parent[path[-1]] = new
+        return copied
+
+    for path in paths(instance):
+        if not path:
+            continue
+        for new in _REPLACEMENTS:
+            yield replaced(path, new)
+        parent = instance
+        for step in path[:-1]:
+            parent = parent[step]
+        if isinstance(parent, dict):
+            yield replaced(path, delete=True)
+        if isinstance(parent, dict) and isinstance(parent[path[-1]], dict):
+            yield replaced(path, add=True)
+
+
+class CompiledSchemaTest(unittest.TestCase):
+    """
+    The compiled predicate must decide every instance exactly like Draft7Validator.
+    """
+
+    def assertSameVerdict(self, schema, instances):
+        check = compile_schema(schema)
+        self.assertIsNotNone(check)
+        validator = Draft7Validator(schema)
+        count = 0
+        for instance in instances:
+            self.assertEqual(check(instance), validator.is_valid(instance), instance)
+            count += 1
+        return count
+
+    def test_response_schema(self):
+        schema = ConfigGPT(api_key="unused").json_schema["schema"]
+        validator = Draft7Validator(schema)
+        for seed in range(5):
+            instance = sample_instance(schema, random.Random(seed))
+            self.assertTrue(validator.is_valid(instance))
+            checked = self.assertSameVerdict(schema, [instance, *mutations(instance)])
+            self.assertGreater(checked, 100)
+
+    def test_type_edge_cases(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "integer": {"type": "integer"},
+                "number": {"type": "number"},
+                "flag": {"type": "boolean"},
+                "label": {"type": ["string", "null"], "enum": ["Ja", "Nee"]},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "extra": {"type": "object", "additionalProperties": {"type": "integer"}}
+            },
+            "required": ["integer"],
+            "additionalProperties": False
+        }
+        instances = [{"integer": value} for value in _REPLACEMENTS]
+        instances += [{"integer": 1, name: value} for name in schema["properties"] for value in _REPLACEMENTS]
+        instances += [{"integer": 1, "extra": {"a": value}} for value in _REPLACEMENTS]
+        instances += [[], "x", None, {}, {"integer": 1, "other": 1}]
+        self.assertSameVerdict(schema, instances)
+
+    def test_unsupported_keywords_fall_back(self):
+        self.assertIsNone(compile_schema({"type": "string", "minLength": 1}))
+        self.assertIsNone(compile_schema({"enum": [1, True]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
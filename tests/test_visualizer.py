@@ -0,0 +1,89 @@
+import os
+import sys
+import random
+import tempfile
+import subprocess
+import unittest
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+# the tests run headless, like the CLI
+matplotlib.use('Agg')
+from nl_case_analyzer.visualizer import plot_label_distribution, plt, sns
+
+
+def plot_label_distribution_countplot(figuur, rows):
+    # the plot as drawn before the counts were pre-aggregated, a countplot of the rows
+    plt.figure(figsize=(16, 10))
+    ax = sns.countplot(
+        data=rows,
+        x='label',
+        hue='value',
+        palette='Set2',
+        order=['betrouwbaarheid', 'rechtmatigheid', 'overtuigend'],
+        hue_order=['ja', 'nee', 'nvt']
+        )
+    plt.suptitle(f"De {figuur}", fontsize=20)
+    plt.title("Verdeling van de standpunten volgens de criteria", fontsize=14, x=.55)
+    plt.xlabel('Criterium', fontsize=16)
+    plt.ylabel('Aantal', fontsize=16)
+    plt.xticks(fontsize=14)
+    handles, labels = ax.get_legend_handles_labels()
+    ax.legend(handles, labels, title='Voldoet aan criterium:', loc='upper right', bbox_to_anchor=(1.15, 1),
+              fontsize=14)
+    plt.tight_layout()
+    for p in ax.patches:
+        height = round(p.get_height())
+        if height > 0:
+            ax.annotate(f'{height}', (p.get_x() + p.get_width() / 2., height), ha='center', va='bottom',
+                        fontsize=14, color='black', xytext=(0, 2), textcoords='offset points')
+    fig = ax.get_figure()
+    plt.close(fig)
+    return fig
+
+
+def backend_after(code):
+    # a fresh interpreter, the backend of this process is already chosen
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport matplotlib.pyplot as plt; print(plt.get_backend())"],
+        capture_output=True, text=True, check=True, env={**os.environ, "MPLBACKEND": "pdf"}
+    )
+    return result.stdout.strip().lower()
+
+
+class BackendTest(unittest.TestCase):
+    def test_import_keeps_backend_of_importer(self):
+        self.assertEqual(backend_after("import nl_case_analyzer.visualizer"), 'pdf')
+
+    def test_render_worker_is_headless(self):
+        code = "from nl_case_analyzer.visualizer import _init_render_worker; _init_render_worker()"
+        self.assertEqual(backend_after(code), 'agg')
+
+
+class LabelDistributionPlotTest(unittest.TestCase):
+
+    def test_counts_render_like_countplot(self):
+        rng = random.Random(1)
+        rows = pd.DataFrame([
+            {'label': rng.choice(['betrouwbaarheid', 'rechtmatigheid', 'overtuigend']),
+             'value': rng.choice(['ja', 'nee', 'nee', 'nvt'])}
+            for _ in range(2000)
+        ])
+        # a missing label/value combination must not shift the other bars
+        rows = rows[~((rows['label'] == 'overtuigend') & (rows['value'] == 'nvt'))]
+        counts = rows.groupby(['label', 'value']).size().reset_index(name='count')
+
+        with tempfile.TemporaryDirectory() as directory:
+            old_path, new_path = os.path.join(directory, 'old.png'), os.path.join(directory, 'new.png')
+            plot_label_distribution_countplot('Rechter', rows).savefig(old_path)
+            plot_label_distribution('Rechter', counts).savefig(new_path)
+            old, new = plt.imread(old_path), plt.imread(new_path)
+
+        self.assertEqual(old.shape, new.shape)
+        self.assertTrue(np.array_equal(old, new))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+from nl_case_analyzer.work_queue import WorkQueue, run_leased
+
+
+class LeaseTest(unittest.TestCase):
+    """
+    A shard is held by one worker at a time and handed out again when its lease expires.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "queue.sqlite")
+        self.queue = self.open_queue()
+        self.queue.enqueue([("0a1b2c3d", "tekst 1"), ("ffee0011", "tekst 2")], num_shards=1)
+
+    def open_queue(self, lease_seconds=0.1, max_attempts=5):
+        # every worker has its own connection, like separate processes
+        queue = WorkQueue(self.path, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_expired_lease_is_reclaimed(self):
+        other = self.open_queue()
+        shard = self.queue.claim("a")
+        self.assertEqual(shard, 0)
+        self.assertIsNone(other.claim("b"))
+
+        time.sleep(0.15)
+        self.assertEqual(other.claim("b"), shard)
+        self.assertFalse(self.queue.heartbeat(shard, "a"))
+        self.assertFalse(self.queue.complete(shard, "a", "a.jsonl"))
+        self.assertTrue(other.complete(shard, "b", "b.jsonl"))
+        self.assertEqual(self.queue.progress(), {"done": 1})
+
+    def test_heartbeat_keeps_lease(self):
+        other = self.open_queue()
+        shard = self.queue.claim("a")
+        for _ in range(3):
+            time.sleep(0.05)
+            self.assertTrue(self.queue.heartbeat(shard, "a"))
+        self.assertIsNone(other.claim("b"))
+
+    def test_released_shard_is_pending(self):
+        shard = self.queue.claim("a")
+        self.queue.release(shard, "a")
+        self.assertEqual(self.queue.progress(), {"pending": 1})
+        self.assertEqual(self.open_queue().claim("b"), shard)
+
+    def test_shard_fails_after_max_attempts(self):
+        queue = self.open_queue(lease_seconds=0.01, max_attempts=2)
+        self.assertEqual(queue.claim("a"), 0)
+        time.sleep(0.02)
+        self.assertEqual(queue.claim("b"), 0)
+        time.sleep(0.02)
+        self.assertIsNone(queue.claim("c"))
+        self.assertEqual(queue.progress(), {"failed": 1})
+
+
+class RunLeasedTest(unittest.TestCase):
+    """
+    Work on a shard is cancelled as soon as its worker loses the lease.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "queue.sqlite")
+        self.queue = WorkQueue(path, lease_seconds=0.1)
+        self.other = WorkQueue(path, lease_seconds=0.1)
+        self.queue.enqueue([("0a1b2c3d", "tekst")], num_shards=1)
+        self.shard = self.queue.claim("a")
+
+    def tearDown(self):
+        self.queue.close()
+        self.other.close()
+        self.directory.cleanup()
+
+    def test_heartbeats_renew_lease(self):
+        async def analysis():
+            await asyncio.sleep(0.3)
+            # the lease outlived its duration, so no one else could take the shard
+            return self.other.claim("b")
+
+        result = asyncio.run(run_leased(analysis(), self.queue, self.shard, "a", heartbeat_interval=0.03))
+        self.assertIsNone(result)
+
+    def test_lost_lease_cancels_work(self):
+        finished = []
+
+        async def analysis():
+            await asyncio.sleep(5)
+            finished.append(True)
+
+        async def run():
+            # the worker stalls past its lease, another worker takes the shard over
+            work = asyncio.ensure_future(run_leased(analysis(), self.queue, self.shard, "a", heartbeat_interval=0.3))
+            await asyncio.sleep(0.15)
+            self.assertEqual(self.other.claim("b"), self.shard)
+            await work
+
+        started = time.monotonic()
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(run())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(finished, [])
+        self.assertTrue(self.other.heartbeat(self.shard, "b"))
+
+
+if __name__ == "__main__":
+    unittest.main()